@@ -2,7 +2,8 @@ from __future__ import annotations
 
 import hashlib
 import json
-from collections.abc import Mapping
+from collections.abc import Mapping, Sequence
+from datetime import datetime, timezone
 from functools import cached_property
 from pathlib import Path
 from typing import TypeAlias
@@ -11,24 +12,48 @@ import frontmatter
 import tomlkit
 from pydantic import ValidationError
 
+from autopub.build_cache import (
+    BuildCache,
+    default_cache_directory,
+    interpreter_fingerprint,
+    source_fingerprint,
+)
+from autopub.build_matrix import run_build_matrix
+from autopub.changes import changed_files, load_event
+from autopub.discovery import get_package_name
+from autopub.distributions import find_distributions
 from autopub.exceptions import (
     ArtifactHashMismatch,
     ArtifactNotFound,
     AutopubException,
+    DistributionsInvalid,
+    DistributionsNotFound,
     InvalidConfiguration,
     NoPackageManagerPluginFound,
+    NothingToRelease,
+    PublishFailed,
     ReleaseFileEmpty,
     ReleaseFileNotFound,
     ReleaseNotesEmpty,
+    ReleaseQueueEmpty,
     ReleaseTypeInvalid,
     ReleaseTypeMissing,
 )
+from autopub.executor import Executor
+from autopub.git_info import GitInfo
+from autopub.index import IndexClient, files_for_version, is_complete
+from autopub.manifest import update_manifest
 from autopub.plugin_loader import load_plugins
 from autopub.plugins import (
+    AutopubMatrixBuildPlugin,
     AutopubPackageManagerPlugin,
     AutopubPlugin,
 )
+from autopub.publishing import publish_to_repositories
+from autopub.settings import AutopubSettings
 from autopub.types import ReleaseInfo
+from autopub.upload import UploadConfig, Uploader, credentials_from_environment
+from autopub.validation import validate_distributions
 
 ConfigValue: TypeAlias = (
     None | bool | str | float | int | list["ConfigValue"] | Mapping[str, "ConfigValue"]
@@ -37,18 +62,47 @@ ConfigValue: TypeAlias = (
 ConfigType = Mapping[str, ConfigValue]
 
 
+RELEASE_TYPES = ("patch", "minor", "major")
+
+
 class Autopub:
     RELEASE_FILE_PATH = "RELEASE.md"
+    RELEASE_QUEUE_PATH = "release-queue"
     plugins: list[AutopubPlugin]
 
-    def __init__(self, plugins: list[type[AutopubPlugin]] | None = None) -> None:
-        self.plugins = [plugin() for plugin in plugins or []]
+    def __init__(
+        self,
+        plugins: list[type[AutopubPlugin]] | None = None,
+        root: Path | None = None,
+    ) -> None:
+        # every path is resolved against the root instead of the current
+        # directory, so that several projects can be released in one process
+        self.root = root or Path.cwd()
+        self.executor = Executor()
+        self._settings: AutopubSettings | None = None
+        self.git_info = GitInfo(cwd=self.root, executor=self.executor)
+        self.plugins = self._create_plugins(plugins or [])
+
+    def _create_plugins(
+        self, plugin_classes: list[type[AutopubPlugin]]
+    ) -> list[AutopubPlugin]:
+        plugins = [plugin_class() for plugin_class in plugin_classes]
+
+        for plugin in plugins:
+            plugin.root = self.root
+            # all plugins share the same git metadata, so each query
+            # is only executed once per run
+            plugin.git_info = self.git_info
+            # and record their commands in the same run summary
+            plugin.executor = self.executor
+
+        return plugins
 
     @cached_property
     def config(self) -> ConfigType:
-        pyproject_path = Path.cwd() / "pyproject.toml"
+        pyproject_path = self.root / "pyproject.toml"
 
-        if not Path("pyproject.toml").exists():
+        if not pyproject_path.exists():
             return {}
 
         content = pyproject_path.read_text()
@@ -57,9 +111,21 @@ class Autopub:
 
         return data.get("tool", {}).get("autopub", {})  # type: ignore
 
+    @property
+    def settings(self) -> AutopubSettings:
+        """The options of `[tool.autopub]`, as validated by `validate_config`
+        (or on first use, when it wasn't called)."""
+        if self._settings is None:
+            try:
+                self._settings = AutopubSettings.model_validate(self.config)
+            except ValidationError as e:
+                raise InvalidConfiguration({"autopub": e}) from e
+
+        return self._settings
+
     @property
     def release_file(self) -> Path:
-        return Path.cwd() / self.RELEASE_FILE_PATH
+        return self.root / self.RELEASE_FILE_PATH
 
     @property
     def release_notes(self) -> str:
@@ -71,7 +137,7 @@ class Autopub:
 
     @property
     def release_info_file(self) -> Path:
-        return Path(".autopub") / "release_info.json"
+        return self.root / ".autopub" / "release_info.json"
 
     @property
     def release_info(self) -> ReleaseInfo:
@@ -85,6 +151,43 @@ class Autopub:
 
         return ReleaseInfo.from_dict(release_info)
 
+    @property
+    def release_queue_directory(self) -> Path:
+        return self.root / self.RELEASE_QUEUE_PATH
+
+    @property
+    def release_queue(self) -> list[Path]:
+        """The queued releases, oldest first."""
+        if not self.release_queue_directory.exists():
+            return []
+
+        return sorted(self.release_queue_directory.glob("*.json"))
+
+    def check_changes(self, event: Mapping[str, object] | None = None) -> None:
+        """Stop early when the changes being released don't touch the project.
+
+        Only applies when path filters are configured. This runs before the
+        plugins are loaded, so it only relies on git and the CI event payload
+        (read from `GITHUB_EVENT_PATH` by default). When the changed files
+        can't be determined the changes are considered releasable.
+        """
+        filters = self.settings
+
+        # queued releases are published by a later run, whatever it's for
+        if not filters.paths or self.release_queue:
+            return
+
+        files = changed_files(self.git_info, event or load_event())
+
+        if files is None:
+            return
+
+        if not any(
+            file == self.RELEASE_FILE_PATH or filters.is_releasable(file)
+            for file in files
+        ):
+            raise NothingToRelease()
+
     def load_plugins(self, default_plugins: list[str] | None = None) -> None:
         default_plugins = default_plugins or []
 
@@ -92,14 +195,12 @@ class Autopub:
 
         all_plugins = default_plugins + additional_plugins
 
-        plugins = load_plugins(all_plugins)
+        plugins = load_plugins(all_plugins, root=self.root)
 
-        self.plugins += [plugin_class() for plugin_class in plugins]
+        self.plugins += self._create_plugins(plugins)
 
     def check(self) -> None:
-        release_file = Path(self.RELEASE_FILE_PATH)
-
-        if not release_file.exists():
+        if not self.release_file.exists():
             for plugin in self.plugins:
                 plugin.on_release_file_not_found()
 
@@ -126,10 +227,171 @@ class Autopub:
         ):
             raise NoPackageManagerPluginFound()
 
+        version = self._release_version()
+        dist = self.root / "dist"
+        cache, key = self._get_build_cache()
+
+        if cache is not None and key is not None:
+            if restored := cache.restore(key, dist):
+                print(f"♻️  restored {len(restored)} file(s) from the build cache")
+                update_manifest(dist)
+
+                return
+
+        published = self._published_files(version)
+
+        if (
+            published
+            and is_complete(published, self._expected_pythons)
+            and self._download_published(published, dist)
+        ):
+            print(f"⏩ {version} is already on the index, skipping the build")
+            update_manifest(dist)
+
+            return
+
+        before = self._get_dist_files(dist)
+
+        settings = self.settings
+
         for plugin in self.plugins:
-            if isinstance(plugin, AutopubPackageManagerPlugin):
+            if not isinstance(plugin, AutopubPackageManagerPlugin):
+                continue
+
+            if settings.build_matrix and isinstance(plugin, AutopubMatrixBuildPlugin):
+                run_build_matrix(
+                    plugin, settings.build_matrix, dist, settings.build_matrix_workers
+                )
+            else:
                 plugin.build()
 
+        if cache is not None and key is not None:
+            after = self._get_dist_files(dist)
+
+            cache.store(
+                key,
+                [file for file, mtime in after.items() if before.get(file) != mtime],
+            )
+
+        # hashed once here, the later steps read the digests from the manifest
+        update_manifest(dist)
+
+    @property
+    def _expected_pythons(self) -> list[str]:
+        """The Python versions that a complete release has wheels for, when
+        the build matrix is used."""
+        if not any(
+            isinstance(plugin, AutopubMatrixBuildPlugin) for plugin in self.plugins
+        ):
+            return []
+
+        return self.settings.build_matrix
+
+    def _get_dist_files(self, dist: Path) -> dict[Path, int]:
+        if not dist.is_dir():
+            return {}
+
+        return {
+            file: file.stat().st_mtime_ns for file in dist.iterdir() if file.is_file()
+        }
+
+    def _release_version(self) -> str | None:
+        """The version being released, when it's known."""
+        try:
+            return self.release_info.version
+        except (AutopubException, OSError):
+            return None
+
+    def _published_files(self, version: str | None) -> dict[str, str] | None:
+        """The files of `version` that are already on the index the default
+        repository uploads to, by file name.
+
+        Returns None when no index is configured or it can't be queried.
+        """
+        if not version or (index := self._index) is None:
+            return None
+
+        client, name = index
+        files = client.project_files(name)
+
+        return None if files is None else files_for_version(files, name, version)
+
+    @cached_property
+    def _index(self) -> tuple[IndexClient, str] | None:
+        """The client of the index the default repository uploads to and the
+        name of the project, when an index is configured."""
+        config = self.settings
+        pyproject = self.root / "pyproject.toml"
+
+        if not config.index_url or not pyproject.exists():
+            return None
+
+        if not (name := get_package_name(pyproject)):
+            return None
+
+        client = IndexClient(config.index_url, self.root / ".autopub" / "index.json")
+
+        return client, name
+
+    def _download_published(self, published: dict[str, str], dist: Path) -> bool:
+        """Download the published files of the release into `dist`, for the
+        steps after publishing (release assets, checksums), instead of
+        building them again.
+
+        Returns False, removing the files it downloaded, when any of them
+        can't be downloaded.
+        """
+        if self._index is None:
+            return False
+
+        client, _ = self._index
+        dist.mkdir(parents=True, exist_ok=True)
+        downloaded: list[Path] = []
+
+        for filename, digest in published.items():
+            if (path := client.download(filename, digest, dist)) is None:
+                for path in downloaded:
+                    path.unlink(missing_ok=True)
+
+                return False
+
+            downloaded.append(path)
+
+        return True
+
+    def _get_build_cache(self) -> tuple[BuildCache | None, str | None]:
+        """Return the build cache and the key of the current sources.
+
+        The key covers the files in the working tree, the version being
+        released, the interpreter and the package manager plugins with their
+        configuration.
+        """
+        config = self.settings
+
+        if not config.build_cache:
+            return None, None
+
+        fingerprint = source_fingerprint(self.git_info, self.root)
+
+        if fingerprint is None:
+            return None, None
+
+        version = self._release_version() or ""
+
+        builders = [
+            f"{type(plugin).__module__}.{type(plugin).__qualname__}:{plugin._config!r}"
+            for plugin in self.plugins
+            if isinstance(plugin, AutopubPackageManagerPlugin)
+        ]
+
+        cache = BuildCache(default_cache_directory(), config.build_cache_size)
+
+        matrix = ",".join(self.settings.build_matrix)
+
+        return cache, cache.key(
+            fingerprint, version, interpreter_fingerprint(), matrix, *builders
+        )
+
     def prepare(self) -> None:
         release_info = self.release_info
 
@@ -141,26 +403,232 @@ class Autopub:
 
         self._write_artifact(release_info)
 
-    def publish(self, repository: str | None = None) -> None:
+    def publish(self, repository: str | Sequence[str] | None = None) -> None:
         print("🛺 publishing")
         release_info = self.release_info
 
         print("release info", release_info)
         print("plugins", self.plugins)
 
+        self._publish(release_info, repository)
+
+    def enqueue(self) -> Path:
+        """Add the checked release to the queue instead of publishing it.
+
+        The release file is replaced by an entry in the queue directory, so
+        that several merged pull requests can be published together with
+        `publish_batch`.
+        """
+        release_info = self.release_info
+
+        timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        entry = (
+            self.release_queue_directory
+            / f"{timestamp}-{self.release_file_hash[:12]}.json"
+        )
+
+        entry.parent.mkdir(exist_ok=True)
+        entry.write_text(json.dumps(release_info.dict()))
+
+        release_info.add_changed_file(entry.relative_to(self.root))
+
+        for plugin in self.plugins:
+            plugin.on_release_queued(release_info)
+
+        self._delete_release_file()
+
+        return entry
+
+    def _merge_release_queue(self, entries: list[Path]) -> ReleaseInfo:
+        queued = [
+            ReleaseInfo.from_dict(json.loads(entry.read_text())) for entry in entries
+        ]
+
+        release_info = ReleaseInfo(
+            release_type=max(
+                (info.release_type for info in queued), key=RELEASE_TYPES.index
+            ),
+            release_notes="\n\n".join(info.release_notes.strip() for info in queued),
+        )
+
+        for info in queued:
+            release_info.additional_info.update(info.additional_info)
+            release_info.additional_release_notes += info.additional_release_notes
+            release_info.pull_requests += info.pull_requests
+
+        return release_info
+
+    def publish_batch(
+        self, repository: str | Sequence[str] | None = None
+    ) -> ReleaseInfo:
+        """Release all the queued releases at once.
+
+        The queued releases are merged into one, with the highest release
+        type and all the notes, which is then prepared, built and published
+        like a single release. The queue entries are removed as part of the
+        release.
+        """
+        entries = self.release_queue
+
+        if not entries:
+            raise ReleaseQueueEmpty()
+
+        release_info = self._merge_release_queue(entries)
+
+        for plugin in self.plugins:
+            plugin.post_check(release_info)
+
+        for plugin in self.plugins:
+            plugin.prepare(release_info)
+
         for plugin in self.plugins:
-            # TODO: maybe pass release info to publish method?
-            if isinstance(plugin, AutopubPackageManagerPlugin):
-                plugin.publish(repository=repository)
+            plugin.post_prepare(release_info)
+
+        for entry in entries:
+            entry.unlink()
+            release_info.add_changed_file(entry.relative_to(self.root))
+
+        self.build()
+        self._publish(release_info, repository)
+
+        return release_info
+
+    def _publish(
+        self, release_info: ReleaseInfo, repository: str | Sequence[str] | None
+    ) -> None:
+        """Publish to every repository, then run the post publish hooks.
+
+        Repositories are published to concurrently. The hooks only run once,
+        and only when every repository that isn't optional succeeded.
+        """
+        config = self.settings
+
+        # before anything goes over the network
+        self.check_distributions()
+
+        repositories: list[str | None] = (
+            [repository]
+            if repository is None or isinstance(repository, str)
+            else list(dict.fromkeys(repository)) or [None]
+        )
+
+        # plugins without a package manager to upload with (like pep517)
+        # always use the native uploader
+        native_upload = config.native_upload or any(
+            getattr(plugin, "native_upload", False) for plugin in self.plugins
+        )
+
+        # a retried release can skip the files that were already uploaded
+        published = (
+            self._published_files(release_info.version)
+            if None in repositories
+            else None
+        )
+
+        def publish(repository: str | None) -> None:
+            if repository is None and published and self._is_published(published):
+                print(f"⏩ {release_info.version} is already on the index")
+
+                return
+
+            if native_upload:
+                self._upload(
+                    config,
+                    repository,
+                    exclude=set(published or ()) if repository is None else set(),
+                )
+            else:
+                for plugin in self.plugins:
+                    # TODO: maybe pass release info to publish method?
+                    if isinstance(plugin, AutopubPackageManagerPlugin):
+                        plugin.publish(repository=repository)
+
+        if len(repositories) == 1:
+            publish(repositories[0])
+        else:
+            errors = publish_to_repositories(
+                publish, repositories, config.max_parallel_repositories
+            )
+
+            for name, error in errors.items():
+                if name in config.optional_repositories:
+                    print(f"⚠️  publishing to {name} failed: {error}")
+
+            if critical := {
+                name: error
+                for name, error in errors.items()
+                if name not in config.optional_repositories
+            }:
+                raise PublishFailed(critical)
 
         for plugin in self.plugins:
             plugin.post_publish(release_info)
 
         self._delete_release_file()
 
+    def check_distributions(self) -> None:
+        """Check the metadata, description and RECORD of the files in `dist/`,
+        so that they aren't rejected by the index halfway through a release."""
+        if not self.settings.validate_distributions:
+            return
+
+        files = find_distributions(self.root / "dist")
+
+        if errors := validate_distributions(files):
+            raise DistributionsInvalid(errors)
+
+    def _is_published(self, published: dict[str, str]) -> bool:
+        """Whether the built files (or, when the build was skipped, the
+        release) are all on the index already."""
+        files = find_distributions(self.root / "dist")
+
+        if files:
+            return all(file.name in published for file in files)
+
+        return is_complete(published, self._expected_pythons)
+
+    def _upload(
+        self,
+        config: UploadConfig,
+        repository: str | None,
+        exclude: set[str] | None = None,
+    ) -> None:
+        """Upload the built distributions without the package manager.
+
+        `repository` is the upload URL to use instead of the configured one,
+        files named in `exclude` are left out.
+        """
+        files = find_distributions(self.root / "dist")
+
+        if not files:
+            raise DistributionsNotFound()
+
+        if exclude:
+            files = [file for file in files if file.name not in exclude]
+
+        digests = update_manifest(self.root / "dist")
+
+        username, password = credentials_from_environment()
+
+        uploader = Uploader(
+            url=repository or config.upload_url,
+            username=username,
+            password=password,
+            max_workers=config.upload_workers,
+            retries=config.upload_retries,
+        )
+        uploader.upload(files, digests)
+
     def validate_config(self) -> None:
         errors: dict[str, ValidationError] = {}
 
+        try:
+            self._settings = AutopubSettings.model_validate(self.config)
+        except ValidationError as e:
+            errors["autopub"] = e
+        else:
+            self.executor.default_timeout = self._settings.command_timeout
+
         for plugin in self.plugins:
             try:
                 plugin.validate_config(self.config)
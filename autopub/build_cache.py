@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import platform
+import shutil
+import sys
+import sysconfig
+import tempfile
+from collections.abc import Iterable
+from pathlib import Path
+
+from pydantic import BaseModel, Field
+
+from autopub.exceptions import CommandFailed
+from autopub.git_info import GitInfo
+
+DEFAULT_MAX_BYTES = 1024**3
+
+# never part of the build inputs
+EXCLUDED_PREFIXES = (".autopub/", "dist/")
+
+
+class BuildCacheConfig(BaseModel):
+    """Build cache configuration, from `[tool.autopub]`."""
+
+    build_cache: bool = Field(
+        default=True,
+        description="Reuse the distributions built from identical sources",
+        validation_alias="build-cache",
+    )
+    build_cache_size: int = Field(
+        default=DEFAULT_MAX_BYTES,
+        ge=0,
+        description="Maximum size of the build cache in bytes",
+        validation_alias="build-cache-size",
+    )
+
+
+def default_cache_directory() -> Path:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+
+    return Path(cache_home) / "autopub" / "builds"
+
+
+def interpreter_fingerprint() -> str:
+    """Identify the interpreter running the build, as builds of compiled
+    extensions depend on its version, ABI and platform."""
+    return ":".join(
+        [
+            sys.implementation.cache_tag or sys.implementation.name,
+            platform.python_version(),
+            sysconfig.get_config_var("SOABI") or "",
+            sysconfig.get_platform(),
+        ]
+    )
+
+
+def _hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def source_fingerprint(git_info: GitInfo, root: Path) -> str | None:
+    """Hash the files git knows about, as they are in the working tree.
+
+    Files that match the index are identified by their blob id, so only the
+    modified and untracked files are read. Returns None outside of a git
+    repository.
+    """
+    try:
+        staged = git_info.query("ls-files", "--stage", "--", ".")
+        modified = git_info.query(
+            "ls-files", "--modified", "--others", "--exclude-standard", "--", "."
+        )
+    except CommandFailed:
+        return None
+
+    files: dict[str, str] = {}
+
+    for line in staged.splitlines():
+        info, path = line.split("\t", 1)
+        files[path] = info.split()[1]
+
+    for path in modified.splitlines():
+        file = root / path
+
+        # deleted files are listed as modified
+        files[path] = _hash_file(file) if file.is_file() else "deleted"
+
+    digest = hashlib.sha256()
+
+    for path in sorted(files):
+        if not path.startswith(EXCLUDED_PREFIXES):
+            digest.update(f"{path}\0{files[path]}\0".encode())
+
+    return digest.hexdigest()
+
+
+class BuildCache:
+    """Distributions built before, by hash of everything that goes in a build.
+
+    Each entry is a directory named after its key. Restoring an entry updates
+    its modification time, and when the cache grows over `max_bytes` the
+    least recently used entries are evicted.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(*parts: str) -> str:
+        return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+    def restore(self, key: str, target: Path) -> list[Path]:
+        """Copy the files of an entry to `target`, returning them (an empty
+        list when there's no such entry)."""
+        entry = self.directory / key
+
+        if not entry.is_dir():
+            return []
+
+        target.mkdir(parents=True, exist_ok=True)
+
+        restored = [
+            Path(shutil.copy2(file, target / file.name))
+            for file in sorted(entry.iterdir())
+        ]
+
+        os.utime(entry)
+
+        return restored
+
+    def store(self, key: str, files: Iterable[Path]) -> None:
+        files = list(files)
+
+        if not files:
+            return
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        # the entry is written next to its final location and renamed, so
+        # concurrent builds never see a partial entry
+        temporary = Path(tempfile.mkdtemp(dir=self.directory, prefix=".tmp-"))
+
+        try:
+            for file in files:
+                shutil.copy2(file, temporary / file.name)
+
+            os.replace(temporary, self.directory / key)
+        except OSError:
+            # another build stored the same entry in the meantime
+            shutil.rmtree(temporary, ignore_errors=True)
+
+        self.evict()
+
+    def evict(self) -> None:
+        entries = [
+            entry
+            for entry in self.directory.iterdir()
+            if entry.is_dir() and not entry.name.startswith(".")
+        ]
+        sizes = {
+            entry: sum(file.stat().st_size for file in entry.iterdir())
+            for entry in entries
+        }
+
+        total = sum(sizes.values())
+
+        for entry in sorted(entries, key=lambda entry: entry.stat().st_mtime_ns):
+            if total <= self.max_bytes:
+                break
+
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= sizes[entry]
@@ -0,0 +1,115 @@
+"""Build wheels for several interpreters at once.
+
+Every interpreter builds into its own temporary directory, so concurrent
+builds never see each other's files, and the results are merged into `dist/`
+at the end. The builds are subprocesses of the package manager, so running
+them from a pool of threads is enough for them to run in parallel, and the
+whole matrix takes about as long as its slowest build.
+"""
+
+from __future__ import annotations
+
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from pydantic import BaseModel, Field
+
+from autopub.exceptions import AutopubException, BuildMatrixFailed, NoInterpreterFound
+from autopub.plugins import AutopubMatrixBuildPlugin
+
+
+class BuildMatrixConfig(BaseModel):
+    """Build matrix configuration, from `[tool.autopub]`."""
+
+    build_matrix: list[str] = Field(
+        default_factory=list,
+        description="Python versions to build wheels for, when installed",
+        validation_alias="build-matrix",
+    )
+    build_matrix_workers: int | None = Field(
+        default=None,
+        ge=1,
+        description="Number of builds run at the same time (default: all)",
+        validation_alias="build-matrix-workers",
+    )
+
+
+def find_interpreters(
+    plugin: AutopubMatrixBuildPlugin, requests: list[str]
+) -> dict[str, str]:
+    """Return the installed interpreters for the requests, as a mapping of
+    interpreter path to the request that found it first."""
+    interpreters: dict[str, str] = {}
+
+    for request in requests:
+        python = plugin.find_interpreter(request)
+
+        if python is None:
+            print(f"⚠️  no interpreter found for Python {request}, skipping it")
+        else:
+            interpreters.setdefault(python, request)
+
+    return interpreters
+
+
+def run_build_matrix(
+    plugin: AutopubMatrixBuildPlugin,
+    requests: list[str],
+    dist: Path,
+    max_workers: int | None = None,
+) -> list[Path]:
+    """Build with every installed interpreter of `requests` concurrently,
+    returning the files moved to `dist`.
+
+    The source distribution is only built by the first interpreter, and
+    wheels built by several interpreters (like pure Python wheels) are only
+    kept once.
+    """
+    interpreters = find_interpreters(plugin, requests)
+
+    if not interpreters:
+        raise NoInterpreterFound(requests)
+
+    with tempfile.TemporaryDirectory(prefix="autopub-build-") as temporary:
+        out_dirs = {
+            python: Path(temporary) / str(index)
+            for index, python in enumerate(interpreters)
+        }
+
+        with ThreadPoolExecutor(
+            max_workers=max_workers or len(interpreters)
+        ) as executor:
+            futures = {
+                python: executor.submit(
+                    plugin.build_for, python, out_dir, sdist=index == 0
+                )
+                for index, (python, out_dir) in enumerate(out_dirs.items())
+            }
+
+        errors: dict[str, str] = {}
+
+        for python, future in futures.items():
+            try:
+                future.result()
+            except AutopubException as e:
+                errors[interpreters[python]] = e.message
+            except OSError as e:
+                errors[interpreters[python]] = str(e)
+
+        if errors:
+            raise BuildMatrixFailed(errors)
+
+        dist.mkdir(parents=True, exist_ok=True)
+        merged: dict[str, Path] = {}
+
+        for out_dir in out_dirs.values():
+            if not out_dir.is_dir():
+                continue
+
+            for file in sorted(out_dir.iterdir()):
+                if file.is_file() and file.name not in merged:
+                    merged[file.name] = Path(shutil.move(file, dist / file.name))
+
+    return list(merged.values())
@@ -0,0 +1,513 @@
+from __future__ import annotations
+
+import dataclasses
+import json
+import mmap
+import os
+import re
+import shutil
+from collections.abc import Iterable, Iterator, Reversible
+from pathlib import Path
+from typing import Any, BinaryIO, TextIO
+from xml.sax.saxutils import escape
+
+from autopub.files import atomic_write
+
+# TODO: from config
+CHANGELOG_HEADER = "========="
+VERSION_HEADER = "-"
+
+# marks the list of links to archived changelogs at the end of the changelog
+ARCHIVE_MARKER = "<!-- autopub: archived changelogs -->"
+
+# a version title followed by its underline, e.g.
+# 1.0.0 - 2021-08-02
+# ------------------
+VERSION_TITLE_PATTERN = re.compile(
+    rb"^(?P<title>[^\r\n]*[^\r\n\s-][^\r\n]*)\r?\n"
+    + re.escape(VERSION_HEADER.encode())
+    + rb"{3,}[ \t]*\r?$",
+    re.MULTILINE,
+)
+
+
+def _get_version(title: bytes) -> str:
+    return title.decode().split(" - ", 1)[0].strip()
+
+
+class ChangelogIndex:
+    """Index of the version sections of a changelog.
+
+    Maps each version to the byte offset and length of its section, so a
+    single section can be read without parsing the whole file. The index is
+    built with one scan over a memory map of the changelog and cached on disk,
+    in the `.autopub` directory of the project, until the size or the
+    modification time of the changelog change.
+    """
+
+    def __init__(
+        self,
+        changelog_file: Path,
+        cache_file: Path | None = None,
+        root: Path | None = None,
+    ) -> None:
+        self.changelog_file = changelog_file
+        # the changelog is usually at the root of the project
+        root = root or changelog_file.resolve().parent
+        self.cache_file = cache_file or root / ".autopub" / "changelog_index.json"
+        self._sections: dict[str, tuple[int, int]] | None = None
+
+    def _cache_key(self) -> dict[str, Any]:
+        stat = self.changelog_file.stat()
+
+        return {
+            "path": str(self.changelog_file.resolve()),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+
+    def scan(self) -> tuple[list[tuple[str, int, int]], int]:
+        """Scan the changelog for version sections.
+
+        Returns a (version, offset, length) tuple for each section, in file
+        order, and the offset where the sections end.
+        """
+        with self.changelog_file.open("rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return [], 0
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                end = data.find(ARCHIVE_MARKER.encode())
+
+                if end == -1:
+                    end = len(data)
+
+                offsets = [
+                    (_get_version(match["title"]), match.start())
+                    for match in VERSION_TITLE_PATTERN.finditer(data, 0, end)
+                ]
+
+        return [
+            (version, offset, next_offset - offset)
+            for (version, offset), (_, next_offset) in zip(
+                offsets, [*offsets[1:], ("", end)]
+            )
+        ], end
+
+    def build(self) -> dict[str, tuple[int, int]]:
+        """Scan the changelog, returning the offset and length of each version."""
+        sections: dict[str, tuple[int, int]] = {}
+
+        for version, offset, length in self.scan()[0]:
+            sections.setdefault(version, (offset, length))
+
+        return sections
+
+    def _load_cache(self) -> dict[str, tuple[int, int]] | None:
+        if not self.cache_file.exists():
+            return None
+
+        try:
+            cache = json.loads(self.cache_file.read_text())
+        except ValueError:
+            return None
+
+        if cache.get("key") != self._cache_key():
+            return None
+
+        return {version: tuple(value) for version, value in cache["sections"].items()}  # type: ignore
+
+    def _write_cache(self, sections: dict[str, tuple[int, int]]) -> None:
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        self.cache_file.write_text(
+            json.dumps({"key": self._cache_key(), "sections": sections})
+        )
+
+    @property
+    def sections(self) -> dict[str, tuple[int, int]]:
+        if self._sections is None:
+            self._sections = self._load_cache()
+
+            if self._sections is None:
+                self._sections = self.build()
+                self._write_cache(self._sections)
+
+        return self._sections
+
+    def get(self, version: str) -> str | None:
+        """Return the section of the given version, including its title."""
+        if version not in self.sections:
+            return None
+
+        offset, length = self.sections[version]
+
+        with self.changelog_file.open("rb") as f:
+            f.seek(offset)
+
+            return f.read(length).decode().rstrip()
+
+
+ARCHIVE_LINK_PATTERN = re.compile(r"^- \[(?P<major>\d+)\.x releases\]")
+
+
+def _get_major(version: str) -> int | None:
+    major = version.lstrip("vV").split(".", 1)[0]
+
+    return int(major) if major.isdigit() else None
+
+
+def _read_section(changelog: BinaryIO, offset: int, length: int) -> bytes:
+    changelog.seek(offset)
+
+    return changelog.read(length).rstrip()
+
+
+def _read_archive_links(changelog: BinaryIO, offset: int) -> dict[int, str]:
+    """Read the links to the archives, written after the last section."""
+    links: dict[int, str] = {}
+
+    changelog.seek(offset)
+
+    for line in changelog.read().decode().splitlines():
+        if match := ARCHIVE_LINK_PATTERN.match(line):
+            links[int(match["major"])] = line
+
+    return links
+
+
+def _write_archive(archive_file: Path, major: int, sections: Iterable[bytes]) -> None:
+    """Prepend sections to an archive, keeping the ones it already has."""
+    header = f"CHANGELOG {major}.x\n{CHANGELOG_HEADER}".encode()
+
+    archive_file.parent.mkdir(parents=True, exist_ok=True)
+
+    if not archive_file.exists():
+        archive_file.write_bytes(header + b"\n")
+
+    with archive_file.open("rb") as source, atomic_write(archive_file) as target:
+        # skip the archive's own header
+        for line in iter(source.readline, b""):
+            if line.strip() == CHANGELOG_HEADER.encode():
+                break
+
+        target.write(header)
+
+        for section in sections:
+            target.write(b"\n\n" + section)
+
+        for line in iter(source.readline, b""):
+            if line.strip():
+                target.write(b"\n\n" + line)
+                shutil.copyfileobj(source, target)
+                break
+        else:
+            target.write(b"\n")
+
+
+def rotate_changelog(
+    changelog_file: Path,
+    archive_directory: Path,
+    max_versions: int | None = None,
+    max_bytes: int | None = None,
+) -> list[Path]:
+    """Move old major versions out of the changelog once it grows too big.
+
+    When the changelog has more than `max_versions` versions or is larger than
+    `max_bytes`, every section whose major version is older than the latest
+    one is moved to `<archive_directory>/CHANGELOG-<major>.md` and replaced
+    with a link to that file. Sections are copied one at a time, so the whole
+    changelog is never held in memory.
+
+    Returns the files that were written.
+    """
+    sections, end = ChangelogIndex(changelog_file).scan()
+
+    too_many_versions = max_versions is not None and len(sections) > max_versions
+    too_big = max_bytes is not None and changelog_file.stat().st_size > max_bytes
+
+    if not sections or not (too_many_versions or too_big):
+        return []
+
+    majors = [_get_major(version) for version, _, _ in sections]
+    latest_major = max((major for major in majors if major is not None), default=None)
+
+    archived: dict[int, list[tuple[int, int]]] = {}
+    kept: list[tuple[int, int]] = []
+
+    for major, (_, offset, length) in zip(majors, sections):
+        if major is None or major == latest_major:
+            kept.append((offset, length))
+        else:
+            archived.setdefault(major, []).append((offset, length))
+
+    if not archived:
+        return []
+
+    written: list[Path] = []
+
+    with changelog_file.open("rb") as source:
+        links = _read_archive_links(source, end)
+
+        for major, ranges in archived.items():
+            archive_file = archive_directory / f"CHANGELOG-{major}.md"
+
+            _write_archive(
+                archive_file,
+                major,
+                (_read_section(source, offset, length) for offset, length in ranges),
+            )
+            written.append(archive_file)
+
+            # links are relative to the changelog, wherever it's read from
+            link = Path(os.path.relpath(archive_file, changelog_file.parent))
+            links[major] = f"- [{major}.x releases]({link.as_posix()})"
+
+        with atomic_write(changelog_file) as target:
+            preamble = _read_section(source, 0, sections[0][1])
+
+            if preamble:
+                target.write(preamble + b"\n\n")
+
+            for offset, length in kept:
+                target.write(_read_section(source, offset, length) + b"\n\n")
+
+            target.write(f"{ARCHIVE_MARKER}\n\n".encode())
+            target.write(
+                "\n".join(
+                    links[major] for major in sorted(links, reverse=True)
+                ).encode()
+            )
+            target.write(b"\n")
+
+    written.append(changelog_file)
+
+    return written
+
+
+CONTRIBUTOR_PREFIXES = ("This release was contributed by", "Additional contributors:")
+
+
+@dataclasses.dataclass
+class ChangelogEntry:
+    """A version section of the changelog.
+
+    The title and underline lines are kept with their line endings and the
+    body verbatim, so that rendering an entry gives back exactly the text it
+    was parsed from.
+    """
+
+    title_line: str
+    underline_line: str
+    body: str
+
+    @classmethod
+    def create(
+        cls,
+        version: str,
+        date: str,
+        release_notes: str,
+        additional_release_notes: Iterable[str] = (),
+    ) -> ChangelogEntry:
+        title = f"{version} - {date}"
+        body = f"\n{release_notes}"
+
+        for line in additional_release_notes:
+            body += f"\n\n{line}"
+
+        return cls(
+            title_line=f"{title}\n",
+            underline_line=f"{VERSION_HEADER * len(title)}\n",
+            body=body,
+        )
+
+    @classmethod
+    def parse(cls, section: str) -> ChangelogEntry:
+        """Parse a section found by `ChangelogIndex`, title and underline
+        included."""
+        title_line, newline, rest = section.partition("\n")
+        underline_line, underline_newline, body = rest.partition("\n")
+
+        return cls(
+            title_line=title_line + newline,
+            underline_line=underline_line + underline_newline,
+            body=body,
+        )
+
+    @property
+    def title(self) -> str:
+        return self.title_line.strip()
+
+    @property
+    def version(self) -> str:
+        return self.title.split(" - ", 1)[0].strip()
+
+    @property
+    def date(self) -> str | None:
+        try:
+            return self.title.split(" - ", 1)[1].strip()
+        except IndexError:
+            return None
+
+    @property
+    def contributors(self) -> list[str]:
+        return [
+            line.strip()
+            for line in self.body.splitlines()
+            if line.strip().startswith(CONTRIBUTOR_PREFIXES)
+        ]
+
+    @property
+    def notes(self) -> str:
+        notes = "\n".join(
+            line
+            for line in self.body.splitlines()
+            if not line.strip().startswith(CONTRIBUTOR_PREFIXES)
+        )
+
+        # don't leave extra blank lines where the contributors were
+        return re.sub(r"\n{3,}", "\n\n", notes).strip()
+
+    def render(self) -> str:
+        return f"{self.title_line}{self.underline_line}{self.body}"
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "version": self.version,
+            "date": self.date,
+            "notes": self.notes,
+            "contributors": self.contributors,
+        }
+
+
+class ChangelogReader:
+    """Read the entries of a changelog, one at a time.
+
+    The sections are found with `ChangelogIndex.scan`, and each entry is only
+    read from the file when it is reached, so they can be iterated in either
+    order without holding the whole changelog in memory. The text before the
+    first version is available as `preamble`, and the list of archived
+    changelogs that follows the last version as `epilogue`.
+
+    Line endings are kept as they are in the file.
+    """
+
+    def __init__(self, changelog_file: Path) -> None:
+        self.changelog_file = changelog_file
+        self._sections, self._end = ChangelogIndex(changelog_file).scan()
+
+    def _read(self, offset: int, length: int | None = None) -> str:
+        with self.changelog_file.open("rb") as f:
+            f.seek(offset)
+
+            return f.read(-1 if length is None else length).decode()
+
+    @property
+    def preamble(self) -> str:
+        return self._read(0, self._sections[0][1] if self._sections else self._end)
+
+    @property
+    def epilogue(self) -> str:
+        return self._read(self._end)
+
+    def _entries(
+        self, sections: Iterable[tuple[str, int, int]]
+    ) -> Iterator[ChangelogEntry]:
+        with self.changelog_file.open("rb") as f:
+            for _, offset, length in sections:
+                f.seek(offset)
+
+                yield ChangelogEntry.parse(f.read(length).decode())
+
+    def __iter__(self) -> Iterator[ChangelogEntry]:
+        return self._entries(self._sections)
+
+    def __reversed__(self) -> Iterator[ChangelogEntry]:
+        return self._entries(reversed(self._sections))
+
+
+def write_changelog(
+    changelog: TextIO,
+    preamble: str,
+    entries: Iterable[ChangelogEntry],
+    epilogue: str = "",
+) -> None:
+    changelog.write(preamble)
+
+    for entry in entries:
+        changelog.write(entry.render())
+
+    changelog.write(epilogue)
+
+
+def _atom_date(date: str | None) -> str:
+    return f"{date or '1970-01-01'}T00:00:00Z"
+
+
+def _render_atom_entry(entry: ChangelogEntry, feed_id: str) -> str:
+    return (
+        "  <entry>\n"
+        f"    <id>{escape(feed_id)}#{escape(entry.version)}</id>\n"
+        f"    <title>{escape(entry.version)}</title>\n"
+        f"    <updated>{_atom_date(entry.date)}</updated>\n"
+        f'    <content type="text">{escape(entry.notes)}</content>\n'
+        "  </entry>\n"
+    )
+
+
+def export_json(entries: Reversible[ChangelogEntry], output: TextIO) -> None:
+    """Write the entries, given newest version first, as JSON lines, oldest
+    version first.
+
+    This is only needed once, new versions are then added with `append_json`.
+    """
+    for entry in reversed(entries):
+        output.write(json.dumps(entry.to_dict()) + "\n")
+
+
+def append_json(path: Path, entry: ChangelogEntry) -> None:
+    with path.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(entry.to_dict()) + "\n")
+
+
+def export_atom(
+    entries: Iterable[ChangelogEntry], output: TextIO, title: str, feed_id: str
+) -> None:
+    """Write an Atom feed with the given entries, newest version first."""
+    entries = iter(entries)
+    first = next(entries, None)
+    updated = _atom_date(first.date if first else None)
+
+    output.write(
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<feed xmlns="http://www.w3.org/2005/Atom">\n'
+        f"  <id>{escape(feed_id)}</id>\n"
+        f"  <title>{escape(title)}</title>\n"
+        f"  <updated>{updated}</updated>\n"
+    )
+
+    if first:
+        output.write(_render_atom_entry(first, feed_id))
+
+    for entry in entries:
+        output.write(_render_atom_entry(entry, feed_id))
+
+    output.write("</feed>\n")
+
+
+def prepend_atom(path: Path, entry: ChangelogEntry, feed_id: str) -> None:
+    """Add an entry to the top of an Atom feed written by `export_atom`.
+
+    The rest of the feed is copied as is, without being parsed.
+    """
+    with path.open("rb") as source, atomic_write(path) as target:
+        for line in iter(source.readline, b""):
+            if line.startswith(b"  <updated>"):
+                line = f"  <updated>{_atom_date(entry.date)}</updated>\n".encode()
+
+            if line.startswith((b"  <entry>", b"</feed>")):
+                target.write(_render_atom_entry(entry, feed_id).encode())
+                target.write(line)
+                shutil.copyfileobj(source, target)
+                break
+
+            target.write(line)
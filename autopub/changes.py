@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import fnmatch
+import json
+import os
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+from autopub.exceptions import CommandFailed
+from autopub.git_info import GitInfo
+
+# GitHub only lists the files of the first 20 commits of a push
+MAX_EVENT_COMMITS = 20
+
+
+class PathFilters(BaseModel):
+    """Files that make a change releasable, from `[tool.autopub]`.
+
+    Without `paths` every change is releasable.
+    """
+
+    paths: list[str] = Field(
+        default_factory=list,
+        description="Patterns of the files that are part of the release",
+    )
+    exclude_paths: list[str] = Field(
+        default_factory=list,
+        description="Patterns of the files that never trigger a release",
+        validation_alias="exclude-paths",
+    )
+
+    def is_releasable(self, path: str) -> bool:
+        return matches(path, self.paths) and not matches(path, self.exclude_paths)
+
+
+def matches(path: str, patterns: list[str]) -> bool:
+    """Whether the path matches one of the patterns.
+
+    Patterns are matched with `fnmatch`, where `*` also matches slashes, and a
+    pattern that names a directory matches everything inside it.
+    """
+    for pattern in patterns:
+        pattern = pattern.rstrip("/")
+
+        if fnmatch.fnmatch(path, pattern) or fnmatch.fnmatch(path, f"{pattern}/*"):
+            return True
+
+    return False
+
+
+def load_event(event_path: str | None = None) -> Mapping[str, Any] | None:
+    """Load the payload of the CI event that triggered the run, if any."""
+    event_path = event_path or os.environ.get("GITHUB_EVENT_PATH")
+
+    if not event_path or not Path(event_path).exists():
+        return None
+
+    with open(event_path) as f:
+        return json.load(f)
+
+
+def _files_from_push_event(event: Mapping[str, Any]) -> list[str] | None:
+    commits = event.get("commits")
+
+    if not commits or len(commits) >= MAX_EVENT_COMMITS:
+        return None
+
+    files: dict[str, None] = {}
+
+    for commit in commits:
+        if not all(key in commit for key in ("added", "modified", "removed")):
+            return None
+
+        for key in ("added", "modified", "removed"):
+            files.update(dict.fromkeys(commit[key]))
+
+    return list(files)
+
+
+def changed_files(
+    git_info: GitInfo, event: Mapping[str, Any] | None = None
+) -> list[str] | None:
+    """List the files changed by the pull request or push being released.
+
+    Paths are relative to the git working directory of `git_info`, files
+    outside of it are left out. Push events list their files in the payload.
+    Otherwise, when HEAD is a merge commit (which is how pull requests are
+    checked out), the files are diffed against its first parent, and as a
+    last resort against the merge base with the pull request's base commit.
+    Returns None when the changes can't be determined.
+    """
+    if event is not None and (files := _files_from_push_event(event)) is not None:
+        prefix = git_info.prefix
+
+        return [file.removeprefix(prefix) for file in files if file.startswith(prefix)]
+
+    try:
+        parents = git_info.merge_commit_parents()
+
+        if len(parents) >= 2:
+            return git_info.changed_files_since(parents[0])
+
+        if event is not None and "pull_request" in event:
+            base = event["pull_request"]["base"]["sha"]
+
+            if not git_info.has_commit(base):
+                git_info.fetch(base)
+
+            return git_info.changed_files_since_merge_base(base)
+    except CommandFailed:
+        return None
+
+    return None
@@ -1,3 +1,5 @@
+import os
+from pathlib import Path
 from typing import Annotated, Optional, TypedDict
 
 import rich
@@ -6,11 +8,29 @@ from rich.console import Group, RenderableType
 from rich.markdown import Markdown
 from rich.padding import Padding
 from rich.panel import Panel
+from rich.table import Table
 
 from autopub import Autopub
-from autopub.exceptions import AutopubException, InvalidConfiguration
+from autopub.changelog import ChangelogIndex
+from autopub.exceptions import (
+    AutopubException,
+    ChangelogVersionNotFound,
+    InvalidConfiguration,
+    NothingToRelease,
+)
+from autopub.executor import summary_markdown
+from autopub.types import ReleaseInfo
+from autopub.workspace import DEFAULT_MAX_PARALLEL_PUBLISHES, Workspace
 
 app = typer.Typer()
+changelog_app = typer.Typer(help="Read the changelog.")
+app.add_typer(changelog_app, name="changelog")
+workspace_app = typer.Typer(help="Release all the packages of a monorepo at once.")
+app.add_typer(workspace_app, name="workspace")
+
+
+# commands that are skipped when the changes don't touch the project
+GATED_COMMANDS = {"check", "prepare", "build", "publish"}
 
 
 class State(TypedDict):
@@ -84,14 +104,25 @@ def prepare(context: AutoPubCLI):
 def publish(
     context: AutoPubCLI,
     repository: Annotated[
-        Optional[str],
-        typer.Option("--repository", "-r", help="Repository to publish to"),
+        Optional[list[str]],
+        typer.Option(
+            "--repository",
+            "-r",
+            help="Repository to publish to, can be repeated to publish to several",
+        ),
     ] = None,
+    batch: Annotated[
+        bool,
+        typer.Option("--batch", help="Publish all the queued releases as one"),
+    ] = False,
 ):
     autopub = context.obj
 
     try:
-        autopub.publish(repository=repository)
+        if batch:
+            autopub.publish_batch(repository=repository)
+        else:
+            autopub.publish(repository=repository)
     except AutopubException as e:
         rich.print(Panel.fit(f"[red]{e.message}"))
 
@@ -100,6 +131,149 @@ def publish(
         rich.print(Panel.fit("[green]Publishing succeeded"))
 
 
+@app.command()
+def enqueue(context: AutoPubCLI):
+    """Queue the checked release, to be published later with `publish --batch`."""
+
+    autopub = context.obj
+
+    try:
+        entry = autopub.enqueue()
+    except AutopubException as e:
+        rich.print(Panel.fit(f"[red]{e.message}"))
+
+        raise typer.Exit(1) from e
+    else:
+        rich.print(Panel.fit(f"[green]Release queued as {entry.name}"))
+
+
+@changelog_app.command("show")
+def changelog_show(
+    context: AutoPubCLI,
+    version: Annotated[str, typer.Argument(help="Version to show the notes of")],
+    changelog_file: Annotated[
+        Path, typer.Option("--file", "-f", help="Changelog file")
+    ] = Path("CHANGELOG.md"),
+):
+    """Print the changelog section of a single version."""
+
+    try:
+        if not changelog_file.exists():
+            raise ChangelogVersionNotFound(version)
+
+        section = ChangelogIndex(changelog_file, root=context.obj.root).get(version)
+
+        if section is None:
+            raise ChangelogVersionNotFound(version)
+    except AutopubException as e:
+        rich.print(Panel.fit(f"[red]{e.message}"))
+
+        raise typer.Exit(1) from e
+
+    print(section)
+
+
+MaxWorkersOption = Annotated[
+    Optional[int],
+    typer.Option("--max-workers", "-j", help="Number of packages processed at once"),
+]
+
+
+def _print_workspace_releases(releases: dict[str, ReleaseInfo]) -> None:
+    for path, release_info in releases.items():
+        rich.print(
+            f"[bold on bright_magenta] {path} [/] "
+            f"[yellow]{release_info.release_type}[/] "
+            f"{release_info.previous_version} → {release_info.version}"
+        )
+
+
+@workspace_app.command("check")
+def workspace_check(max_workers: MaxWorkersOption = None):
+    """Check the release file of every package."""
+
+    try:
+        releases = Workspace(max_workers=max_workers).check()
+    except AutopubException as e:
+        rich.print(Panel.fit(f"[red]{e.message}"))
+
+        raise typer.Exit(1) from e
+
+    _print_workspace_releases(releases)
+    rich.print(Panel.fit(f"[green]{len(releases)} release file(s) are valid"))
+
+
+@workspace_app.command("prepare")
+def workspace_prepare(max_workers: MaxWorkersOption = None):
+    try:
+        releases = Workspace(max_workers=max_workers).prepare()
+    except AutopubException as e:
+        rich.print(Panel.fit(f"[red]{e.message}"))
+
+        raise typer.Exit(1) from e
+
+    _print_workspace_releases(releases)
+    rich.print(Panel.fit("[green]Preparation succeeded"))
+
+
+@workspace_app.command("build")
+def workspace_build(max_workers: MaxWorkersOption = None):
+    try:
+        Workspace(max_workers=max_workers).build()
+    except AutopubException as e:
+        rich.print(Panel.fit(f"[red]{e.message}"))
+
+        raise typer.Exit(1) from e
+
+    rich.print(Panel.fit("[green]Build succeeded"))
+
+
+@workspace_app.command("publish")
+def workspace_publish(
+    repository: Annotated[
+        Optional[list[str]],
+        typer.Option(
+            "--repository",
+            "-r",
+            help="Repository to publish to, can be repeated to publish to several",
+        ),
+    ] = None,
+    max_parallel: Annotated[
+        int,
+        typer.Option("--max-parallel", help="Number of packages uploaded at once"),
+    ] = DEFAULT_MAX_PARALLEL_PUBLISHES,
+):
+    try:
+        Workspace().publish(repository=repository, max_parallel=max_parallel)
+    except AutopubException as e:
+        rich.print(Panel.fit(f"[red]{e.message}"))
+
+        raise typer.Exit(1) from e
+
+    rich.print(Panel.fit("[green]Publishing succeeded"))
+
+
+def _print_command_summary(autopub: Autopub) -> None:
+    rows = autopub.executor.summary()
+
+    if not rows:
+        return
+
+    table = Table(title="Commands")
+
+    for column in rows[0]:
+        table.add_column(column, justify="left" if column == "command" else "right")
+
+    for row in rows:
+        table.add_row(*row.values())
+
+    rich.print(table)
+
+    if step_summary := os.environ.get("GITHUB_STEP_SUMMARY"):
+        with open(step_summary, "a") as f:
+            f.write(summary_markdown(rows))
+
+
 @app.callback(invoke_without_command=True)
 def main(
     context: AutoPubCLI,
@@ -116,11 +290,20 @@ def main(
 
     autopub = Autopub()
 
-    # default plugins we always want to load (?)
-    autopub.load_plugins(["git", "update_changelog", "bump_version"])
-
     try:
+        if context.invoked_subcommand in GATED_COMMANDS:
+            # checked before loading the plugins, so that runs for changes
+            # unrelated to the project are as quick as possible
+            autopub.check_changes()
+
+        # default plugins we always want to load (?)
+        autopub.load_plugins(["git", "update_changelog", "bump_version"])
+
         autopub.validate_config()
+    except NothingToRelease as e:
+        rich.print(Panel.fit(f"[yellow]{e.message}"))
+
+        raise typer.Exit(0) from e
     except InvalidConfiguration as e:
         title = "[red]🚨 Some of the plugins have invalid configuration[/]"
 
@@ -150,3 +333,4 @@ def main(
         raise typer.Exit(1) from e
 
     context.obj = autopub
+    context.call_on_close(lambda: _print_command_summary(autopub))
@@ -0,0 +1,311 @@
+from __future__ import annotations
+
+import dataclasses
+import fnmatch
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any
+
+import tomlkit
+
+# matches __version__ = "x.y.z" or __version__ = 'x.y.z', including
+# pre-release versions such as 1.0.0-alpha.58
+INIT_VERSION_PATTERN = r"""__version__\s*=\s*["'](?P<version>[^"']+)["']"""
+
+# directories that never contain packages we want to release
+IGNORED_DIRECTORIES = {
+    "__pycache__",
+    "build",
+    "dist",
+    "node_modules",
+    "site-packages",
+    "venv",
+}
+
+VERSION_FILE_NAMES = ("__init__.py", "_version.py", "__about__.py", "version.py")
+
+# files whose presence changes the index
+INDEXED_FILE_NAMES = {"pyproject.toml", *VERSION_FILE_NAMES}
+
+
+@dataclasses.dataclass
+class PackageInfo:
+    """A Python project found in the repository.
+
+    All paths are relative to the repository root, in POSIX form.
+    """
+
+    path: str
+    pyproject: str
+    name: str | None = None
+    package_dir: str | None = None
+    version_files: list[str] = dataclasses.field(default_factory=list)
+
+
+def get_package_name(pyproject: Path) -> str | None:
+    data: Any = tomlkit.parse(pyproject.read_text())
+
+    try:
+        return data["tool"]["poetry"]["name"]
+    except KeyError:
+        return data.get("project", {}).get("name")
+
+
+class PackageIndex:
+    """Index of the packages in a repository, for monorepos.
+
+    The repository is walked once with `os.scandir`, skipping hidden and
+    ignored directories, and for each `pyproject.toml` the importable package
+    directory and its version-bearing files are recorded. The result is cached
+    in `.autopub/` together with the modification time of every directory
+    that was visited and the entries of the directory the index depends on
+    (its subdirectories, `pyproject.toml` and version files).
+
+    Adding or removing files changes the modification time of their
+    directory, which is then scanned again: the cache is only invalidated
+    when its entries changed. That's not the case for most changes, notably
+    the ones made by `prepare`, which writes files atomically through a
+    temporary file and deletes the release file.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        cache_file: Path | None = None,
+        exclude: list[str] | None = None,
+    ) -> None:
+        self.root = root
+        self.cache_file = cache_file or root / ".autopub" / "packages.json"
+        self.exclude = [*self._read_gitignore(), *(exclude or [])]
+        self._packages: list[PackageInfo] | None = None
+
+    def _read_gitignore(self) -> list[str]:
+        gitignore = self.root / ".gitignore"
+
+        if not gitignore.exists():
+            return []
+
+        return [
+            line.strip()
+            for line in gitignore.read_text().splitlines()
+            if line.strip() and not line.startswith(("#", "!"))
+        ]
+
+    def _is_ignored(self, relative_path: str, name: str) -> bool:
+        if name.startswith(".") or name in IGNORED_DIRECTORIES:
+            return True
+
+        for pattern in self.exclude:
+            pattern = pattern.rstrip("/")
+
+            if pattern.startswith("/"):
+                if fnmatch.fnmatch(relative_path, pattern[1:]):
+                    return True
+            elif fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(
+                relative_path, pattern
+            ):
+                return True
+
+        return False
+
+    def _scan(self, relative_directory: str) -> tuple[list[str], list[str]]:
+        """List the subdirectories that aren't ignored and the files of a
+        directory."""
+        directories: list[str] = []
+        files: list[str] = []
+
+        with os.scandir(self.root / relative_directory) as entries:
+            for entry in entries:
+                relative_path = (
+                    entry.name
+                    if relative_directory == "."
+                    else f"{relative_directory}/{entry.name}"
+                )
+
+                if entry.is_dir(follow_symlinks=False):
+                    if not self._is_ignored(relative_path, entry.name):
+                        directories.append(relative_path)
+                elif entry.is_file():
+                    files.append(entry.name)
+
+        return directories, files
+
+    @staticmethod
+    def _indexed_entries(directories: list[str], files: list[str]) -> list[str]:
+        """The entries of a directory that the index depends on."""
+        return sorted(
+            [
+                *(f"{directory}/" for directory in directories),
+                *(file for file in files if file in INDEXED_FILE_NAMES),
+            ]
+        )
+
+    def _walk(self) -> tuple[dict[str, list[str]], dict[str, dict[str, Any]]]:
+        """List the files of every directory that isn't ignored.
+
+        Returns the files by directory, and the modification time and the
+        indexed entries of each directory.
+        """
+        files: dict[str, list[str]] = {}
+        directories: dict[str, dict[str, Any]] = {}
+        stack = ["."]
+
+        while stack:
+            relative_directory = stack.pop()
+            mtime = (self.root / relative_directory).stat().st_mtime_ns
+
+            subdirectories, files[relative_directory] = self._scan(relative_directory)
+            stack += subdirectories
+
+            directories[relative_directory] = {
+                "mtime": mtime,
+                "entries": self._indexed_entries(
+                    subdirectories, files[relative_directory]
+                ),
+            }
+
+        return files, directories
+
+    def _find_package_dir(
+        self, path: str, name: str | None, files: dict[str, list[str]]
+    ) -> str | None:
+        def join(*parts: str) -> str:
+            return "/".join(part for part in (path, *parts) if part != ".")
+
+        candidates = []
+
+        if name:
+            # package names with hyphens are imported with underscores
+            package = name.replace("-", "_")
+            candidates += [join("src", package), join(package)]
+
+        candidates.append(join("src"))
+
+        for candidate in candidates:
+            if "__init__.py" in files.get(candidate, []):
+                return candidate
+
+        return None
+
+    def _find_version_files(
+        self, package_dir: str, files: dict[str, list[str]]
+    ) -> list[str]:
+        pattern = re.compile(INIT_VERSION_PATTERN)
+
+        return [
+            f"{package_dir}/{name}"
+            for name in VERSION_FILE_NAMES
+            if name in files[package_dir]
+            and pattern.search((self.root / package_dir / name).read_text())
+        ]
+
+    def build(self) -> tuple[list[PackageInfo], dict[str, dict[str, Any]]]:
+        files, directories = self._walk()
+        packages: list[PackageInfo] = []
+
+        for directory in sorted(files):
+            if "pyproject.toml" not in files[directory]:
+                continue
+
+            pyproject = (
+                "pyproject.toml" if directory == "." else f"{directory}/pyproject.toml"
+            )
+            name = get_package_name(self.root / pyproject)
+            package_dir = self._find_package_dir(directory, name, files)
+
+            packages.append(
+                PackageInfo(
+                    path=directory,
+                    pyproject=pyproject,
+                    name=name,
+                    package_dir=package_dir,
+                    version_files=(
+                        self._find_version_files(package_dir, files)
+                        if package_dir
+                        else []
+                    ),
+                )
+            )
+
+        return packages, directories
+
+    def _load_cache(self) -> list[PackageInfo] | None:
+        if not self.cache_file.exists():
+            return None
+
+        try:
+            cache = json.loads(self.cache_file.read_text())
+        except ValueError:
+            return None
+
+        if cache.get("exclude") != self.exclude or "directories" not in cache:
+            return None
+
+        directories: dict[str, dict[str, Any]] = cache["directories"]
+        changed = False
+
+        try:
+            for directory, state in directories.items():
+                mtime = (self.root / directory).stat().st_mtime_ns
+
+                if mtime == state["mtime"]:
+                    continue
+
+                # something was added or removed, but it might be a file the
+                # index doesn't care about
+                if self._indexed_entries(*self._scan(directory)) != state["entries"]:
+                    return None
+
+                state["mtime"] = mtime
+                changed = True
+        except (FileNotFoundError, NotADirectoryError, KeyError, TypeError):
+            return None
+
+        packages = [PackageInfo(**package) for package in cache["packages"]]
+
+        if changed:
+            self._write_cache(packages, directories)
+
+        return packages
+
+    def _write_cache(
+        self, packages: list[PackageInfo], directories: dict[str, dict[str, Any]]
+    ) -> None:
+        cache = {
+            "exclude": self.exclude,
+            "directories": directories,
+            "packages": [dataclasses.asdict(package) for package in packages],
+        }
+
+        self.cache_file.write_text(json.dumps(cache))
+
+    def rebuild(self) -> None:
+        """Rebuild the index, for changes the cache can't detect such as a
+        package being renamed in its pyproject.toml."""
+        self._packages = None
+        self.cache_file.unlink(missing_ok=True)
+
+    @property
+    def packages(self) -> list[PackageInfo]:
+        if self._packages is None:
+            self._packages = self._load_cache()
+
+            if self._packages is None:
+                # create the cache directory before walking, so that it doesn't
+                # change the modification time of its parent afterwards
+                self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+
+                self._packages, directories = self.build()
+                self._write_cache(self._packages, directories)
+
+        return self._packages
+
+    def get(self, path: str = ".") -> PackageInfo | None:
+        """Return the package whose pyproject.toml is in the given directory."""
+        for package in self.packages:
+            if package.path == path:
+                return package
+
+        return None
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import dataclasses
+import email
+import tarfile
+import zipfile
+from email.message import Message
+from pathlib import Path
+
+from autopub.exceptions import InvalidDistribution
+
+SDIST_SUFFIX = ".tar.gz"
+WHEEL_SUFFIX = ".whl"
+
+
+def find_distributions(dist: Path) -> list[Path]:
+    """List the distributions in `dist`, source distributions first."""
+    if not dist.is_dir():
+        return []
+
+    return sorted(
+        (
+            path
+            for path in dist.iterdir()
+            if path.is_file() and path.name.endswith((SDIST_SUFFIX, WHEEL_SUFFIX))
+        ),
+        key=lambda path: (not path.name.endswith(SDIST_SUFFIX), path.name),
+    )
+
+
+def read_wheel_metadata(path: Path) -> bytes:
+    """Read the METADATA file of a wheel from its central directory."""
+    with zipfile.ZipFile(path) as wheel:
+        names = [
+            name
+            for name in wheel.namelist()
+            if name.count("/") == 1 and name.endswith(".dist-info/METADATA")
+        ]
+
+        if len(names) != 1:
+            raise InvalidDistribution(path.name, "METADATA not found")
+
+        return wheel.read(names[0])
+
+
+def read_sdist_metadata(path: Path) -> bytes:
+    """Read the top level PKG-INFO file of a source distribution.
+
+    The archive is read as a stream and only up to PKG-INFO, which is usually
+    one of its first members.
+    """
+    with tarfile.open(path, mode="r|gz") as sdist:
+        for member in sdist:
+            if member.isfile() and member.name.count("/") == 1:
+                if member.name.endswith("/PKG-INFO"):
+                    file = sdist.extractfile(member)
+
+                    assert file is not None
+
+                    return file.read()
+
+    raise InvalidDistribution(path.name, "PKG-INFO not found")
+
+
+@dataclasses.dataclass
+class Distribution:
+    path: Path
+    filetype: str
+    metadata: Message
+
+    @classmethod
+    def from_path(cls, path: Path) -> Distribution:
+        if path.name.endswith(WHEEL_SUFFIX):
+            filetype, data = "bdist_wheel", read_wheel_metadata(path)
+        elif path.name.endswith(SDIST_SUFFIX):
+            filetype, data = "sdist", read_sdist_metadata(path)
+        else:
+            raise InvalidDistribution(path.name, "unknown distribution type")
+
+        try:
+            metadata = email.message_from_string(data.decode("utf-8"))
+        except UnicodeDecodeError as e:
+            raise InvalidDistribution(path.name, "metadata is not UTF-8") from e
+
+        return cls(path=path, filetype=filetype, metadata=metadata)
+
+    @property
+    def name(self) -> str:
+        return self.metadata.get("Name", "")
+
+    @property
+    def version(self) -> str:
+        return self.metadata.get("Version", "")
+
+    @property
+    def pyversion(self) -> str:
+        if self.filetype == "sdist":
+            return "source"
+
+        # {name}-{version}(-{build})?-{python}-{abi}-{platform}.whl
+        return self.path.name.removesuffix(WHEEL_SUFFIX).split("-")[-3]
+
+    @property
+    def description(self) -> str:
+        """The long description, from the metadata body or its header."""
+        payload = self.metadata.get_payload()
+
+        if isinstance(payload, str) and payload.strip():
+            return payload
+
+        return self.metadata.get("Description", "")
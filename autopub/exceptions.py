@@ -42,11 +42,62 @@ class ArtifactHashMismatch(AutopubException):
     message = "Artifact hash mismatch, did you run `autopub check`?"
 
 
+class DistributionsNotFound(AutopubException):
+    message = "No distributions found, did you run `autopub build`?"
+
+
+class ChangelogVersionNotFound(AutopubException):
+    def __init__(self, version: str) -> None:
+        self.message = f"Version {version} not found in the changelog"
+        super().__init__()
+
+
+class ReleaseQueueEmpty(AutopubException):
+    message = "The release queue is empty, nothing to publish"
+
+
+class NothingToRelease(AutopubException):
+    message = "None of the changed files are part of the release, nothing to do"
+
+
 class CommandFailed(AutopubException):
-    def __init__(self, command: list[str], returncode: int) -> None:
-        self.message = (
-            f"Command {' '.join(command)} failed with return code {returncode}"
+    def __init__(
+        self,
+        command: list[str],
+        returncode: int,
+        output: str = "",
+        reason: str | None = None,
+    ) -> None:
+        reason = reason or f"failed with return code {returncode}"
+        self.message = f"Command {' '.join(command)} {reason}"
+        self.command = command
+        self.returncode = returncode
+        # the end of the output of the command
+        self.output = output
+
+        if output.strip():
+            self.message += f"\n\n{output.rstrip()}"
+
+        super().__init__()
+
+
+class CommandTimedOut(CommandFailed):
+    def __init__(self, command: list[str], timeout: float, output: str = "") -> None:
+        self.timeout = timeout
+        super().__init__(
+            command, -1, output, reason=f"timed out after {timeout:g} seconds"
+        )
+
+
+class WorkspaceCommandFailed(AutopubException):
+    def __init__(self, errors: dict[str, str]) -> None:
+        self.message = "\n".join(
+            [
+                f"Failed for {len(errors)} package(s):",
+                *(f"- {path}: {error}" for path, error in sorted(errors.items())),
+            ]
         )
+        self.errors = errors
         super().__init__()
 
 
@@ -55,3 +106,78 @@ class InvalidConfiguration(AutopubException):
         self.message = "Invalid configuration"
         self.validation_errors = validation_errors
         super().__init__()
+
+
+class InvalidDistribution(AutopubException):
+    def __init__(self, filename: str, reason: str) -> None:
+        self.message = f"Invalid distribution {filename}: {reason}"
+        self.filename = filename
+        self.reason = reason
+        super().__init__()
+
+
+class UploadFailed(AutopubException):
+    def __init__(self, errors: dict[str, str]) -> None:
+        self.message = "\n".join(
+            [
+                f"Failed to upload {len(errors)} file(s):",
+                *(f"- {name}: {error}" for name, error in sorted(errors.items())),
+            ]
+        )
+        self.errors = errors
+        super().__init__()
+
+
+class PublishFailed(AutopubException):
+    def __init__(self, errors: dict[str, str]) -> None:
+        self.message = "\n".join(
+            [
+                "Publishing failed:",
+                *(f"- {name}: {error}" for name, error in sorted(errors.items())),
+            ]
+        )
+        self.errors = errors
+        super().__init__()
+
+
+class DistributionsInvalid(AutopubException):
+    def __init__(self, errors: dict[str, list[str]]) -> None:
+        self.message = "\n".join(
+            [
+                "Invalid distributions:",
+                *(
+                    f"- {name}: {error}"
+                    for name, file_errors in sorted(errors.items())
+                    for error in file_errors
+                ),
+            ]
+        )
+        self.errors = errors
+        super().__init__()
+
+
+class NoInterpreterFound(AutopubException):
+    def __init__(self, requests: list[str]) -> None:
+        self.message = (
+            f"None of the interpreters of the build matrix ({', '.join(requests)}) "
+            "are installed"
+        )
+        super().__init__()
+
+
+class BuildMatrixFailed(AutopubException):
+    def __init__(self, errors: dict[str, str]) -> None:
+        self.message = "\n".join(
+            [
+                f"The build failed for {len(errors)} interpreter(s):",
+                *(f"- {python}: {error}" for python, error in sorted(errors.items())),
+            ]
+        )
+        self.errors = errors
+        super().__init__()
+
+
+class BuildBackendFailed(AutopubException):
+    def __init__(self, message: str) -> None:
+        self.message = f"The build backend failed: {message}"
+        super().__init__()
@@ -0,0 +1,358 @@
+"""Run the commands of plugins, with timeouts and resource accounting.
+
+Output is streamed to the terminal as it comes, and its end is kept in a
+bounded buffer so that it can be attached to `CommandFailed`. On POSIX
+systems the child is reaped with `os.wait4`, which gives the CPU time and
+peak memory of that command alone. Every command is recorded for the run
+summary, and commands can run from several threads at once.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import IO, Callable
+
+from pydantic import BaseModel, Field
+
+from autopub.exceptions import CommandFailed, CommandTimedOut
+
+DEFAULT_OUTPUT_BYTES = 64 * 1024
+
+# ru_maxrss is in kilobytes, apart from macOS where it's in bytes
+MAX_RSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+
+class ExecutorConfig(BaseModel):
+    """Command execution configuration, from `[tool.autopub]`."""
+
+    command_timeout: float | None = Field(
+        default=None,
+        gt=0,
+        description="Seconds after which a command is killed (default: never)",
+        validation_alias="command-timeout",
+    )
+
+
+class OutputBuffer:
+    """Keep the last `max_bytes` of the output of a command."""
+
+    def __init__(self, max_bytes: int = DEFAULT_OUTPUT_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.truncated = False
+        self._chunks: deque[bytes] = deque()
+        self._size = 0
+
+    def append(self, chunk: bytes) -> None:
+        self._chunks.append(chunk)
+        self._size += len(chunk)
+
+        while self._size > self.max_bytes:
+            excess = self._size - self.max_bytes
+            first = self._chunks[0]
+
+            if len(first) <= excess:
+                self._chunks.popleft()
+                self._size -= len(first)
+            else:
+                self._chunks[0] = first[excess:]
+                self._size -= excess
+
+            self.truncated = True
+
+    def text(self) -> str:
+        return b"".join(self._chunks).decode("utf-8", errors="replace")
+
+
+@dataclasses.dataclass
+class CommandResult:
+    command: list[str]
+    returncode: int
+    wall_time: float
+    # None when the platform doesn't report them
+    cpu_time: float | None = None
+    max_rss: int | None = None
+    stdout: str = ""
+    output: str = ""
+    timed_out: bool = False
+
+
+def _pump(stream: IO[bytes], *sinks: Callable[[bytes], object]) -> None:
+    for line in iter(stream.readline, b""):
+        for sink in sinks:
+            sink(line)
+
+    stream.close()
+
+
+def _echo(line: bytes) -> None:
+    sys.stdout.write(line.decode("utf-8", errors="replace"))
+    sys.stdout.flush()
+
+
+class Watchdog:
+    """Kill a process group once `timeout` expires, until the output of the
+    command is read to the end.
+
+    The exit is recorded under the same lock as the kill, before the process
+    is reaped, so a command that finishes as the timer fires is neither
+    reported as timed out nor signalled after its group is gone. Processes
+    it started in the background can keep its output open after it exited;
+    they are killed when the timeout expires, without failing the command.
+    """
+
+    def __init__(self, process: subprocess.Popen[bytes], timeout: float | None) -> None:
+        self.process = process
+        self.killed = False
+        self._exited = False
+        self._finished = False
+        self._lock = threading.Lock()
+        self._timer = None
+
+        if timeout is not None:
+            self._timer = threading.Timer(timeout, self.kill)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def kill(self) -> None:
+        with self._lock:
+            if self._finished:
+                return
+
+            exited = self._exited or self.process.returncode is not None
+
+            # only the rest of the group is left once the process exited,
+            # which can't be signalled without process groups
+            if exited and os.name != "posix":
+                return
+
+            self.killed = self.killed or not exited
+
+            try:
+                if os.name == "posix":
+                    os.killpg(self.process.pid, signal.SIGKILL)
+                else:
+                    self.process.kill()
+            except (ProcessLookupError, PermissionError):
+                pass
+
+    def exited(self) -> None:
+        """Record that the process exited, before it's reaped."""
+        with self._lock:
+            self._exited = True
+
+    def finished(self) -> None:
+        """Stop the timer, once the output was read to the end."""
+        with self._lock:
+            self._finished = True
+
+        if self._timer is not None:
+            self._timer.cancel()
+
+
+class Executor:
+    def __init__(
+        self,
+        default_timeout: float | None = None,
+        output_bytes: int = DEFAULT_OUTPUT_BYTES,
+    ) -> None:
+        self.default_timeout = default_timeout
+        self.output_bytes = output_bytes
+        self.results: list[CommandResult] = []
+        self._lock = threading.Lock()
+
+    def run(
+        self,
+        command: Sequence[str],
+        cwd: Path | None = None,
+        capture_output: bool = False,
+        timeout: float | None = None,
+    ) -> CommandResult:
+        """Run a command, raising `CommandFailed` when it fails or times out.
+
+        With `capture_output`, stdout is returned in the result instead of
+        being printed, and stderr is only kept for the error.
+        """
+        command = [str(part) for part in command]
+        timeout = timeout if timeout is not None else self.default_timeout
+        output = OutputBuffer(self.output_bytes)
+        stdout: list[bytes] = []
+
+        started = time.perf_counter()
+        process = subprocess.Popen(
+            command,
+            cwd=cwd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE if capture_output else subprocess.STDOUT,
+            # in its own process group, so that a timeout kills its children too
+            start_new_session=os.name == "posix",
+        )
+
+        assert process.stdout is not None
+
+        if capture_output:
+            assert process.stderr is not None
+            pumps = [
+                threading.Thread(
+                    target=_pump, args=(process.stdout, stdout.append), daemon=True
+                ),
+                threading.Thread(
+                    target=_pump, args=(process.stderr, output.append), daemon=True
+                ),
+            ]
+        else:
+            pumps = [
+                threading.Thread(
+                    target=_pump,
+                    args=(process.stdout, output.append, _echo),
+                    daemon=True,
+                )
+            ]
+
+        for pump in pumps:
+            pump.start()
+
+        watchdog = Watchdog(process, timeout)
+
+        try:
+            cpu_time, max_rss = self._wait(process, watchdog.exited)
+
+            for pump in pumps:
+                pump.join()
+        finally:
+            watchdog.finished()
+
+        result = CommandResult(
+            command=command,
+            returncode=process.returncode,
+            wall_time=time.perf_counter() - started,
+            cpu_time=cpu_time,
+            max_rss=max_rss,
+            stdout=b"".join(stdout).decode("utf-8", errors="replace"),
+            output=output.text(),
+            # without waitid, the kill can still come right after a
+            # successful exit, which isn't a timeout
+            timed_out=watchdog.killed and process.returncode != 0,
+        )
+
+        with self._lock:
+            self.results.append(result)
+
+        if result.timed_out:
+            assert timeout is not None
+            raise CommandTimedOut(command, timeout, output=result.output)
+
+        if result.returncode != 0:
+            raise CommandFailed(command, result.returncode, output=result.output)
+
+        return result
+
+    @staticmethod
+    def _wait(
+        process: subprocess.Popen[bytes], exited: Callable[[], None]
+    ) -> tuple[float | None, int | None]:
+        """Wait for the process, returning its CPU time and peak memory.
+
+        `exited` is called once the process exited, before it's reaped when
+        the platform allows it.
+        """
+        if not hasattr(os, "wait4"):
+            process.wait()
+            exited()
+
+            return None, None
+
+        if hasattr(os, "waitid"):
+            # the process stays a zombie, so its group can't be reused yet
+            while True:
+                try:
+                    os.waitid(os.P_PID, process.pid, os.WEXITED | os.WNOWAIT)
+                    break
+                except InterruptedError:
+                    continue
+
+        exited()
+
+        while True:
+            try:
+                _, status, usage = os.wait4(process.pid, 0)
+                break
+            except InterruptedError:
+                continue
+
+        # reaped here, so Popen must not wait for it again
+        process.returncode = os.waitstatus_to_exitcode(status)
+
+        return usage.ru_utime + usage.ru_stime, usage.ru_maxrss * MAX_RSS_UNIT
+
+    def run_all(
+        self,
+        commands: Sequence[Sequence[str]],
+        cwd: Path | None = None,
+        max_workers: int | None = None,
+    ) -> list[CommandResult]:
+        """Run the commands concurrently, raising the first failure once all
+        of them have finished."""
+        with ThreadPoolExecutor(max_workers=max_workers or len(commands)) as pool:
+            futures = [pool.submit(self.run, command, cwd) for command in commands]
+
+        return [future.result() for future in futures]
+
+    def summary(self) -> list[dict[str, str]]:
+        """The recorded commands, as rows for the run summary."""
+        with self._lock:
+            results = list(self.results)
+
+        return [
+            {
+                "command": " ".join(result.command),
+                "status": (
+                    "timed out"
+                    if result.timed_out
+                    else "ok"
+                    if result.returncode == 0
+                    else f"exit {result.returncode}"
+                ),
+                "wall": f"{result.wall_time:.2f}s",
+                "cpu": "-" if result.cpu_time is None else f"{result.cpu_time:.2f}s",
+                "max rss": (
+                    "-"
+                    if result.max_rss is None
+                    else f"{result.max_rss / 1024**2:.1f} MiB"
+                ),
+            }
+            for result in results
+        ]
+
+
+def summary_markdown(rows: list[dict[str, str]]) -> str:
+    if not rows:
+        return ""
+
+    columns = list(rows[0])
+    lines = [
+        "| " + " | ".join(columns) + " |",
+        "|" + "|".join("---" for _ in columns) + "|",
+        *(
+            "| "
+            + " | ".join(row[column].replace("|", "\\|") for column in columns)
+            + " |"
+            for row in rows
+        ),
+    ]
+
+    return "\n".join(lines) + "\n"
+
+
+# used by plugins created outside of an Autopub instance
+default_executor = Executor()
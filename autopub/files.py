@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO
+
+
+@contextmanager
+def atomic_write(path: Path) -> Iterator[BinaryIO]:
+    """Write to `path` through a temporary file that replaces it on success.
+
+    The temporary file lives in the same directory, so the final rename is
+    atomic: readers either see the old content or the new one, and a crash
+    while writing leaves the original file untouched.
+    """
+    fd, temporary_name = tempfile.mkstemp(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".tmp"
+    )
+    temporary_path = Path(temporary_name)
+
+    try:
+        with os.fdopen(fd, "wb") as f:
+            yield f
+
+            f.flush()
+            os.fsync(f.fileno())
+
+        if path.exists():
+            shutil.copymode(path, temporary_path)
+
+        os.replace(temporary_path, path)
+    except BaseException:
+        temporary_path.unlink(missing_ok=True)
+        raise
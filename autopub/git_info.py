@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from autopub.exceptions import CommandFailed
+from autopub.executor import Executor, default_executor
+
+
+class GitInfo:
+    """Release metadata lookups that work on shallow clones.
+
+    CI systems usually check out repositories with a depth of one, so tags and
+    most of the history are missing. Instead of requiring a full clone, only
+    the objects that are actually needed are fetched.
+
+    A single instance is shared by all the plugins of a run: each query is
+    executed once and memoized until `invalidate` is called, which happens
+    whenever the repository changes (a fetch, a commit or a tag).
+
+    Commands run through the executor of the run, so that network calls
+    like fetches get the `command-timeout` and are in the run summary.
+    """
+
+    def __init__(
+        self,
+        remote: str = "origin",
+        cwd: Path | None = None,
+        executor: Executor | None = None,
+    ) -> None:
+        self.remote = remote
+        self.cwd = cwd
+        self.executor = executor or default_executor
+        self._cache: dict[tuple[str, ...], str] = {}
+
+    def invalidate(self) -> None:
+        self._cache.clear()
+
+    def query(self, *args: str) -> str:
+        """Run a read-only git command, reusing its output if it already ran."""
+        if args not in self._cache:
+            self._cache[args] = self.run(*args)
+
+        return self._cache[args]
+
+    def run(self, *args: str) -> str:
+        result = self.executor.run(["git", *args], cwd=self.cwd, capture_output=True)
+
+        return result.stdout.strip()
+
+    @property
+    def is_shallow(self) -> bool:
+        return self.query("rev-parse", "--is-shallow-repository") == "true"
+
+    @property
+    def current_branch(self) -> str:
+        return self.query("symbolic-ref", "--short", "HEAD")
+
+    @property
+    def prefix(self) -> str:
+        """Path of the working directory inside the repository, with a
+        trailing slash (empty at the top level)."""
+        return self.query("rev-parse", "--show-prefix")
+
+    def changed_files_since(self, ref: str) -> list[str]:
+        """List the files changed since `ref`, relative to the working
+        directory, leaving out the files outside of it."""
+        return self.query("diff", "--name-only", "--relative", ref, "HEAD").splitlines()
+
+    def changed_files_since_merge_base(self, ref: str) -> list[str]:
+        """Like `changed_files_since`, but compared to the merge base of `ref`
+        and HEAD, so changes made on `ref` in the meantime are left out."""
+        return self.changed_files_since(self.merge_base(ref))
+
+    def merge_base(self, ref: str) -> str:
+        """Find the merge base of `ref` and HEAD.
+
+        On a shallow clone, the histories of both commits are deepened until
+        they meet, doubling the depth every time.
+        """
+        head = self.query("rev-parse", "HEAD")
+        deepen = 16
+
+        while True:
+            try:
+                return self.query("merge-base", ref, head)
+            except CommandFailed:
+                if not self.is_shallow:
+                    raise
+
+            self.run("fetch", "--no-tags", f"--deepen={deepen}", self.remote, head, ref)
+            self.invalidate()
+            deepen *= 2
+
+    def has_commit(self, ref: str) -> bool:
+        try:
+            self.query("cat-file", "-e", f"{ref}^{{commit}}")
+        except CommandFailed:
+            return False
+
+        return True
+
+    def fetch(self, refspec: str, depth: int = 1) -> None:
+        """Fetch a ref, limiting the history on shallow clones.
+
+        On a full clone no depth is passed, as that would turn it into a
+        shallow one.
+        """
+        args = ["fetch", "--no-tags", self.remote, refspec]
+
+        if self.is_shallow:
+            args.insert(1, f"--depth={depth}")
+
+        self.run(*args)
+        self.invalidate()
+
+    def merge_commit_parents(self, ref: str = "HEAD") -> list[str]:
+        """Return the parents of the merge commit, fetching them if needed."""
+        sha = self.query("rev-parse", ref)
+        parents = self.query("rev-list", "--parents", "-n", "1", sha).split()[1:]
+
+        # on a shallow clone the boundary commit is reported without parents
+        if not parents and self.is_shallow:
+            self.run("fetch", "--no-tags", "--depth=2", self.remote, sha)
+            self.invalidate()
+            parents = self.query("rev-list", "--parents", "-n", "1", sha).split()[1:]
+
+        return parents
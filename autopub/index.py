@@ -0,0 +1,235 @@
+"""Find out which files of a release are already on the package index.
+
+When a publish job is retried after the upload succeeded, building and
+uploading again is wasted work that ends with the index rejecting the files.
+The JSON simple API (PEP 691) lists the files of a project, and answers are
+cached with their ETag so that asking again is a conditional request.
+When the build is skipped, the published files are downloaded instead, for
+the steps that need them after publishing.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections.abc import Sequence
+from pathlib import Path
+
+from pydantic import BaseModel, Field
+
+from autopub.files import atomic_write
+from autopub.lockfiles import canonical_version, normalize_name
+
+SIMPLE_JSON_CONTENT_TYPE = "application/vnd.pypi.simple.v1+json"
+
+SDIST_SUFFIXES = (".tar.gz", ".zip")
+
+
+class IndexConfig(BaseModel):
+    """Package index configuration, from `[tool.autopub]`."""
+
+    index_url: str | None = Field(
+        default=None,
+        description=(
+            "Simple API of the index that the default repository uploads to, "
+            "used to skip the files that are already published"
+        ),
+        validation_alias="index-url",
+    )
+
+
+def parse_filename(filename: str) -> tuple[str, str] | None:
+    """Return the normalized project name and the version of a distribution
+    file name, or None for files that aren't distributions."""
+    if filename.endswith(".whl"):
+        parts = filename[: -len(".whl")].split("-")
+
+        if len(parts) not in (5, 6):
+            return None
+
+        name, version = parts[0], parts[1]
+    else:
+        for suffix in SDIST_SUFFIXES:
+            if filename.endswith(suffix):
+                name, _, version = filename[: -len(suffix)].rpartition("-")
+                break
+        else:
+            return None
+
+    return normalize_name(name), version
+
+
+def files_for_version(files: dict[str, str], name: str, version: str) -> dict[str, str]:
+    """Return the files of one release of a project.
+
+    Versions are compared normalized, as build backends write them in file
+    names (1.0.0-alpha.59 is released as example-1.0.0a59.tar.gz).
+    """
+    name = normalize_name(name)
+    version = canonical_version(version) or version
+
+    def matches(filename: str) -> bool:
+        if (parsed := parse_filename(filename)) is None:
+            return False
+
+        file_name, file_version = parsed
+
+        return (
+            file_name == name
+            and (canonical_version(file_version) or file_version) == version
+        )
+
+    return {filename: digest for filename, digest in files.items() if matches(filename)}
+
+
+def wheel_supports(filename: str, python: str) -> bool:
+    """Whether a wheel can be installed on a Python version like `3.12`.
+
+    Versions that aren't written as major.minor are never supported, so the
+    release is built again rather than skipped on a guess.
+    """
+    python_tags, abi_tags, platform_tags = (
+        set(tag.split(".")) for tag in filename[: -len(".whl")].split("-")[-3:]
+    )
+
+    if "none" in abi_tags and "any" in platform_tags:
+        return True
+
+    major, _, minor = python.partition(".")
+    minor = minor.partition(".")[0]
+
+    if not (major.isdigit() and minor.isdigit()):
+        return False
+
+    if {f"cp{major}{minor}", f"py{major}{minor}"} & python_tags:
+        return True
+
+    # stable ABI wheels work on every later version
+    return "abi3" in abi_tags and any(
+        tag.startswith(f"cp{major}")
+        and tag[2 + len(major) :].isdigit()
+        and int(tag[2 + len(major) :]) <= int(minor)
+        for tag in python_tags
+    )
+
+
+def is_complete(files: dict[str, str], pythons: Sequence[str] = ()) -> bool:
+    """Whether the files are a complete release: a source distribution and a
+    wheel, for each of `pythons` when wheels are built for several versions.
+
+    Releases with only some of their files uploaded are built again.
+    """
+    wheels = [filename for filename in files if filename.endswith(".whl")]
+
+    if not wheels or not any(filename.endswith(SDIST_SUFFIXES) for filename in files):
+        return False
+
+    return all(
+        any(wheel_supports(wheel, python) for wheel in wheels) for python in pythons
+    )
+
+
+class IndexClient:
+    """Query the files of projects from the JSON simple API of an index."""
+
+    def __init__(self, index_url: str, cache_file: Path, timeout: float = 30) -> None:
+        self.index_url = index_url.rstrip("/") + "/"
+        self.cache_file = cache_file
+        self.timeout = timeout
+        # the download URLs of the files listed by `project_files`
+        self.urls: dict[str, str] = {}
+
+    def _load_cache(self) -> dict[str, dict[str, object]]:
+        try:
+            return json.loads(self.cache_file.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _save_cache(self, cache: dict[str, dict[str, object]]) -> None:
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+
+        with atomic_write(self.cache_file) as f:
+            f.write(json.dumps(cache, indent=2).encode())
+
+    def project_files(self, name: str) -> dict[str, str] | None:
+        """Return the sha256 digests of the files of a project, by file name.
+
+        Projects that don't exist yet have no files. Returns None when the
+        index can't be queried, so that callers carry on as usual.
+        """
+        url = f"{self.index_url}{normalize_name(name)}/"
+        cache = self._load_cache()
+        cached = cache.get(url)
+
+        request = urllib.request.Request(
+            url,
+            headers={"Accept": SIMPLE_JSON_CONTENT_TYPE, "User-Agent": "autopub"},
+        )
+
+        if cached and cached.get("etag"):
+            request.add_header("If-None-Match", str(cached["etag"]))
+
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                data = json.load(response)
+                etag = response.headers.get("ETag")
+        except urllib.error.HTTPError as e:
+            if e.code == 304 and cached:
+                self.urls.update(cached.get("urls", {}))  # type: ignore[arg-type]
+
+                return dict(cached["files"])  # type: ignore[call-overload]
+
+            if e.code == 404:
+                return {}
+
+            return None
+        except (OSError, ValueError):
+            return None
+
+        files = {
+            file["filename"]: file.get("hashes", {}).get("sha256", "")
+            for file in data.get("files", [])
+        }
+        # file URLs may be relative to the project page
+        urls = {
+            file["filename"]: urllib.parse.urljoin(url, file["url"])
+            for file in data.get("files", [])
+            if file.get("url")
+        }
+        self.urls.update(urls)
+
+        if etag:
+            cache[url] = {"etag": etag, "files": files, "urls": urls}
+            self._save_cache(cache)
+
+        return files
+
+    def download(self, filename: str, digest: str, directory: Path) -> Path | None:
+        """Download a file listed by `project_files` into `directory`.
+
+        Returns None when the file can't be downloaded or its content doesn't
+        match `digest`, in which case nothing is written.
+        """
+        if not (url := self.urls.get(filename)):
+            return None
+
+        path = directory / filename
+        request = urllib.request.Request(url, headers={"User-Agent": "autopub"})
+        sha256 = hashlib.sha256()
+
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                with atomic_write(path) as f:
+                    while chunk := response.read(1024 * 1024):
+                        sha256.update(chunk)
+                        f.write(chunk)
+
+                    if digest and sha256.hexdigest() != digest:
+                        raise ValueError(f"{filename} doesn't match its digest")
+        except (OSError, ValueError):
+            return None
+
+        return path
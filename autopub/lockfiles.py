@@ -0,0 +1,190 @@
+"""Update the project's own version in lock files without resolving again.
+
+Lock files that record the project itself (like `uv.lock`) become stale when
+the version is bumped. Instead of running the package manager, which resolves
+the whole dependency graph again, the version of the project's entry is
+replaced by round-tripping the TOML document, which keeps the rest of the
+file untouched.
+"""
+
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import Any
+
+import tomlkit
+from packaging.markers import InvalidMarker, Marker
+from packaging.requirements import InvalidRequirement, Requirement
+from packaging.specifiers import InvalidSpecifier, SpecifierSet
+from packaging.version import InvalidVersion, Version
+
+from autopub.files import atomic_write
+
+# lock file format versions whose layout we know
+SUPPORTED_UV_LOCK_VERSIONS = (1,)
+
+
+def normalize_name(name: str) -> str:
+    """Normalize a distribution name as in PEP 503."""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def canonical_version(version: str) -> str | None:
+    """Normalize a version as in PEP 440, which is how lock files record it
+    (1.0.0-alpha.59 is written 1.0.0a59)."""
+    try:
+        return str(Version(version))
+    except InvalidVersion:
+        return None
+
+
+def _same_specifiers(first: str, second: str) -> bool:
+    """Compare version specifiers, ignoring how they are written
+    (uv writes `>=3.9.0, <4.0` for `>=3.9.0,<4.0`)."""
+    try:
+        return SpecifierSet(first) == SpecifierSet(second)
+    except InvalidSpecifier:
+        return first == second
+
+
+# a requirement as compared with the lock: name, extras, specifiers and marker
+RequirementKey = tuple[str, frozenset[str], str, str]
+
+
+def _declared_requirement(requirement: str) -> RequirementKey:
+    parsed = Requirement(requirement)
+
+    return (
+        normalize_name(parsed.name),
+        frozenset(map(normalize_name, parsed.extras)),
+        str(parsed.specifier),
+        str(parsed.marker or ""),
+    )
+
+
+def _locked_requirement(requirement: Any) -> RequirementKey:
+    marker = requirement.get("marker")
+
+    return (
+        normalize_name(requirement["name"]),
+        frozenset(map(normalize_name, requirement.get("extras", []))),
+        str(SpecifierSet(requirement.get("specifier", ""))),
+        str(Marker(marker)) if marker else "",
+    )
+
+
+def _is_uv_root_package(package: Any, name: str) -> bool:
+    source = package.get("source", {})
+
+    return normalize_name(package.get("name", "")) == name and (
+        source.get("editable") == "." or source.get("virtual") == "."
+    )
+
+
+def _uv_lock_is_consistent(
+    lock: Any, root_packages: list[Any], pyproject: dict[str, Any]
+) -> bool:
+    """Check that the lock still matches the project, apart from its version.
+
+    This is a cheap check of what usually makes a lock stale: the lock format,
+    the Python requirement and the project's direct dependencies, with their
+    specifiers.
+    """
+    if lock.get("version") not in SUPPORTED_UV_LOCK_VERSIONS:
+        return False
+
+    if len(root_packages) != 1:
+        return False
+
+    project = pyproject.get("project", {})
+
+    requires_python = project.get("requires-python")
+
+    if requires_python is not None and not _same_specifiers(
+        lock.get("requires-python", ""), requires_python
+    ):
+        return False
+
+    # requirements written differently (like a marker uv rewrote) also end
+    # up here, and are locked again to be safe
+    try:
+        locked = {
+            _locked_requirement(requirement)
+            for requirement in root_packages[0]
+            .get("metadata", {})
+            .get("requires-dist", [])
+        }
+        declared = {
+            _declared_requirement(requirement)
+            for requirement in project.get("dependencies", [])
+        }
+    except (InvalidRequirement, InvalidSpecifier, InvalidMarker, KeyError):
+        return False
+
+    return locked == declared
+
+
+def update_uv_lock(path: Path, pyproject: dict[str, Any], version: str) -> bool:
+    """Set the version of the project in `uv.lock`.
+
+    Returns False, leaving the file untouched, when the lock doesn't look
+    consistent with the project and has to be generated again.
+    """
+    name = normalize_name(pyproject.get("project", {}).get("name", ""))
+    locked_version = canonical_version(version)
+
+    if locked_version is None:
+        return False
+
+    lock = tomlkit.parse(path.read_text())
+
+    root_packages = [
+        package
+        for package in lock.get("package", [])
+        if _is_uv_root_package(package, name)
+    ]
+
+    if not _uv_lock_is_consistent(lock, root_packages, pyproject):
+        return False
+
+    root_packages[0]["version"] = locked_version
+
+    with atomic_write(path) as f:
+        f.write(tomlkit.dumps(lock).encode())
+
+    return True
+
+
+def update_package_entries(path: Path, name: str, version: str) -> bool:
+    """Set the version of the `[[package]]` entries of the project, for
+    lock files (like `pdm.lock` and `poetry.lock`) that only list the project
+    when it's installed as a dependency of itself.
+
+    Returns whether the file was changed.
+    """
+    locked_version = canonical_version(version)
+
+    if locked_version is None:
+        return False
+
+    lock = tomlkit.parse(path.read_text())
+    name = normalize_name(name)
+
+    packages = [
+        package
+        for package in lock.get("package", [])
+        if normalize_name(package.get("name", "")) == name
+        and package.get("version") != locked_version
+    ]
+
+    if not packages:
+        return False
+
+    for package in packages:
+        package["version"] = locked_version
+
+    with atomic_write(path) as f:
+        f.write(tomlkit.dumps(lock).encode())
+
+    return True
@@ -0,0 +1,117 @@
+"""Checksums of the built distributions, computed once per build.
+
+After a build every distribution is hashed (in parallel, hashing releases
+the GIL) and the digests are written to `dist/SHA256SUMS`, in the format of
+`sha256sum`, and to `dist/manifest.json`, which also records the size and
+modification time of each file. Later steps, possibly in another process,
+read the digests from the manifest instead of reading the files again; a
+file that changed since it was hashed is hashed again.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from autopub.distributions import find_distributions
+from autopub.files import atomic_write
+
+SUMS_FILE = "SHA256SUMS"
+MANIFEST_FILE = "manifest.json"
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path: Path) -> str:
+    with path.open("rb") as f:
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(f, "sha256").hexdigest()
+
+        # Python < 3.11
+        digest = hashlib.sha256()
+
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+
+        return digest.hexdigest()
+
+
+def hash_files(
+    paths: Sequence[Path], max_workers: int | None = None
+) -> dict[Path, str]:
+    if len(paths) <= 1:
+        return {path: hash_file(path) for path in paths}
+
+    max_workers = min(len(paths), max_workers or os.cpu_count() or 1)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(paths, executor.map(hash_file, paths)))
+
+
+def _entry(path: Path, sha256: str) -> dict[str, Any]:
+    stat = path.stat()
+
+    return {
+        "filename": path.name,
+        "sha256": sha256,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+
+
+def _is_fresh(entry: dict[str, Any], path: Path) -> bool:
+    stat = path.stat()
+
+    return entry.get("size") == stat.st_size and entry.get("mtime_ns") == (
+        stat.st_mtime_ns
+    )
+
+
+def _load_entries(dist: Path) -> dict[str, dict[str, Any]]:
+    try:
+        data = json.loads((dist / MANIFEST_FILE).read_text())
+    except (OSError, ValueError):
+        return {}
+
+    return {entry["filename"]: entry for entry in data.get("files", [])}
+
+
+def write_manifest(dist: Path, digests: dict[Path, str]) -> None:
+    files = sorted(digests, key=lambda path: path.name)
+
+    with atomic_write(dist / SUMS_FILE) as f:
+        f.write("".join(f"{digests[path]}  {path.name}\n" for path in files).encode())
+
+    manifest = {"files": [_entry(path, digests[path]) for path in files]}
+
+    with atomic_write(dist / MANIFEST_FILE) as f:
+        f.write(json.dumps(manifest, indent=2).encode())
+
+
+def update_manifest(dist: Path) -> dict[str, str]:
+    """Hash the distributions in `dist` that aren't in the manifest (or
+    changed since), update the manifest, and return the digests by file name.
+    """
+    files = find_distributions(dist)
+
+    if not files:
+        return {}
+
+    entries = _load_entries(dist)
+    digests = {
+        path: entries[path.name]["sha256"]
+        for path in files
+        if path.name in entries and _is_fresh(entries[path.name], path)
+    }
+    stale = [path for path in files if path not in digests]
+
+    if stale or set(entries) != {path.name for path in files}:
+        digests.update(hash_files(stale))
+        write_manifest(dist, digests)
+
+    return {path.name: digests[path] for path in files}
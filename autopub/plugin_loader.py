@@ -1,9 +1,13 @@
 # TODO: use this instead: https://packaging.python.org/en/latest/guides/creating-and-discovering-plugins/
 from __future__ import annotations
 
-import os
+import hashlib
+import importlib.util
 import sys
+import threading
 from importlib import import_module
+from pathlib import Path
+from types import ModuleType
 
 from autopub.plugins import AutopubPlugin
 
@@ -22,17 +26,111 @@ def _is_autopub_plugin(obj: object) -> bool:
     return False
 
 
-def _find_plugin(plugin: str) -> type[AutopubPlugin] | None:
+# top level packages imported from a project root, by the root they were
+# imported from
+_local_packages: dict[str, Path] = {}
+
+# held while local modules are imported, as `sys.path` and `sys.modules` are
+# shared by the threads loading the plugins of several projects
+_import_lock = threading.RLock()
+
+
+def _import_local_package_module(root: Path, module_name: str) -> ModuleType:
+    """Import a module of a package in the project root with its package
+    context, so that its relative and sibling imports work.
+
+    The root is only on `sys.path` during the import. A package of the same
+    name that was imported from another root is dropped from `sys.modules`
+    first. Must be called with `_import_lock` held.
+    """
+    package = module_name.split(".", 1)[0]
+    previous_root = _local_packages.get(package)
+
+    if previous_root is not None and previous_root != root:
+        for name in list(sys.modules):
+            if name == package or name.startswith(f"{package}."):
+                del sys.modules[name]
+
+    if package not in sys.modules:
+        _local_packages[package] = root
+
+    sys.path.insert(0, str(root))
+
+    try:
+        return import_module(module_name)
+    finally:
+        sys.path.remove(str(root))
+
+
+def _load_local_module(root: Path, module_name: str) -> ModuleType | None:
+    """Load a module from the project root without adding it to `sys.path`.
+
+    Single file modules are registered under a name derived from their path,
+    so that projects with plugins of the same name can be loaded in the same
+    process. Modules of a package are imported with their package.
+    """
+    root = root.resolve()
+    path = root.joinpath(*module_name.split("."))
+    submodule_search_locations: list[str] | None = None
+
+    if path.with_suffix(".py").is_file():
+        path = path.with_suffix(".py")
+    elif (path / "__init__.py").is_file():
+        submodule_search_locations = [str(path)]
+        path = path / "__init__.py"
+    else:
+        return None
+
+    with _import_lock:
+        if "." in module_name:
+            return _import_local_package_module(root, module_name)
+
+        return _exec_local_module(module_name, path, submodule_search_locations)
+
+
+def _exec_local_module(
+    module_name: str, path: Path, submodule_search_locations: list[str] | None
+) -> ModuleType:
+    """Execute a single file module under a name derived from its path. Must
+    be called with `_import_lock` held."""
+    digest = hashlib.sha256(str(path).encode()).hexdigest()[:16]
+    unique_name = f"_autopub_local_{digest}_{module_name}"
+
+    if unique_name in sys.modules:
+        return sys.modules[unique_name]
+
+    spec = importlib.util.spec_from_file_location(
+        unique_name, path, submodule_search_locations=submodule_search_locations
+    )
+
+    assert spec is not None and spec.loader is not None
+
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[unique_name] = module
+
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[unique_name]
+        raise
+
+    return module
+
+
+def _find_plugin(plugin: str, root: Path | None = None) -> type[AutopubPlugin] | None:
     module_name = plugin
     symbol_name: str | None = None
 
     if ":" in plugin:
         module_name, symbol_name = plugin.split(":", 1)
 
-    try:
-        module = import_module(module_name)
-    except ModuleNotFoundError:
-        return None
+    module = _load_local_module(root, module_name) if root is not None else None
+
+    if module is None:
+        try:
+            module = import_module(module_name)
+        except ModuleNotFoundError:
+            return None
 
     if symbol_name:
         obj = getattr(module, symbol_name)
@@ -60,13 +158,19 @@ def _find_plugin(plugin: str) -> type[AutopubPlugin] | None:
     return None
 
 
-def load_plugins(names: list[str]) -> list[type[AutopubPlugin]]:
-    sys.path.append(os.getcwd())
+def load_plugins(
+    names: list[str], root: Path | None = None
+) -> list[type[AutopubPlugin]]:
+    """Find the plugin classes, looking for modules in the project root first.
+
+    `root` defaults to the current directory.
+    """
+    root = root or Path.cwd()
 
     plugins: list[type] = []
 
     for plugin_name in names:
-        plugin_class = _find_plugin(f"{plugin_name}")
+        plugin_class = _find_plugin(f"{plugin_name}", root)
 
         if plugin_class is None:
             plugin_class = _find_plugin(f"autopub.plugins.{plugin_name}")
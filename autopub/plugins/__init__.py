@@ -1,13 +1,15 @@
 from __future__ import annotations
 
-import os
-import subprocess
 from collections.abc import Mapping
+from functools import cached_property
+from pathlib import Path
 from typing import TYPE_CHECKING, Any, Protocol, TypeVar, runtime_checkable
 
 from pydantic import BaseModel
 
-from autopub.exceptions import AutopubException, CommandFailed
+from autopub.exceptions import AutopubException
+from autopub.executor import Executor, default_executor
+from autopub.git_info import GitInfo
 from autopub.types import ReleaseInfo
 
 if TYPE_CHECKING:
@@ -18,10 +20,21 @@ Config = TypeVar("Config", bound=BaseModel)
 
 class AutopubPlugin:
     id: str
-    data: dict[str, object] = {}
 
     _config: ConfigType | None = None
 
+    # data and root are created on first use rather than in __init__, so that
+    # plugins overriding __init__ without calling it keep working
+    @cached_property
+    def data(self) -> dict[str, object]:
+        return {}
+
+    @cached_property
+    def root(self) -> Path:
+        # directory of the project, files are read and commands are run from
+        # there; replaced by the root of the Autopub instance when loaded by Autopub
+        return Path.cwd()
+
     def validate_config(self, config: ConfigType):
         configuration_class: type[BaseModel] | None = getattr(self, "Config", None)
 
@@ -49,11 +62,33 @@ class AutopubPlugin:
         assert self._config is not None
         return self._config
 
-    def run_command(self, command: list[str]) -> None:
-        try:
-            subprocess.run(command, check=True, env=os.environ.copy())
-        except subprocess.CalledProcessError as e:
-            raise CommandFailed(command=command, returncode=e.returncode) from e
+    @cached_property
+    def executor(self) -> Executor:
+        # replaced by the instance shared by all plugins when loaded by Autopub
+        return default_executor
+
+    @cached_property
+    def git_info(self) -> GitInfo:
+        # replaced by the instance shared by all plugins when loaded by Autopub
+        return GitInfo(cwd=self.root, executor=self.executor)
+
+    def run_command(
+        self,
+        command: list[str],
+        capture_output: bool = False,
+        timeout: float | None = None,
+    ) -> str:
+        """Run a command, returning its stripped stdout when `capture_output` is set.
+
+        Commands run through the executor shared by all plugins, which
+        enforces the timeout (or the configured `command-timeout`) and
+        records the command for the run summary.
+        """
+        result = self.executor.run(
+            command, cwd=self.root, capture_output=capture_output, timeout=timeout
+        )
+
+        return result.stdout.strip() if capture_output else ""
 
     def post_check(self, release_info: ReleaseInfo) -> None:  # pragma: no cover
         ...
@@ -85,6 +120,9 @@ class AutopubPlugin:
     def post_publish(self, release_info: ReleaseInfo) -> None:  # pragma: no cover
         ...
 
+    def on_release_queued(self, release_info: ReleaseInfo) -> None:  # pragma: no cover
+        ...
+
 
 @runtime_checkable
 class AutopubPackageManagerPlugin(Protocol):
@@ -95,3 +133,19 @@ class AutopubPackageManagerPlugin(Protocol):
         self, repository: str | None = None, **kwargs: Any
     ) -> None:  # pragma: no cover
         ...
+
+
+@runtime_checkable
+class AutopubMatrixBuildPlugin(Protocol):
+    """A package manager plugin that can build with a given interpreter, for
+    the `build-matrix` option."""
+
+    def find_interpreter(self, request: str) -> str | None:  # pragma: no cover
+        """Return the path of the installed interpreter matching `request`
+        (like "3.12"), or None when there's none."""
+        ...
+
+    def build_for(
+        self, python: str, out_dir: Path, sdist: bool = True
+    ) -> None:  # pragma: no cover
+        ...
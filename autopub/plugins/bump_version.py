@@ -1,19 +1,61 @@
 from __future__ import annotations
 
+import os
 import pathlib
 import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
 
 import tomlkit
 from dunamai import Version
+from pydantic import BaseModel, Field, field_validator
 
+from autopub.discovery import INIT_VERSION_PATTERN, PackageInfo
+from autopub.files import atomic_write
 from autopub.plugins import AutopubPlugin
 from autopub.types import ReleaseInfo
 
 
+class VersionFile(BaseModel):
+    path: str = Field(description="Path of the file, relative to the project root")
+    pattern: str = Field(
+        default=INIT_VERSION_PATTERN,
+        description="Regular expression with a `version` group to replace",
+    )
+
+    @field_validator("pattern")
+    @classmethod
+    def _check_pattern(cls, pattern: str) -> str:
+        try:
+            compiled = re.compile(pattern)
+        except re.error as e:
+            raise ValueError(f"invalid regular expression: {e}") from e
+
+        if "version" not in compiled.groupindex:
+            raise ValueError("the pattern must have a `version` group")
+
+        return pattern
+
+
+class BumpVersionConfig(BaseModel):
+    version_files: list[str | VersionFile] = Field(
+        default_factory=list,
+        description="Additional files that contain the version",
+        validation_alias="version-files",
+    )
+
+
 class BumpVersionPlugin(AutopubPlugin):
+    id = "bump_version"
+    Config = BumpVersionConfig
+
+    # set by the workspace to the package found by its index, paths are
+    # relative to the root of the workspace
+    package: PackageInfo | None = None
+
     @property
     def pyproject_config(self) -> tomlkit.TOMLDocument:
-        content = pathlib.Path("pyproject.toml").read_text()
+        content = (self.root / "pyproject.toml").read_text()
 
         return tomlkit.parse(content)
 
@@ -50,9 +92,9 @@ class BumpVersionPlugin(AutopubPlugin):
                 return None
 
     def _find_package_init(self, package_name: str) -> pathlib.Path | None:
-        """Find the package's __init__.py file.
+        """Find the package's __init__.py file, relative to the root.
 
-        Tries multiple common layouts:
+        Multiple common layouts are tried:
         - src/package_name/__init__.py
         - package_name/__init__.py
         - src/__init__.py (for single-module packages)
@@ -67,37 +109,137 @@ class BumpVersionPlugin(AutopubPlugin):
         ]
 
         for path in possible_paths:
-            if path.exists():
+            if (self.root / path).exists():
                 return path
 
         return None
 
-    def _update_init_version(self, new_version: str) -> None:
-        """Update __version__ in the package's __init__.py file if it exists."""
-        config = self.pyproject_config
-        package_name = self._get_package_name(config)
+    @cached_property
+    def _version_patterns(self) -> dict[pathlib.Path, list[re.Pattern[str]]]:
+        """Compiled patterns of the configured version files, by file."""
+        patterns: dict[pathlib.Path, list[re.Pattern[str]]] = {}
 
-        if not package_name:
-            return
+        if not self._config:
+            return patterns
+
+        for version_file in self.config.version_files:  # type: ignore
+            if isinstance(version_file, str):
+                version_file = VersionFile(path=version_file)
+
+            patterns.setdefault(pathlib.Path(version_file.path), []).append(
+                re.compile(version_file.pattern)
+            )
+
+        return patterns
+
+    def _update_version_file(
+        self,
+        path: pathlib.Path,
+        patterns: list[re.Pattern[str]],
+        new_version: str,
+        report: bool = True,
+    ) -> bool:
+        """Replace the version in a file, applying all of its patterns at once.
+
+        `path` is relative to the root, which is how it's reported.
+
+        The file is read once and written back atomically, only if something
+        changed. Patterns that don't match exactly once are reported.
+
+        Returns whether the file was updated.
+        """
+
+        def replace(match: re.Match[str]) -> str:
+            start, end = match.span("version")
+
+            return (
+                match.string[match.start() : start]
+                + new_version
+                + match.string[end : match.end()]
+            )
+
+        if not (self.root / path).exists():
+            print(f"⚠️  version file {path} not found")
+
+            return False
+
+        content = (self.root / path).read_bytes().decode()
+        new_content = content
+
+        for pattern in patterns:
+            new_content, count = pattern.subn(replace, new_content)
+
+            if count != 1 and report:
+                print(
+                    f"⚠️  version pattern {pattern.pattern!r} matched {count} times "
+                    f"in {path}"
+                )
+
+        if new_content == content:
+            return False
+
+        with atomic_write(self.root / path) as f:
+            f.write(new_content.encode())
+
+        return True
+
+    def _update_version_files(
+        self, version_files: dict[pathlib.Path, list[re.Pattern[str]]], new_version: str
+    ) -> list[pathlib.Path]:
+        """Update the version files in parallel, returning the updated ones.
+
+        Paths are relative to the root.
+        """
+        if not version_files:
+            return []
+
+        with ThreadPoolExecutor(max_workers=min(len(version_files), 8)) as executor:
+            updated = executor.map(
+                lambda item: self._update_version_file(*item, new_version),
+                version_files.items(),
+            )
+
+            return [
+                path for path, was_updated in zip(version_files, updated) if was_updated
+            ]
+
+    def _find_package_version_files(self, package_name: str) -> list[pathlib.Path]:
+        """Find the files of the package that may define `__version__`,
+        relative to the root.
+
+        In a workspace, these are the version files found by the workspace's
+        package index, otherwise only the package's __init__.py.
+        """
+        # the index can't tell that the package was renamed since it was built
+        if self.package is not None and self.package.name == package_name:
+            return [
+                pathlib.Path(os.path.relpath(path, self.package.path))
+                for path in self.package.version_files
+            ]
 
         init_file = self._find_package_init(package_name)
 
-        if not init_file:
-            return
+        return [init_file] if init_file else []
 
-        content = init_file.read_text()
+    def _update_package_versions(self, new_version: str) -> list[pathlib.Path]:
+        """Update __version__ in the package's version files if they exist.
 
-        # Regex pattern to match __version__ = "x.y.z" or __version__ = 'x.y.z'
-        pattern = r'__version__\s*=\s*["\'][\d.]+["\']'
+        Returns the paths of the files that were updated.
+        """
+        config = self.pyproject_config
+        package_name = self._get_package_name(config)
 
-        # Check if __version__ exists in the file
-        if not re.search(pattern, content):
-            return
+        if not package_name:
+            return []
 
-        # Replace the version
-        new_content = re.sub(pattern, f'__version__ = "{new_version}"', content)
+        pattern = re.compile(INIT_VERSION_PATTERN)
 
-        init_file.write_text(new_content)
+        # __version__ is optional, so it's not reported when it's missing
+        return [
+            path
+            for path in self._find_package_version_files(package_name)
+            if self._update_version_file(path, [pattern], new_version, report=False)
+        ]
 
     def post_prepare(self, release_info: ReleaseInfo) -> None:
         config = self.pyproject_config
@@ -106,7 +248,14 @@ class BumpVersionPlugin(AutopubPlugin):
 
         self._update_version(config, release_info.version)
 
-        pathlib.Path("pyproject.toml").write_text(tomlkit.dumps(config))  # type: ignore
+        (self.root / "pyproject.toml").write_text(tomlkit.dumps(config))  # type: ignore
+        release_info.add_changed_file("pyproject.toml")
+
+        # Update __version__ in __init__.py (and the like) if it exists
+        for path in self._update_package_versions(release_info.version):
+            release_info.add_changed_file(path)
 
-        # Update __version__ in __init__.py if it exists
-        self._update_init_version(release_info.version)
+        for path in self._update_version_files(
+            self._version_patterns, release_info.version
+        ):
+            release_info.add_changed_file(path)
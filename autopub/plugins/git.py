@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+import contextlib
 import os
+import time
+from pathlib import PurePosixPath
 
 from pydantic import BaseModel, Field
 
+from autopub.exceptions import CommandFailed
 from autopub.plugins import AutopubPlugin
 from autopub.types import ReleaseInfo
 
@@ -15,6 +19,25 @@ COMMIT_TEMPLATE = """\
 [skip ci]
 """
 
+QUEUE_COMMIT_TEMPLATE = """\
+🤖 Queue {release_info.release_type} release
+
+{release_info.release_notes}
+
+[skip ci]
+"""
+
+WORKSPACE_COMMIT_TEMPLATE = """\
+🤖 Release {titles}
+
+{release_notes}
+
+[skip ci]
+"""
+
+# what git prints for refs rejected because the remote has commits we don't
+PUSH_REJECTED_MARKERS = ("(fetch first)", "(non-fast-forward)")
+
 
 class GitConfig(BaseModel):
     """Git configuration for autopub."""
@@ -29,6 +52,42 @@ class GitConfig(BaseModel):
         description="Git email for commits",
         validation_alias="git-email",
     )
+    plumbing_commit: bool = Field(
+        default=False,
+        description=(
+            "Create the release commit with `write-tree`/`commit-tree` from the "
+            "list of changed files instead of `git add`/`git commit`"
+        ),
+        validation_alias="plumbing-commit",
+    )
+    stage_all: bool = Field(
+        default=False,
+        description=(
+            "Stage every change in the working tree instead of only the files "
+            "reported by plugins"
+        ),
+        validation_alias="stage-all",
+    )
+    push_retries: int = Field(
+        default=3,
+        ge=0,
+        description=(
+            "How many times to rebase the release commit onto the remote branch "
+            "and push again when the push is rejected"
+        ),
+        validation_alias="push-retries",
+    )
+    push_retry_delay: float = Field(
+        default=1.0,
+        ge=0,
+        description="Seconds to wait before the first retry, doubled on each attempt",
+        validation_alias="push-retry-delay",
+    )
+
+
+def is_push_rejected(error: CommandFailed) -> bool:
+    """Whether a push failed because the remote branch has new commits."""
+    return any(marker in error.output for marker in PUSH_REJECTED_MARKERS)
 
 
 class GitPlugin(AutopubPlugin):
@@ -57,25 +116,243 @@ class GitPlugin(AutopubPlugin):
 
         return "autopub@autopub"
 
+    def _git(self, *args: str) -> list[str]:
+        """Build a git command that carries the release identity.
+
+        The identity is passed per invocation so that we never have to
+        touch the user's global git configuration.
+        """
+        return [
+            "git",
+            "-c",
+            f"user.name={self._get_git_username()}",
+            "-c",
+            f"user.email={self._get_git_email()}",
+            *args,
+        ]
+
+    def _use_plumbing(self) -> bool:
+        if self._config:
+            return self.config.plumbing_commit  # type: ignore
+
+        return False
+
+    def _stage_all(self) -> bool:
+        if self._config:
+            return self.config.stage_all  # type: ignore
+
+        return False
+
+    def _get_changed_files(self, release_info: ReleaseInfo) -> list[str]:
+        # plugins report the files they touch during prepare, when they do
+        # we don't need to ask git to look at the whole working tree
+        if release_info.changed_files and not self._stage_all():
+            return release_info.changed_files
+
+        output = self.run_command(
+            [
+                "git",
+                "ls-files",
+                "--modified",
+                "--deleted",
+                "--others",
+                "--exclude-standard",
+                "--",
+                ".",
+                ":!.autopub",
+            ],
+            capture_output=True,
+        )
+
+        # deleted files are listed both as modified and deleted
+        return list(dict.fromkeys(output.splitlines()))
+
+    def _commit(self, commit_message: str, release_info: ReleaseInfo) -> None:
+        # TODO: config?
+        # batch releases are made from the release queue, without a release file
+        self.run_command(["git", "rm", "--ignore-unmatch", "RELEASE.md"])
+
+        if release_info.changed_files and not self._stage_all():
+            self.run_command(["git", "add", "--", *release_info.changed_files])
+        else:
+            # TODO: this fails if autopub is git-ignored
+            self.run_command(["git", "add", "--all", "--", ":!.autopub"])
+
+        self.run_command(self._git("commit", "-m", commit_message))
+
+    def _commit_with_plumbing(
+        self,
+        commit_message: str,
+        files: list[str],
+        release_file: str | None = "RELEASE.md",
+    ) -> None:
+        """Create the release commit without going through the porcelain.
+
+        Only the given files are written to the index, so git doesn't need to
+        look at the rest of the working tree.
+        """
+        if release_file is not None:
+            self.run_command(
+                ["git", "update-index", "--force-remove", "--", release_file]
+            )
+
+            files = [file for file in files if file != release_file]
+
+        if files:
+            self.run_command(["git", "update-index", "--add", "--remove", "--", *files])
+
+        tree = self.run_command(["git", "write-tree"], capture_output=True)
+        commit = self.run_command(
+            self._git("commit-tree", tree, "-p", "HEAD", "-m", commit_message),
+            capture_output=True,
+        )
+        self.run_command(["git", "update-ref", "HEAD", commit])
+
+    def _get_push_retries(self) -> tuple[int, float]:
+        if self._config:
+            return self.config.push_retries, self.config.push_retry_delay  # type: ignore
+
+        return 3, 1.0
+
+    def _rebase_onto_remote(self, *tag_names: str) -> None:
+        """Move the release commit (and its tags) on top of the remote branch."""
+        # on shallow clones only the new tip of the branch is fetched
+        self.git_info.fetch(self.git_info.current_branch)
+
+        # only the release commit is replayed, which also works on shallow
+        # clones where the merge base might not be available; files that
+        # aren't part of the release commit can still be modified
+        try:
+            self.run_command(
+                self._git("rebase", "--autostash", "--onto", "FETCH_HEAD", "HEAD~1")
+            )
+        except CommandFailed:
+            # the rebase can fail before it starts, with nothing to abort
+            if self._rebase_in_progress():
+                with contextlib.suppress(CommandFailed):
+                    self.run_command(["git", "rebase", "--abort"])
+
+            raise
+
+        for tag_name in tag_names:
+            self.run_command(["git", "tag", "--force", tag_name, "HEAD"])
+
+        self.git_info.invalidate()
+
+    def _rebase_in_progress(self) -> bool:
+        output = self.run_command(
+            [
+                "git",
+                "rev-parse",
+                "--git-path",
+                "rebase-merge",
+                "--git-path",
+                "rebase-apply",
+            ],
+            capture_output=True,
+        )
+
+        return any((self.root / path).exists() for path in output.splitlines())
+
+    def _push(self, *tag_names: str) -> None:
+        retries, delay = self._get_push_retries()
+
+        for attempt in range(retries + 1):
+            try:
+                # push the branch and the tags in a single round trip, either
+                # all refs are updated on the remote or none of them is
+                self.run_command(
+                    ["git", "push", "--atomic", "origin", "HEAD", *tag_names]
+                )
+            except CommandFailed as e:
+                # only a remote that moved is fixed by rebasing, errors like
+                # a missing permission fail the same way on every attempt
+                if attempt == retries or not is_push_rejected(e):
+                    raise
+
+                wait = delay * 2**attempt
+
+                print(
+                    f"🔁 push rejected, rebasing onto the remote branch and retrying "
+                    f"in {wait:g}s (attempt {attempt + 1} of {retries})"
+                )
+
+                time.sleep(wait)
+
+                self._rebase_onto_remote(*tag_names)
+            else:
+                return
+
     def post_publish(self, release_info: ReleaseInfo) -> None:
         assert release_info.version is not None
 
         tag_name = release_info.version
 
-        git_email = self._get_git_email()
-        git_username = self._get_git_username()
+        commit_message = COMMIT_TEMPLATE.format(release_info=release_info)
 
-        self.run_command(["git", "config", "--global", "user.email", git_email])
-        self.run_command(["git", "config", "--global", "user.name", git_username])
+        if self._use_plumbing():
+            self._commit_with_plumbing(
+                commit_message, self._get_changed_files(release_info)
+            )
+        else:
+            self._commit(commit_message, release_info)
 
         self.run_command(["git", "tag", tag_name])
+        self.git_info.invalidate()
 
-        commit_message = COMMIT_TEMPLATE.format(release_info=release_info)
+        self._push(tag_name)
 
-        # TODO: config?
-        self.run_command(["git", "rm", "RELEASE.md"])
-        # TODO: this fails if autopub is git-ignored
-        self.run_command(["git", "add", "--all", "--", ":!.autopub"])
-        self.run_command(["git", "commit", "-m", commit_message])
-        self.run_command(["git", "push"])
-        self.run_command(["git", "push", "origin", tag_name])
+    def on_release_queued(self, release_info: ReleaseInfo) -> None:
+        """Commit the queue entry in place of the release file and push it."""
+        commit_message = QUEUE_COMMIT_TEMPLATE.format(release_info=release_info)
+
+        if self._use_plumbing():
+            self._commit_with_plumbing(
+                commit_message, self._get_changed_files(release_info)
+            )
+        else:
+            self._commit(commit_message, release_info)
+
+        self.git_info.invalidate()
+
+        self._push()
+
+    def post_publish_workspace(
+        self, releases: dict[str, ReleaseInfo], tag_names: dict[str, str]
+    ) -> None:
+        """Commit the releases of several workspace packages together.
+
+        `releases` maps the path of each package (relative to the repository
+        root) to its release info, `tag_names` maps it to the name of its tag.
+        The release files have already been deleted by then, all the files
+        are staged in one go and every tag is pushed with the branch in a
+        single atomic push.
+        """
+        files: list[str] = []
+
+        for path, release_info in releases.items():
+            prefix = PurePosixPath(path)
+
+            files.append((prefix / "RELEASE.md").as_posix())
+            files += [(prefix / file).as_posix() for file in release_info.changed_files]
+
+        commit_message = WORKSPACE_COMMIT_TEMPLATE.format(
+            titles=", ".join(tag_names[path] for path in releases),
+            release_notes="\n\n".join(
+                f"## {tag_names[path]}\n\n{release_info.release_notes.strip()}"
+                for path, release_info in releases.items()
+            ),
+        )
+
+        if self._use_plumbing():
+            self._commit_with_plumbing(commit_message, files, release_file=None)
+        else:
+            self.run_command(["git", "add", "--all", "--", *files])
+            self.run_command(self._git("commit", "-m", commit_message))
+
+        for tag_name in tag_names.values():
+            self.run_command(["git", "tag", tag_name])
+
+        self.git_info.invalidate()
+
+        self._push(*tag_names.values())
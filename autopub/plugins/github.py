@@ -1,8 +1,9 @@
 import json
 import os
-import pathlib
 import textwrap
+from concurrent.futures import ThreadPoolExecutor
 from functools import cached_property
+from pathlib import Path
 from typing import Optional, TypedDict
 
 from github import Github
@@ -11,6 +12,7 @@ from github.Repository import Repository
 from pydantic import BaseModel
 
 from autopub.exceptions import AutopubException
+from autopub.manifest import SUMS_FILE, update_manifest
 from autopub.plugins import AutopubPlugin
 from autopub.types import ReleaseInfo
 
@@ -132,8 +134,11 @@ class GithubPlugin(AutopubPlugin):
         # as commits[0] may be a branch commit, not the merge commit
         if self._event_data.get("head_commit"):
             sha = self._event_data["head_commit"]["id"]
-        else:
+        elif self._event_data.get("commits"):
             sha = self._event_data["commits"][0]["id"]
+        else:
+            # e.g. scheduled or manually dispatched runs
+            return None
 
         commit = self.repository.get_commit(sha)
 
@@ -147,20 +152,25 @@ class GithubPlugin(AutopubPlugin):
         return first_pr.number
 
     def _update_or_create_comment(
-        self, text: str, marker: str = "<!-- autopub-comment -->"
+        self,
+        text: str,
+        marker: str = "<!-- autopub-comment -->",
+        pull_request: Optional[PullRequest] = None,
     ) -> None:
-        """Update or create a comment on the current PR with the given text."""
+        """Update or create a comment on a PR (the current one by default)
+        with the given text."""
+        pull_request = pull_request or self.pull_request
         comment_body = f"{marker}\n{text}"
 
         # Search for existing comment
-        for comment in self.pull_request.get_issue_comments():
+        for comment in pull_request.get_issue_comments():
             if marker in comment.body:
                 # Update existing comment
                 comment.edit(comment_body)
                 return
 
         # Create new comment if none exists
-        self.pull_request.create_issue_comment(comment_body)
+        pull_request.create_issue_comment(comment_body)
 
     def _get_sponsors(self) -> Sponsors:
         query_organisation = """
@@ -272,7 +282,9 @@ class GithubPlugin(AutopubPlugin):
             f"Discussion category {self.config.discussion_category} not found"
         )
 
-    def _create_discussion(self, release_info: ReleaseInfo) -> str:
+    def _create_discussion(
+        self, release_info: ReleaseInfo, tag_name: Optional[str] = None
+    ) -> str:
         mutation = """
         mutation CreateDiscussion($repositoryId: ID!, $categoryId: ID!, $body: String!, $title: String!) {
             createDiscussion(input: {repositoryId: $repositoryId, categoryId: $categoryId, body: $body, title: $title}) {
@@ -291,7 +303,7 @@ class GithubPlugin(AutopubPlugin):
                 "repositoryId": self.repository.raw_data["node_id"],
                 "categoryId": self._get_discussion_category_id(),
                 "body": self._get_release_message(release_info),
-                "title": f"Release {release_info.version}",
+                "title": f"Release {tag_name or release_info.version}",
             },
         )
 
@@ -329,6 +341,10 @@ class GithubPlugin(AutopubPlugin):
         # Use markdown links for CHANGELOG
         pr_author_link = f"[@{contributors['pr_author']}](https://github.com/{contributors['pr_author']})"
         pr_link = f"[#{self.pull_request.number}]({self.pull_request.html_url})"
+
+        if self.pull_request.number not in release_info.pull_requests:
+            release_info.pull_requests.append(self.pull_request.number)
+
         contributor_line = (
             f"This release was contributed by {pr_author_link} in {pr_link}"
         )
@@ -372,22 +388,27 @@ class GithubPlugin(AutopubPlugin):
         if not include_release_info:
             return message
 
-        if self.pull_request is None:
+        if release_info.pull_requests:
+            # the contributors of each PR were added to the additional release
+            # notes when its release notes were checked, this works for
+            # batches of queued releases, whatever event triggered the run
+            message = "\n\n".join([message, *release_info.additional_release_notes])
+        elif self.pull_request is not None:
+            contributors = self._get_pr_contributors()
+            message += f"\n\nThis release was contributed by @{contributors['pr_author']} in {self.pull_request.html_url}"
+
+            if contributors["additional_contributors"]:
+                additional_contributors = [
+                    f"@{contributor}"
+                    for contributor in contributors["additional_contributors"]
+                ]
+                message += (
+                    f"\n\nAdditional contributors: {', '.join(additional_contributors)}"
+                )
+        else:
             # No PR context, just return the release notes
             return message
 
-        contributors = self._get_pr_contributors()
-        message += f"\n\nThis release was contributed by @{contributors['pr_author']} in {self.pull_request.html_url}"
-
-        if contributors["additional_contributors"]:
-            additional_contributors = [
-                f"@{contributor}"
-                for contributor in contributors["additional_contributors"]
-            ]
-            message += (
-                f"\n\nAdditional contributors: {', '.join(additional_contributors)}"
-            )
-
         if self.config.include_sponsors:
             sponsors = self._get_sponsors()
             if sponsors["sponsors"]:
@@ -407,8 +428,17 @@ class GithubPlugin(AutopubPlugin):
         return message
 
     def _create_release(
-        self, release_info: ReleaseInfo, discussion_url: Optional[str] = None
+        self,
+        release_info: ReleaseInfo,
+        discussion_url: Optional[str] = None,
+        tag_name: Optional[str] = None,
+        dist: Optional[Path] = None,
     ) -> None:
+        """Create the GitHub release of `tag_name` (the version by default),
+        with the distributions in `dist` (`dist` in the root by default)."""
+        tag_name = tag_name or release_info.version
+        dist = dist or self.root / "dist"
+
         message = self._get_release_message(
             release_info,
             include_release_info=True,
@@ -416,16 +446,32 @@ class GithubPlugin(AutopubPlugin):
         )
 
         release = self.repository.create_git_release(
-            tag=release_info.version,
-            name=release_info.version,
+            tag=tag_name,
+            name=tag_name,
             message=message,
         )
 
-        for asset in pathlib.Path("dist").glob("*"):
-            if asset.suffix in [".gz", ".whl"]:
-                release.upload_asset(str(asset))
+        digests = update_manifest(dist)
+        uploaded: set[str] = set()
+
+        for filename, digest in digests.items():
+            # the same file under another name is only uploaded once
+            if digest not in uploaded:
+                uploaded.add(digest)
+                release.upload_asset(str(dist / filename))
+
+        if digests:
+            release.upload_asset(str(dist / SUMS_FILE))
 
     def pre_publish(self, release_info: ReleaseInfo) -> None:
+        self._authenticate_pushes()
+
+    def pre_publish_workspace(
+        self, releases: dict[str, ReleaseInfo], tag_names: dict[str, str]
+    ) -> None:
+        self._authenticate_pushes()
+
+    def _authenticate_pushes(self) -> None:
         # Set remote URL with token for authenticated pushes
         if self.repository_name:
             self.run_command([
@@ -433,19 +479,88 @@ class GithubPlugin(AutopubPlugin):
                 f"https://{self.github_token}@github.com/{self.repository_name}"
             ])
 
-    def post_publish(self, release_info: ReleaseInfo) -> None:
-        if self.pull_request is not None:
-            release_url = (
-                f"{self.repository.html_url}/releases/tag/{release_info.version}"
-            )
-            text = f"This PR was published as [{release_info.version}]({release_url}). Thank you for contributing!"
+    def _thank_pull_request(self, number: int, text: str) -> None:
+        pull_request = self.repository.get_pull(number)
+
+        self._update_or_create_comment(
+            text, marker="<!-- autopub-comment-published -->", pull_request=pull_request
+        )
+
+    def _published_text(self, tag_names: list[str]) -> str:
+        links = ", ".join(
+            f"[{tag_name}]({self.repository.html_url}/releases/tag/{tag_name})"
+            for tag_name in tag_names
+        )
+
+        return f"This PR was published as {links}. Thank you for contributing!"
+
+    def _thank_contributors(self, releases: list[tuple[ReleaseInfo, str]]) -> None:
+        """Thank the PRs the releases were made of, each PR gets a single
+        comment listing every release (tag name) it was published in."""
+        tag_names_by_pull_request: dict[int, list[str]] = {}
+        # releases that don't know their PRs are attributed to the current one
+        unattributed: list[str] = []
+
+        for release_info, tag_name in releases:
+            if release_info.pull_requests:
+                for number in release_info.pull_requests:
+                    tag_names_by_pull_request.setdefault(number, []).append(tag_name)
+            else:
+                unattributed.append(tag_name)
+
+        if tag_names_by_pull_request:
+            # thank the PRs the release was made of, which aren't necessarily
+            # the PR of the current event (or there might be none, e.g. for
+            # scheduled runs publishing the queue); each one needs a few API
+            # calls so they are done concurrently
+            with ThreadPoolExecutor(
+                max_workers=min(len(tag_names_by_pull_request), 8)
+            ) as executor:
+                list(
+                    executor.map(
+                        lambda item: self._thank_pull_request(
+                            item[0], self._published_text(item[1])
+                        ),
+                        tag_names_by_pull_request.items(),
+                    )
+                )
+
+        if unattributed and self.pull_request is not None:
             self._update_or_create_comment(
-                text, marker="<!-- autopub-comment-published -->"
+                self._published_text(unattributed),
+                marker="<!-- autopub-comment-published -->",
             )
 
+    def _publish_release(
+        self, release_info: ReleaseInfo, tag_name: str, dist: Path
+    ) -> None:
         discussion_url = None
 
         if self.config.create_discussions:
-            discussion_url = self._create_discussion(release_info)
+            discussion_url = self._create_discussion(release_info, tag_name=tag_name)
+
+        self._create_release(
+            release_info, discussion_url=discussion_url, tag_name=tag_name, dist=dist
+        )
+
+    def post_publish(self, release_info: ReleaseInfo) -> None:
+        self._thank_contributors([(release_info, release_info.version)])
+        self._publish_release(release_info, release_info.version, self.root / "dist")
 
-        self._create_release(release_info, discussion_url=discussion_url)
+    def post_publish_workspace(
+        self, releases: dict[str, ReleaseInfo], tag_names: dict[str, str]
+    ) -> None:
+        """Create a GitHub release for each tag of a workspace release.
+
+        Called once the git plugin pushed the tags, `releases` and
+        `tag_names` are keyed by the path of each package (relative to the
+        root), whose `dist` directory has the assets of its release.
+        """
+        self._thank_contributors(
+            [(release_info, tag_names[path]) for path, release_info in releases.items()]
+        )
+
+        for path, release_info in releases.items():
+            self._publish_release(
+                release_info, tag_names[path], self.root / path / "dist"
+            )
@@ -0,0 +1,199 @@
+"""Build any project with its PEP 517 build backend (hatchling, flit,
+setuptools, ...), without a package manager.
+
+The backend runs in a build environment that is cached by a hash of the
+build requirements, in `$XDG_CACHE_HOME/autopub/build-envs`, so it is only
+created the first time a project with these requirements is built.
+Environments with requirements that aren't pinned are created again once
+they are a day old, to pick up new releases. Requirements the backend asks
+for at build time get an environment of their own, with the static ones, so
+that projects never see each other's. The hooks are called with
+`pyproject_hooks`, an optional dependency.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import venv
+from pathlib import Path
+from typing import Any
+
+from packaging.requirements import InvalidRequirement, Requirement
+
+from autopub.exceptions import BuildBackendFailed, CommandFailed
+from autopub.plugins import AutopubPackageManagerPlugin
+from autopub.plugins.bump_version import BumpVersionPlugin
+
+__all__ = ["PEP517Plugin"]
+
+# what pip assumes for projects without a [build-system] table
+DEFAULT_BUILD_SYSTEM = {
+    "requires": ["setuptools>=40.8.0"],
+    "build-backend": "setuptools.build_meta:__legacy__",
+}
+
+MARKER_FILE = "autopub-environment.json"
+
+# environments with unpinned requirements are refreshed after this many seconds
+ENVIRONMENT_MAX_AGE = 24 * 60 * 60
+
+
+def build_environments_directory() -> Path:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+
+    return Path(cache_home) / "autopub" / "build-envs"
+
+
+def environment_key(requires: list[str]) -> str:
+    """Hash the build requirements with the interpreter that runs them."""
+    parts = [
+        platform.python_implementation(),
+        ".".join(map(str, sys.version_info[:3])),
+        sys.executable,
+        *sorted(requires),
+    ]
+
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()[:32]
+
+
+def is_pinned(requirement: str) -> bool:
+    """Whether a requirement can only be satisfied by one version."""
+    try:
+        (specifier,) = Requirement(requirement).specifier
+    except (InvalidRequirement, ValueError):
+        return False
+
+    return specifier.operator == "===" or (
+        specifier.operator == "==" and not specifier.version.endswith(".*")
+    )
+
+
+def is_expired(marker: Path, requires: list[str]) -> bool:
+    """Whether an environment has to be created again to pick up new releases
+    of its requirements."""
+    if all(is_pinned(requirement) for requirement in requires):
+        return False
+
+    try:
+        created = json.loads(marker.read_text())["created"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return True
+
+    return time.time() - created > ENVIRONMENT_MAX_AGE
+
+
+def environment_python(directory: Path) -> Path:
+    if os.name == "nt":
+        return directory / "Scripts" / "python.exe"
+
+    return directory / "bin" / "python"
+
+
+class PEP517Plugin(BumpVersionPlugin, AutopubPackageManagerPlugin):
+    # uploaded by Autopub, see `publish`
+    native_upload = True
+
+    @property
+    def build_system(self) -> dict[str, Any]:
+        build_system = self.pyproject_config.unwrap().get("build-system", {})
+
+        if "build-backend" not in build_system:
+            return {**DEFAULT_BUILD_SYSTEM, **build_system}
+
+        return build_system
+
+    def _install(self, python: Path, requirements: list[str]) -> None:
+        if shutil.which("uv"):
+            command = ["uv", "pip", "install", "--python", str(python)]
+        else:
+            command = [str(python), "-m", "pip", "install", "--quiet"]
+
+        self.run_command([*command, *requirements])
+
+    def _create_environment(self, directory: Path, requires: list[str]) -> None:
+        directory.parent.mkdir(parents=True, exist_ok=True)
+
+        # created next to its final location and renamed once complete, so
+        # concurrent builds never use a half installed environment
+        temporary = Path(tempfile.mkdtemp(dir=directory.parent, prefix=".tmp-"))
+
+        try:
+            # pip is needed to install requirements later on, without uv
+            venv.create(temporary, with_pip=not shutil.which("uv"))
+
+            if requires:
+                self._install(environment_python(temporary), requires)
+            (temporary / MARKER_FILE).write_text(
+                json.dumps({"requires": requires, "created": time.time()})
+            )
+        except BaseException:
+            shutil.rmtree(temporary, ignore_errors=True)
+            raise
+
+        try:
+            os.replace(temporary, directory)
+        except OSError:
+            # another build created the same environment in the meantime
+            shutil.rmtree(temporary, ignore_errors=True)
+
+    def build_environment(self, extra: list[str] | None = None) -> Path:
+        """Return the build environment for the project's build requirements,
+        and the `extra` ones the backend asks for, creating it the first time
+        (or again once it expired)."""
+        requires = sorted({*self.build_system.get("requires", []), *(extra or [])})
+        directory = build_environments_directory() / environment_key(requires)
+        marker = directory / MARKER_FILE
+
+        if not marker.exists() or is_expired(marker, requires):
+            shutil.rmtree(directory, ignore_errors=True)
+            self._create_environment(directory, requires)
+
+        return directory
+
+    def build(self) -> None:
+        try:
+            from pyproject_hooks import BackendUnavailable, BuildBackendHookCaller
+        except ImportError as e:
+            raise BuildBackendFailed(
+                "the pep517 plugin requires the pyproject-hooks package (autopub[pep517])"
+            ) from e
+
+        build_system = self.build_system
+        dist = self.root / "dist"
+        dist.mkdir(exist_ok=True)
+
+        def hooks(directory: Path) -> BuildBackendHookCaller:
+            return BuildBackendHookCaller(
+                str(self.root),
+                build_system["build-backend"],
+                backend_path=build_system.get("backend-path"),
+                python_executable=str(environment_python(directory)),
+            )
+
+        static = hooks(self.build_environment())
+
+        try:
+            sdist = self.build_environment(static.get_requires_for_build_sdist())
+            hooks(sdist).build_sdist(str(dist))
+
+            wheel = self.build_environment(static.get_requires_for_build_wheel())
+            hooks(wheel).build_wheel(str(dist))
+        except BackendUnavailable as e:
+            raise BuildBackendFailed(getattr(e, "message", None) or str(e)) from e
+        except subprocess.CalledProcessError as e:
+            raise CommandFailed(
+                command=[str(part) for part in e.cmd], returncode=e.returncode
+            ) from e
+
+    def publish(self, repository: str | None = None, **kwargs: Any) -> None:
+        """Nothing to do: there's no package manager to upload with, so
+        Autopub uploads the distributions with its native uploader and the
+        `upload-*` options, as with `native-upload`."""
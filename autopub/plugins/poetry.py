@@ -1,12 +1,31 @@
 from __future__ import annotations
 
+from autopub.lockfiles import update_package_entries
 from autopub.plugins import AutopubPackageManagerPlugin
 from autopub.plugins.bump_version import BumpVersionPlugin
+from autopub.types import ReleaseInfo
 
 __all__ = ["PoetryPlugin"]
 
 
 class PoetryPlugin(BumpVersionPlugin, AutopubPackageManagerPlugin):
+    def post_prepare(self, release_info: ReleaseInfo) -> None:
+        super().post_prepare(release_info)
+
+        assert release_info.version is not None
+
+        lockfile = self.root / "poetry.lock"
+        package_name = self._get_package_name(self.pyproject_config)
+
+        # the lock only lists the project when it depends on itself, its
+        # content hash doesn't cover the version so nothing else changes
+        if (
+            lockfile.exists()
+            and package_name
+            and update_package_entries(lockfile, package_name, release_info.version)
+        ):
+            release_info.add_changed_file("poetry.lock")
+
     def build(self) -> None:
         self.run_command(["poetry", "build"])
 
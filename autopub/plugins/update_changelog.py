@@ -1,71 +1,228 @@
 from __future__ import annotations
 
+import shutil
 from datetime import date
 from pathlib import Path
-
+from typing import BinaryIO
+
+from pydantic import BaseModel, Field
+
+from autopub.changelog import (
+    CHANGELOG_HEADER,
+    VERSION_HEADER,
+    ChangelogEntry,
+    ChangelogReader,
+    append_json,
+    export_atom,
+    export_json,
+    prepend_atom,
+    rotate_changelog,
+)
+from autopub.files import atomic_write
 from autopub.plugins import AutopubPlugin
 from autopub.types import ReleaseInfo
 
-# TODO: from config
-CHANGELOG_HEADER = "========="
-VERSION_HEADER = "-"
+__all__ = [
+    "CHANGELOG_HEADER",
+    "VERSION_HEADER",
+    "UpdateChangelogConfig",
+    "UpdateChangelogPlugin",
+]
+
+# the header is at the top of the changelog, the rest of the file isn't read
+# to look for it
+HEADER_SEARCH_BYTES = 64 * 1024
+
+
+class UpdateChangelogConfig(BaseModel):
+    """Changelog configuration.
+
+    Rotation is disabled unless at least one of the limits is set, exports are
+    disabled unless their file is set.
+    """
+
+    max_versions: int | None = Field(
+        default=None,
+        ge=1,
+        description="Archive older major versions above this many versions",
+        validation_alias="max-versions",
+    )
+    max_bytes: int | None = Field(
+        default=None,
+        ge=1,
+        description="Archive older major versions above this file size",
+        validation_alias="max-bytes",
+    )
+    archive_directory: str = Field(
+        default="changelog",
+        description="Directory where the archived changelogs are written",
+        validation_alias="archive-directory",
+    )
+    json_file: str | None = Field(
+        default=None,
+        description="JSON lines file the changelog entries are exported to",
+        validation_alias="json-file",
+    )
+    feed_file: str | None = Field(
+        default=None,
+        description="Atom feed file the changelog entries are exported to",
+        validation_alias="feed-file",
+    )
+    feed_title: str = Field(
+        default="Changelog",
+        description="Title of the Atom feed",
+        validation_alias="feed-title",
+    )
+    feed_id: str = Field(
+        default="urn:autopub:changelog",
+        description="Unique identifier (usually the URL) of the Atom feed",
+        validation_alias="feed-id",
+    )
 
 
 class UpdateChangelogPlugin(AutopubPlugin):
+    id = "update_changelog"
+    Config = UpdateChangelogConfig
+
     @property
     def changelog_file(self) -> Path:
-        return Path("CHANGELOG.md")
+        return self.root / "CHANGELOG.md"
 
-    def post_prepare(self, release_info: ReleaseInfo) -> None:
-        if not self.changelog_file.exists():
-            self.changelog_file.write_text(f"CHANGELOG\n{CHANGELOG_HEADER}\n\n")
+    def _read_header(self, changelog: BinaryIO) -> bytes | None:
+        """Read up to and including the CHANGELOG header line.
 
-        current_date = date.today().strftime("%Y-%m-%d")
+        The header is only looked for in the first `HEADER_SEARCH_BYTES` of
+        the file. If it isn't there the file is rewound, so that all of its
+        content is treated as old changelog data.
+        """
+        lines: list[bytes] = []
+        size = 0
 
-        lines = self.changelog_file.read_text().splitlines()
+        for line in iter(changelog.readline, b""):
+            lines.append(line)
 
-        # Look for CHANGELOG header (e.g., "CHANGELOG\n=========")
-        header = []
-        old_changelog_data = []
-        header_found = False
+            if line.strip() == CHANGELOG_HEADER.encode():
+                return b"".join(lines)
 
-        for index, line in enumerate(lines):
-            if CHANGELOG_HEADER == line.strip():
-                old_changelog_data = lines[index + 1 :]
-                header = lines[: index + 1]
-                header_found = True
+            size += len(line)
+
+            if size > HEADER_SEARCH_BYTES:
                 break
 
-        # If no header found, treat all existing content as old changelog data
-        if not header_found:
-            old_changelog_data = lines
+        changelog.seek(0)
+
+        return None
+
+    def _skip_blank_lines(self, changelog: BinaryIO) -> bytes:
+        """Skip leading blank lines, returning the first non blank line."""
+        for line in iter(changelog.readline, b""):
+            if line.strip():
+                return line
+
+        return b""
+
+    def post_prepare(self, release_info: ReleaseInfo) -> None:
+        if not self.changelog_file.exists():
+            self.changelog_file.write_text(f"CHANGELOG\n{CHANGELOG_HEADER}\n\n")
+
+        current_date = date.today().strftime("%Y-%m-%d")
 
         new_version = release_info.version
 
         assert new_version is not None
 
-        with self.changelog_file.open("w") as f:
-            # Write header if it exists
-            if header:
-                f.write("\n".join(header))
-                f.write("\n\n")
-
-            # Write new version entry
-            new_version_header = f"{new_version} - {current_date}"
-            f.write(f"{new_version_header}\n")
-            f.write(f"{VERSION_HEADER * len(new_version_header)}\n\n")
-            f.write(release_info.release_notes)
-
-            if release_info.additional_release_notes:
-                for line in release_info.additional_release_notes:
-                    f.write(f"\n\n{line}")
-
-            # Write old changelog data (skip if empty or only whitespace)
-            old_content = "\n".join(old_changelog_data).strip()
-            if old_content:
-                f.write("\n\n")
-                # Strip leading empty lines from old changelog data to avoid extra blank lines
-                while old_changelog_data and old_changelog_data[0].strip() == "":
-                    old_changelog_data = old_changelog_data[1:]
-                # Preserve the original formatting including any trailing newlines
-                f.write("\n".join(old_changelog_data))
+        entry = ChangelogEntry.create(
+            version=new_version,
+            date=current_date,
+            release_notes=release_info.release_notes,
+            additional_release_notes=release_info.additional_release_notes,
+        )
+
+        # The changelog is only scanned until its header, the rest is copied
+        # in blocks to a temporary file that then replaces the original one,
+        # so memory usage doesn't depend on the size of the changelog and a
+        # crash can't leave a truncated file behind
+        with atomic_write(self.changelog_file) as target:
+            # closed before the temporary file replaces it, which Windows
+            # doesn't allow for open files
+            with self.changelog_file.open("rb") as source:
+                header = self._read_header(source)
+
+                if header is not None:
+                    target.write(header.rstrip(b"\r\n"))
+                    target.write(b"\n\n")
+
+                target.write(entry.render().encode())
+
+                # Write old changelog data (skip if empty or only whitespace),
+                # leading empty lines are stripped to avoid extra blank lines
+                first_line = self._skip_blank_lines(source)
+
+                if first_line:
+                    target.write(b"\n\n")
+                    target.write(first_line)
+                    shutil.copyfileobj(source, target)
+
+        release_info.add_changed_file(self.changelog_file.relative_to(self.root))
+
+        self._export(entry, release_info)
+        self._rotate(release_info)
+
+    def _export(self, entry: ChangelogEntry, release_info: ReleaseInfo) -> None:
+        """Add the new entry to the JSON and Atom exports.
+
+        Existing exports only get the new entry, they are generated from the
+        whole changelog only when they don't exist yet.
+        """
+        if not self._config:
+            return
+
+        config: UpdateChangelogConfig = self.config  # type: ignore
+
+        if config.json_file:
+            json_file = self.root / config.json_file
+
+            if json_file.exists():
+                append_json(json_file, entry)
+            else:
+                json_file.parent.mkdir(parents=True, exist_ok=True)
+
+                with json_file.open("w", encoding="utf-8") as output:
+                    export_json(ChangelogReader(self.changelog_file), output)
+
+            release_info.add_changed_file(config.json_file)
+
+        if config.feed_file:
+            feed_file = self.root / config.feed_file
+
+            if feed_file.exists():
+                prepend_atom(feed_file, entry, config.feed_id)
+            else:
+                feed_file.parent.mkdir(parents=True, exist_ok=True)
+
+                with feed_file.open("w", encoding="utf-8") as output:
+                    export_atom(
+                        ChangelogReader(self.changelog_file),
+                        output,
+                        title=config.feed_title,
+                        feed_id=config.feed_id,
+                    )
+
+            release_info.add_changed_file(config.feed_file)
+
+    def _rotate(self, release_info: ReleaseInfo) -> None:
+        if not self._config:
+            return
+
+        config: UpdateChangelogConfig = self.config  # type: ignore
+
+        if config.max_versions is None and config.max_bytes is None:
+            return
+
+        for file in rotate_changelog(
+            self.changelog_file,
+            self.root / config.archive_directory,
+            max_versions=config.max_versions,
+            max_bytes=config.max_bytes,
+        ):
+            release_info.add_changed_file(file.relative_to(self.root))
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
-import subprocess
+from pathlib import Path
 from typing import Any
 
+from autopub.exceptions import CommandFailed
+from autopub.lockfiles import update_uv_lock
 from autopub.plugins import AutopubPackageManagerPlugin
 from autopub.plugins.bump_version import BumpVersionPlugin
 from autopub.types import ReleaseInfo
@@ -15,12 +17,42 @@ class UvPlugin(BumpVersionPlugin, AutopubPackageManagerPlugin):
         # Call parent to update pyproject.toml and __version__ in __init__.py
         super().post_prepare(release_info)
 
-        # Regenerate uv.lock after version bump
-        subprocess.run(["uv", "lock"], check=True)
+        assert release_info.version is not None
+
+        lockfile = self.root / "uv.lock"
+
+        # only the project's own version changed, which is patched in place;
+        # uv resolves everything again only when the lock looks stale
+        if not lockfile.exists() or not update_uv_lock(
+            lockfile, self.pyproject_config, release_info.version
+        ):
+            self.run_command(["uv", "lock"])
+
+        if lockfile.exists():
+            release_info.add_changed_file("uv.lock")
 
     def build(self) -> None:
         self.run_command(["uv", "build"])
 
+    def find_interpreter(self, request: str) -> str | None:
+        try:
+            return self.run_command(["uv", "python", "find", request], True) or None
+        except CommandFailed:
+            return None
+
+    def build_for(self, python: str, out_dir: Path, sdist: bool = True) -> None:
+        self.run_command(
+            [
+                "uv",
+                "build",
+                "--python",
+                python,
+                "--out-dir",
+                str(out_dir),
+                *([] if sdist else ["--wheel"]),
+            ]
+        )
+
     def publish(self, repository: str | None = None, **kwargs: Any) -> None:
         additional_args: list[str] = []
 
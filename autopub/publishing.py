@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+
+from pydantic import BaseModel, Field
+
+from autopub.exceptions import AutopubException
+
+DEFAULT_MAX_PARALLEL_REPOSITORIES = 4
+
+# name of the package manager's default repository in error messages
+DEFAULT_REPOSITORY = "default"
+
+
+class PublishConfig(BaseModel):
+    """Publishing configuration, from `[tool.autopub]`."""
+
+    max_parallel_repositories: int = Field(
+        default=DEFAULT_MAX_PARALLEL_REPOSITORIES,
+        ge=1,
+        description="Number of repositories published to at the same time",
+        validation_alias="max-parallel-repositories",
+    )
+    optional_repositories: list[str] = Field(
+        default_factory=list,
+        description="Repositories whose failures don't fail the release",
+        validation_alias="optional-repositories",
+    )
+
+
+def publish_to_repositories(
+    publish: Callable[[str | None], None],
+    repositories: Sequence[str | None],
+    max_parallel: int = DEFAULT_MAX_PARALLEL_REPOSITORIES,
+) -> dict[str, str]:
+    """Call `publish` for every repository, in a pool of threads.
+
+    Publishing is mostly waiting on the network (or on the package manager),
+    so threads are enough. Every repository is attempted, and the errors
+    are returned by repository.
+    """
+    errors: dict[str, str] = {}
+
+    with ThreadPoolExecutor(max_workers=max_parallel) as executor:
+        futures = {
+            repository: executor.submit(publish, repository)
+            for repository in repositories
+        }
+
+        for repository, future in futures.items():
+            try:
+                future.result()
+            except AutopubException as e:
+                errors[repository or DEFAULT_REPOSITORY] = e.message
+            except Exception as e:
+                errors[repository or DEFAULT_REPOSITORY] = str(e) or type(e).__name__
+
+    return errors
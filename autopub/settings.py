@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from autopub.build_cache import BuildCacheConfig
+from autopub.build_matrix import BuildMatrixConfig
+from autopub.changes import PathFilters
+from autopub.executor import ExecutorConfig
+from autopub.index import IndexConfig
+from autopub.publishing import PublishConfig
+from autopub.upload import UploadConfig
+from autopub.validation import ValidationConfig
+
+
+class AutopubSettings(
+    ExecutorConfig,
+    PathFilters,
+    BuildMatrixConfig,
+    BuildCacheConfig,
+    IndexConfig,
+    UploadConfig,
+    PublishConfig,
+    ValidationConfig,
+):
+    """The options of `[tool.autopub]` read by Autopub itself.
+
+    Each group of options is declared next to the code that uses it, they
+    are validated together by `Autopub.validate_config`, so that a bad value
+    is reported with the others before any work starts.
+    """
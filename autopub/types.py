@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import dataclasses
+import os
+from pathlib import Path
 from typing import Any
 
 from typing_extensions import Self
@@ -16,6 +18,15 @@ class ReleaseInfo:
     additional_release_notes: list[str] = dataclasses.field(default_factory=list)
     version: str | None = None
     previous_version: str | None = None
+    changed_files: list[str] = dataclasses.field(default_factory=list)
+    pull_requests: list[int] = dataclasses.field(default_factory=list)
+
+    def add_changed_file(self, path: str | os.PathLike[str]) -> None:
+        """Record a file that was modified while preparing the release."""
+        file = Path(path).as_posix()
+
+        if file not in self.changed_files:
+            self.changed_files.append(file)
 
     def dict(self) -> dict[str, Any]:
         """Return a dictionary representation of the release info."""
@@ -30,4 +41,6 @@ class ReleaseInfo:
             additional_release_notes=data["additional_release_notes"],
             version=data["version"],
             previous_version=data["previous_version"],
+            changed_files=data.get("changed_files", []),
+            pull_requests=data.get("pull_requests", []),
         )
@@ -0,0 +1,376 @@
+"""Upload distributions with the legacy upload API of package indexes.
+
+This is the API of PyPI (https://upload.pypi.org/legacy/) and of most other
+indexes: one `multipart/form-data` POST per file, with the core metadata as
+form fields next to the file content.
+
+Bodies are streamed from disk. The digests of a file are computed while its
+content is sent and are written as the last form fields, which the API
+accepts in any order, so every file is read exactly once.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import http.client
+import os
+import secrets
+import threading
+import time
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from pydantic import BaseModel, Field
+
+from autopub.distributions import Distribution
+from autopub.exceptions import UploadFailed
+
+PYPI_UPLOAD_URL = "https://upload.pypi.org/legacy/"
+
+CHUNK_SIZE = 1024 * 1024
+
+# statuses worth trying again, everything else is a problem with the upload
+TRANSIENT_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+# core metadata fields whose form field name isn't the lower cased header
+FIELD_NAMES = {
+    "Classifier": "classifiers",
+    "Home-page": "home_page",
+    "License-File": "license_files",
+    "Project-URL": "project_urls",
+    "Supported-Platform": "supported_platform",
+}
+
+# digests form fields, as a hash name and the length of the hex digest
+DIGESTS = {
+    "md5_digest": ("md5", 32),
+    "sha256_digest": ("sha256", 64),
+    "blake2_256_digest": ("blake2b", 64),
+}
+
+
+class UploadConfig(BaseModel):
+    """Native upload configuration, from `[tool.autopub]`."""
+
+    native_upload: bool = Field(
+        default=False,
+        description="Upload with autopub instead of the package manager",
+        validation_alias="native-upload",
+    )
+    upload_url: str = Field(
+        default=PYPI_UPLOAD_URL,
+        description="URL of the legacy upload API of the index",
+        validation_alias="upload-url",
+    )
+    upload_workers: int = Field(
+        default=4,
+        ge=1,
+        description="Number of files uploaded at the same time",
+        validation_alias="upload-workers",
+    )
+    upload_retries: int = Field(
+        default=3,
+        ge=0,
+        description="Number of times a failed upload is tried again",
+        validation_alias="upload-retries",
+    )
+
+
+def _new_hash(name: str) -> hashlib._Hash:
+    if name == "md5":
+        # only used to identify the file, FIPS builds reject it otherwise
+        return hashlib.md5(usedforsecurity=False)
+
+    if name == "blake2b":
+        return hashlib.blake2b(digest_size=32)
+
+    return hashlib.new(name)
+
+
+def metadata_fields(distribution: Distribution) -> list[tuple[str, str]]:
+    """The form fields of a distribution, apart from its content and digests."""
+    fields = [
+        (":action", "file_upload"),
+        ("protocol_version", "1"),
+        ("filetype", distribution.filetype),
+        ("pyversion", distribution.pyversion),
+    ]
+
+    for header, value in distribution.metadata.items():
+        if header == "Description":
+            continue
+
+        name = FIELD_NAMES.get(header, header.lower().replace("-", "_"))
+        fields.append((name, str(value)))
+
+    if description := distribution.description:
+        fields.append(("description", description))
+
+    return fields
+
+
+class MultipartBody:
+    """A `multipart/form-data` body that streams a file from disk.
+
+    The length of the body is known up front, so it can be sent with a
+    `Content-Length` header, and the digests of the file are available
+    once it has been iterated.
+    """
+
+    def __init__(
+        self,
+        fields: list[tuple[str, str]],
+        path: Path,
+        boundary: str | None = None,
+        digests: dict[str, str] | None = None,
+    ) -> None:
+        self.path = path
+        self.boundary = boundary or secrets.token_hex(16)
+        # digests that are already known aren't computed again
+        self.known_digests = digests or {}
+        self.digests: dict[str, str] = dict(self.known_digests)
+
+        self._head = b"".join(self._field(name, value) for name, value in fields)
+        self._head += self._part_header(
+            f'name="content"; filename="{path.name}"',
+            b"Content-Type: application/octet-stream\r\n",
+        )
+        self._size = path.stat().st_size
+
+    def _part_header(self, disposition: str, extra: bytes = b"") -> bytes:
+        return (
+            f"--{self.boundary}\r\n"
+            f"Content-Disposition: form-data; {disposition}\r\n".encode()
+            + extra
+            + b"\r\n"
+        )
+
+    def _field(self, name: str, value: str) -> bytes:
+        return self._part_header(f'name="{name}"') + value.encode("utf-8") + b"\r\n"
+
+    def _tail(self, digests: dict[str, str]) -> bytes:
+        return (
+            b"\r\n"
+            + b"".join(self._field(name, value) for name, value in digests.items())
+            + f"--{self.boundary}--\r\n".encode()
+        )
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self) -> int:
+        placeholder = self.known_digests or {
+            name: "0" * length for name, (_, length) in DIGESTS.items()
+        }
+
+        return len(self._head) + self._size + len(self._tail(placeholder))
+
+    def __iter__(self) -> Iterator[bytes]:
+        hashes = (
+            {}
+            if self.known_digests
+            else {
+                name: _new_hash(algorithm) for name, (algorithm, _) in DIGESTS.items()
+            }
+        )
+
+        yield self._head
+
+        with self.path.open("rb") as f:
+            while chunk := f.read(CHUNK_SIZE):
+                for digest in hashes.values():
+                    digest.update(chunk)
+
+                yield chunk
+
+        if hashes:
+            self.digests = {name: digest.hexdigest() for name, digest in hashes.items()}
+
+        yield self._tail(self.digests)
+
+
+class Uploader:
+    """Upload distributions to a package index.
+
+    Each worker thread keeps its own keep-alive connection, which is reused
+    for all the files it uploads. Connection errors and transient statuses
+    are retried with an exponential backoff, on a new connection.
+    """
+
+    def __init__(
+        self,
+        url: str = PYPI_UPLOAD_URL,
+        username: str | None = None,
+        password: str | None = None,
+        max_workers: int = 4,
+        retries: int = 3,
+        backoff: float = 1.0,
+        timeout: float = 300,
+    ) -> None:
+        parts = urlsplit(url)
+
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise UploadFailed({url: "the upload URL must be an HTTP(S) URL"})
+
+        self.url = url
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+        self._scheme = parts.scheme
+        self._host = parts.hostname
+        self._port = parts.port
+        self._path = parts.path or "/"
+
+        if parts.query:
+            self._path += f"?{parts.query}"
+
+        self._headers = {"User-Agent": "autopub"}
+
+        if password is not None:
+            credentials = f"{username or '__token__'}:{password}".encode()
+            self._headers["Authorization"] = (
+                f"Basic {base64.b64encode(credentials).decode()}"
+            )
+
+        self._local = threading.local()
+        self._connections: list[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+
+    def _connection(self) -> http.client.HTTPConnection:
+        connection = getattr(self._local, "connection", None)
+
+        if connection is None:
+            connection_class = (
+                http.client.HTTPSConnection
+                if self._scheme == "https"
+                else http.client.HTTPConnection
+            )
+            connection = connection_class(self._host, self._port, timeout=self.timeout)
+            self._local.connection = connection
+
+            with self._lock:
+                self._connections.append(connection)
+
+        return connection
+
+    def _reset_connection(self) -> None:
+        connection = getattr(self._local, "connection", None)
+
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def close(self) -> None:
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+
+            self._connections.clear()
+
+    def _send(self, body: MultipartBody) -> tuple[int, str]:
+        connection = self._connection()
+
+        connection.putrequest("POST", self._path)
+
+        for name, value in self._headers.items():
+            connection.putheader(name, value)
+
+        connection.putheader("Content-Type", body.content_type)
+        connection.putheader("Content-Length", str(len(body)))
+        connection.endheaders()
+
+        for chunk in body:
+            connection.send(chunk)
+
+        response = connection.getresponse()
+        text = response.read().decode("utf-8", errors="replace")
+
+        if response.will_close:
+            self._reset_connection()
+
+        return response.status, text or response.reason
+
+    def upload_file(self, path: Path, sha256: str | None = None) -> dict[str, str]:
+        """Upload one distribution, returning the digests of the file.
+
+        When the sha256 digest of the file is given, it isn't hashed again.
+        """
+        fields = metadata_fields(Distribution.from_path(path))
+        known = {"sha256_digest": sha256} if sha256 else None
+
+        for attempt in range(self.retries + 1):
+            body = MultipartBody(fields, path, digests=known)
+
+            try:
+                status, text = self._send(body)
+            except (OSError, http.client.HTTPException) as e:
+                self._reset_connection()
+                status, text = 0, str(e) or type(e).__name__
+
+            if 200 <= status < 300:
+                return body.digests
+
+            if 300 <= status < 400:
+                raise UploadFailed(
+                    {path.name: f"redirected ({status}), check the upload URL"}
+                )
+
+            if status and status not in TRANSIENT_STATUSES:
+                raise UploadFailed({path.name: f"{status} {text.strip()}"})
+
+            if attempt < self.retries:
+                time.sleep(self.backoff * 2**attempt)
+
+        raise UploadFailed(
+            {path.name: f"gave up after {self.retries + 1} attempts: {text.strip()}"}
+        )
+
+    def upload(
+        self, paths: list[Path], digests: dict[str, str] | None = None
+    ) -> dict[Path, dict[str, str]]:
+        """Upload the distributions concurrently, returning their digests.
+
+        `digests` are the known sha256 digests, by file name. Every file is
+        attempted, and the failures are raised together.
+        """
+        digests = digests or {}
+
+        results: dict[Path, dict[str, str]] = {}
+        errors: dict[str, str] = {}
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {
+                    path: executor.submit(
+                        self.upload_file, path, digests.get(path.name)
+                    )
+                    for path in paths
+                }
+
+                for path, future in futures.items():
+                    try:
+                        results[path] = future.result()
+                    except UploadFailed as e:
+                        errors.update(e.errors)
+                    except Exception as e:
+                        errors[path.name] = str(e) or type(e).__name__
+        finally:
+            self.close()
+
+        if errors:
+            raise UploadFailed(errors)
+
+        return results
+
+
+def credentials_from_environment() -> tuple[str | None, str | None]:
+    return (
+        os.environ.get("AUTOPUB_UPLOAD_USERNAME"),
+        os.environ.get("AUTOPUB_UPLOAD_PASSWORD"),
+    )
@@ -0,0 +1,278 @@
+"""Check the built distributions before anything is uploaded.
+
+Indexes reject files with invalid metadata or a description they can't
+render, but only once the upload started. The metadata is read from the
+archives directly (the wheel's central directory, or the start of the sdist)
+and wheels are checked against their RECORD, with every distribution checked
+in its own process.
+"""
+
+from __future__ import annotations
+
+import base64
+import csv
+import hashlib
+import io
+import os
+import re
+import tarfile
+import zipfile
+from collections.abc import Sequence
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+from pydantic import BaseModel, Field
+
+from autopub.distributions import Distribution
+from autopub.exceptions import InvalidDistribution
+from autopub.index import parse_filename
+from autopub.lockfiles import normalize_name
+
+SUPPORTED_METADATA_VERSIONS = ("1.0", "1.1", "1.2", "2.1", "2.2", "2.3", "2.4")
+
+METADATA_VERSION_PATTERN = re.compile(r"^(?P<major>[0-9]+)\.(?P<minor>[0-9]+)$")
+
+DESCRIPTION_CONTENT_TYPES = ("text/plain", "text/x-rst", "text/markdown")
+
+NAME_PATTERN = re.compile(r"^([A-Z0-9]|[A-Z0-9][A-Z0-9._-]*[A-Z0-9])$", re.IGNORECASE)
+
+# from PEP 440, appendix B
+VERSION_PATTERN = re.compile(
+    r"""
+    ^v?
+    (?:(?P<epoch>[0-9]+)!)?
+    (?P<release>[0-9]+(?:\.[0-9]+)*)
+    (?P<pre>[-_\.]?(alpha|a|beta|b|preview|pre|c|rc)[-_\.]?[0-9]*)?
+    (?P<post>(?:-[0-9]+)|(?:[-_\.]?(post|rev|r)[-_\.]?[0-9]*))?
+    (?P<dev>[-_\.]?dev[-_\.]?[0-9]*)?
+    (?:\+(?P<local>[a-z0-9]+(?:[-_\.][a-z0-9]+)*))?
+    $
+    """,
+    re.VERBOSE | re.IGNORECASE,
+)
+
+# files a wheel can't list with their own hash
+RECORD_EXEMPT_SUFFIXES = ("/RECORD", "/RECORD.jws", "/RECORD.p7s")
+
+
+class ValidationConfig(BaseModel):
+    """Distribution validation configuration, from `[tool.autopub]`."""
+
+    validate_distributions: bool = Field(
+        default=True,
+        description="Check the built distributions before publishing them",
+        validation_alias="validate-distributions",
+    )
+
+
+def _is_newer_minor_metadata_version(metadata_version: str) -> bool:
+    """Whether the version is a newer minor version of the latest major one.
+
+    Minor versions of the core metadata only add fields, so tools are
+    expected to warn about them rather than fail.
+    """
+    match = METADATA_VERSION_PATTERN.match(metadata_version)
+    major, minor = SUPPORTED_METADATA_VERSIONS[-1].split(".")
+
+    return (
+        match is not None
+        and match["major"] == major
+        and int(match["minor"]) > int(minor)
+    )
+
+
+def check_metadata(distribution: Distribution) -> list[str]:
+    metadata = distribution.metadata
+    errors: list[str] = []
+
+    for field in ("Metadata-Version", "Name", "Version"):
+        if not metadata.get(field):
+            errors.append(f"{field} is missing")
+
+    if errors:
+        return errors
+
+    metadata_version = metadata["Metadata-Version"]
+
+    if metadata_version not in SUPPORTED_METADATA_VERSIONS:
+        if _is_newer_minor_metadata_version(metadata_version):
+            print(
+                f"⚠️  {distribution.path.name} uses Metadata-Version "
+                f"{metadata_version}, which is newer than the versions known "
+                "to autopub",
+                flush=True,
+            )
+        else:
+            errors.append(f"Metadata-Version {metadata_version} is unknown")
+
+    if not NAME_PATTERN.match(distribution.name):
+        errors.append(f"Name {distribution.name!r} is invalid")
+
+    if not VERSION_PATTERN.match(distribution.version):
+        errors.append(f"Version {distribution.version!r} is invalid")
+
+    if "\n" in distribution.metadata.get("Summary", "").strip():
+        errors.append("Summary must be a single line")
+
+    parsed = parse_filename(distribution.path.name)
+
+    if parsed is not None and parsed[0] != normalize_name(distribution.name):
+        errors.append(f"the file name doesn't match the name {distribution.name}")
+
+    # file names can use a normalized form of the version
+    if parsed is not None and normalize_name(parsed[1]) != normalize_name(
+        distribution.version
+    ):
+        errors.append(f"the file name doesn't match the version {distribution.version}")
+
+    return errors
+
+
+def check_description(distribution: Distribution) -> list[str]:
+    """Check that the index will be able to render the description.
+
+    reStructuredText (the default) is only rendered when the optional
+    `readme-renderer` package, which indexes use, is installed.
+    """
+    content_type = distribution.metadata.get("Description-Content-Type", "text/x-rst")
+    media_type = content_type.split(";")[0].strip().lower()
+
+    if media_type not in DESCRIPTION_CONTENT_TYPES:
+        return [f"Description-Content-Type {content_type} is not supported"]
+
+    if media_type != "text/x-rst" or not distribution.description.strip():
+        return []
+
+    try:
+        import readme_renderer.rst
+    except ImportError:
+        return []
+
+    stream = io.StringIO()
+
+    if readme_renderer.rst.render(distribution.description, stream=stream) is None:
+        details = stream.getvalue().strip()
+
+        return [f"the description can't be rendered: {details}"]
+
+    return []
+
+
+def _record_digest(
+    wheel: zipfile.ZipFile, name: str, algorithm: str
+) -> tuple[str, int]:
+    """Hash a file of the wheel as RECORD does, returning the digest and
+    the size of the file."""
+    digest = hashlib.new(algorithm)
+    size = 0
+
+    with wheel.open(name) as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+            size += len(chunk)
+
+    return base64.urlsafe_b64encode(digest.digest()).rstrip(b"=").decode(), size
+
+
+def check_record(path: Path) -> list[str]:
+    """Check the files of a wheel against the hashes and sizes in RECORD."""
+    errors: list[str] = []
+
+    with zipfile.ZipFile(path) as wheel:
+        names = [name for name in wheel.namelist() if not name.endswith("/")]
+        records = [
+            name
+            for name in names
+            if name.count("/") == 1 and name.endswith(".dist-info/RECORD")
+        ]
+
+        if len(records) != 1:
+            return ["RECORD not found"]
+
+        rows = csv.reader(io.StringIO(wheel.read(records[0]).decode("utf-8")))
+        recorded = {row[0]: row for row in rows if row}
+
+        for name in names:
+            if name.endswith(RECORD_EXEMPT_SUFFIXES):
+                continue
+
+            if name not in recorded:
+                errors.append(f"{name} is not in RECORD")
+                continue
+
+            _, hash_value, size = (recorded[name] + ["", ""])[:3]
+
+            if not hash_value:
+                errors.append(f"{name} has no hash in RECORD")
+                continue
+
+            algorithm, _, expected = hash_value.partition("=")
+
+            if algorithm not in ("sha256", "sha384", "sha512"):
+                errors.append(f"{name} uses an unsupported hash {algorithm}")
+                continue
+
+            actual, actual_size = _record_digest(wheel, name, algorithm)
+
+            if actual != expected:
+                errors.append(f"{name} doesn't match its hash in RECORD")
+            elif size.isdigit() and int(size) != actual_size:
+                errors.append(f"{name} doesn't match its size in RECORD")
+
+        for name in recorded:
+            if name not in names:
+                errors.append(f"{name} is in RECORD but not in the wheel")
+
+    return errors
+
+
+def validate_distribution(path: str) -> list[str]:
+    """Return the problems of a distribution, in a worker process."""
+    try:
+        distribution = Distribution.from_path(Path(path))
+    except InvalidDistribution as e:
+        return [e.reason]
+    except (OSError, EOFError, tarfile.TarError, zipfile.BadZipFile) as e:
+        return [f"can't be read: {e}"]
+
+    errors = check_metadata(distribution)
+    errors += check_description(distribution)
+
+    if distribution.filetype == "bdist_wheel":
+        errors += check_record(distribution.path)
+
+    return errors
+
+
+def validate_distributions(
+    paths: Sequence[Path], max_workers: int | None = None
+) -> dict[str, list[str]]:
+    """Validate the distributions in parallel, returning the errors by file name.
+
+    The checks stop at the first invalid distribution.
+    """
+    if len(paths) <= 1:
+        results = {path.name: validate_distribution(str(path)) for path in paths}
+
+        return {name: errors for name, errors in results.items() if errors}
+
+    max_workers = min(len(paths), max_workers or os.cpu_count() or 1)
+    errors: dict[str, list[str]] = {}
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(validate_distribution, str(path)): path for path in paths
+        }
+        pending = set(futures)
+
+        while pending and not errors:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                if result := future.result():
+                    errors[futures[future].name] = result
+
+        for future in pending:
+            future.cancel()
+
+    return errors
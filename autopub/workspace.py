@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any
+
+from autopub import Autopub
+from autopub.discovery import PackageIndex, PackageInfo
+from autopub.exceptions import AutopubException, WorkspaceCommandFailed
+from autopub.plugin_loader import load_plugins
+from autopub.plugins import AutopubPlugin
+from autopub.plugins.bump_version import BumpVersionPlugin
+from autopub.plugins.git import GitPlugin
+from autopub.plugins.github import GithubPlugin
+from autopub.types import ReleaseInfo
+
+# plugins loaded for every package, git is left out as the workspace creates a
+# single commit for all the packages once they have been published
+DEFAULT_PACKAGE_PLUGINS = ["update_changelog", "bump_version"]
+
+# uploads are mostly waiting on the network, but indexes don't like too many
+# concurrent uploads from the same client
+DEFAULT_MAX_PARALLEL_PUBLISHES = 4
+
+# plugins working on the whole repository, they run once for all the packages
+WORKSPACE_PLUGINS = (GitPlugin, GithubPlugin)
+
+
+def _run_package_command(
+    root: str,
+    package: PackageInfo,
+    command: str,
+    plugins: list[str],
+    kwargs: dict[str, Any],
+) -> tuple[dict[str, Any] | None, str | None]:
+    """Run an Autopub command for a single package, in a worker process.
+
+    The package directory is the root of its Autopub instance, so plugins
+    resolve their files exactly as when `autopub` is run from there.
+    Errors are returned as messages, as exceptions can't always be pickled,
+    and so that an unexpected error in one package doesn't stop the others.
+    """
+    try:
+        autopub = Autopub(root=Path(root) / package.path)
+        autopub.load_plugins(plugins)
+        # they run once for the whole workspace, see `Workspace.publish`
+        autopub.plugins = [
+            plugin
+            for plugin in autopub.plugins
+            if not isinstance(plugin, WORKSPACE_PLUGINS)
+        ]
+
+        for plugin in autopub.plugins:
+            # the layout of the package is already known from the index
+            if isinstance(plugin, BumpVersionPlugin):
+                plugin.package = package
+        autopub.validate_config()
+
+        if command == "publish":
+            # the release file is deleted once published, so the release info
+            # has to be read before
+            release_info = autopub.release_info
+            autopub.publish(**kwargs)
+        else:
+            getattr(autopub, command)(**kwargs)
+            release_info = autopub.release_info
+    except AutopubException as e:
+        return None, str(e)
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+    return release_info.dict(), None
+
+
+class Workspace:
+    """Release all the packages of a monorepo from a single invocation.
+
+    Every package (a directory with a `pyproject.toml`) that contains a
+    release file is released. Each command runs for all the packages in
+    parallel, in a pool of worker processes, and the git plugin only runs
+    once at the end, creating a single commit for all the releases and
+    pushing all the tags at once. When the github plugin is enabled for the
+    workspace, a GitHub release is then created for each of the tags.
+    """
+
+    def __init__(
+        self,
+        root: Path | None = None,
+        plugins: list[str] | None = None,
+        max_workers: int | None = None,
+    ) -> None:
+        self.root = root or Path.cwd()
+        self.plugins = plugins or DEFAULT_PACKAGE_PLUGINS
+        self.max_workers = max_workers
+
+    @property
+    def packages(self) -> list[PackageInfo]:
+        """The packages that have a release file."""
+        return [
+            package
+            for package in PackageIndex(self.root).packages
+            if (self.root / package.path / Autopub.RELEASE_FILE_PATH).exists()
+        ]
+
+    def tag_name(self, package: PackageInfo, release_info: ReleaseInfo) -> str:
+        name = package.name or (self.root / package.path).name
+
+        return f"{name}-{release_info.version}"
+
+    def _workspace_plugins(self) -> list[type[AutopubPlugin]]:
+        """The plugins run once for all the packages: git, and github when
+        it is one of the workspace plugins or is enabled in the root
+        `pyproject.toml`."""
+        names = [*self.plugins, *Autopub(root=self.root).config.get("plugins", [])]
+        github = [
+            plugin
+            for plugin in load_plugins(names, root=self.root)
+            if issubclass(plugin, GithubPlugin)
+        ]
+
+        return [GitPlugin, *github[:1]]
+
+    def _run(
+        self,
+        command: str,
+        max_workers: int | None = None,
+        **kwargs: Any,
+    ) -> tuple[dict[str, ReleaseInfo], dict[str, str]]:
+        """Run a command for every package, returning the release info of
+        the packages where it succeeded and the errors of the others."""
+        packages = self.packages
+        releases: dict[str, ReleaseInfo] = {}
+        errors: dict[str, str] = {}
+
+        if not packages:
+            return releases, errors
+
+        with ProcessPoolExecutor(
+            max_workers=max_workers or self.max_workers
+        ) as executor:
+            futures = {
+                executor.submit(
+                    _run_package_command,
+                    str(self.root),
+                    package,
+                    command,
+                    self.plugins,
+                    kwargs,
+                ): package.path
+                for package in packages
+            }
+
+            for future in as_completed(futures):
+                try:
+                    release_info, error = future.result()
+                except Exception as e:
+                    # the worker itself failed, e.g. it was killed
+                    release_info, error = None, f"{type(e).__name__}: {e}"
+
+                if error is not None:
+                    errors[futures[future]] = error
+                else:
+                    assert release_info is not None
+                    releases[futures[future]] = ReleaseInfo.from_dict(release_info)
+
+        # keep the order of the packages, not the order they completed in
+        releases = {
+            package.path: releases[package.path]
+            for package in packages
+            if package.path in releases
+        }
+
+        return releases, errors
+
+    def check(self) -> dict[str, ReleaseInfo]:
+        releases, errors = self._run("check")
+
+        if errors:
+            raise WorkspaceCommandFailed(errors)
+
+        return releases
+
+    def prepare(self) -> dict[str, ReleaseInfo]:
+        releases, errors = self._run("prepare")
+
+        if errors:
+            raise WorkspaceCommandFailed(errors)
+
+        return releases
+
+    def build(self) -> dict[str, ReleaseInfo]:
+        releases, errors = self._run("build")
+
+        if errors:
+            raise WorkspaceCommandFailed(errors)
+
+        return releases
+
+    def publish(
+        self,
+        repository: str | Sequence[str] | None = None,
+        max_parallel: int = DEFAULT_MAX_PARALLEL_PUBLISHES,
+    ) -> dict[str, ReleaseInfo]:
+        """Publish every package, then commit and tag all the releases.
+
+        Packages that were published are committed and tagged even when
+        others failed, so that the repository matches what is on the index.
+        """
+        packages = {package.path: package for package in self.packages}
+
+        releases, errors = self._run(
+            "publish", max_workers=max_parallel, repository=repository
+        )
+
+        if releases:
+            tag_names = {
+                path: self.tag_name(packages[path], release_info)
+                for path, release_info in releases.items()
+            }
+
+            autopub = Autopub(plugins=self._workspace_plugins(), root=self.root)
+            autopub.validate_config()
+            git, *others = autopub.plugins
+            assert isinstance(git, GitPlugin)
+            github = [plugin for plugin in others if isinstance(plugin, GithubPlugin)]
+
+            for plugin in github:
+                plugin.pre_publish_workspace(releases, tag_names)
+
+            git.post_publish_workspace(releases, tag_names)
+
+            # the releases need the tags, which have just been pushed
+            for plugin in github:
+                plugin.post_publish_workspace(releases, tag_names)
+
+        if errors:
+            raise WorkspaceCommandFailed(errors)
+
+        return releases
@@ -1,5 +1,10 @@
+import base64
+import hashlib
+import io
 import json
 import shutil
+import tarfile
+import zipfile
 from collections.abc import Generator
 from pathlib import Path
 from typing import Any
@@ -42,6 +47,17 @@ def deprecated_release_text() -> str:
     return DEPRECATED_RELEASE_TEXT.strip()
 
 
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path_factory: pytest.TempPathFactory, monkeypatch: Any) -> Path:
+    """Keep the caches written by the tests (like the build cache) out of the
+    user's home directory."""
+    cache_home = tmp_path_factory.mktemp("cache")
+
+    monkeypatch.setenv("XDG_CACHE_HOME", str(cache_home))
+
+    return cache_home
+
+
 @pytest.fixture(scope="function")
 def temporary_working_directory(tmpdir: Any) -> Generator[Path, None, None]:
     with tmpdir.as_cwd():
@@ -79,6 +95,17 @@ def example_project_uv(
     yield temporary_working_directory
 
 
+@pytest.fixture
+def example_project_pep517(
+    temporary_working_directory: Path,
+) -> Generator[Path, None, None]:
+    project_path = Path(__file__).parent / "fixtures/example-project-pep517"
+
+    shutil.copytree(project_path, temporary_working_directory, dirs_exist_ok=True)
+
+    yield temporary_working_directory
+
+
 @pytest.fixture
 def with_valid_artifact(temporary_working_directory: Path) -> Path:
     release_file = temporary_working_directory / "RELEASE.md"
@@ -99,3 +126,73 @@ def with_valid_artifact(temporary_working_directory: Path) -> Path:
     release_info.write_text(json.dumps(data))
 
     return release_info
+
+
+EXAMPLE_METADATA = """\
+Metadata-Version: 2.1
+Name: example
+Version: 1.0.0
+Summary: An example package
+Classifier: Programming Language :: Python :: 3
+Classifier: License :: OSI Approved :: MIT License
+Requires-Dist: rich
+Description-Content-Type: text/markdown
+
+# Example
+
+This is an example.
+"""
+
+
+def make_wheel(directory: Path, metadata: str = EXAMPLE_METADATA) -> Path:
+    path = directory / "example-1.0.0-py3-none-any.whl"
+    files = {
+        "example/__init__.py": b"__version__ = '1.0.0'\n",
+        "example-1.0.0.dist-info/METADATA": metadata.encode(),
+    }
+    record = "".join(
+        f"{name},sha256={_record_hash(data)},{len(data)}\n"
+        for name, data in files.items()
+    )
+
+    with zipfile.ZipFile(path, "w") as wheel:
+        for name, data in files.items():
+            wheel.writestr(name, data)
+
+        wheel.writestr(
+            "example-1.0.0.dist-info/RECORD",
+            record + "example-1.0.0.dist-info/RECORD,,\n",
+        )
+
+    return path
+
+
+def _record_hash(data: bytes) -> str:
+    digest = hashlib.sha256(data).digest()
+
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+def make_sdist(directory: Path, metadata: str = EXAMPLE_METADATA) -> Path:
+    path = directory / "example-1.0.0.tar.gz"
+
+    with tarfile.open(path, "w:gz") as sdist:
+        for name, content in [
+            ("example-1.0.0/PKG-INFO", metadata),
+            ("example-1.0.0/example/__init__.py", ""),
+        ]:
+            data = content.encode()
+            member = tarfile.TarInfo(name)
+            member.size = len(data)
+            sdist.addfile(member, io.BytesIO(data))
+
+    return path
+
+
+@pytest.fixture
+def distributions(temporary_working_directory: Path) -> list[Path]:
+    """A source distribution and a wheel, in `dist`."""
+    dist = temporary_working_directory / "dist"
+    dist.mkdir()
+
+    return [make_sdist(dist), make_wheel(dist)]
@@ -0,0 +1,75 @@
+"""A minimal in-tree PEP 517 backend, for the tests of the pep517 plugin."""
+
+import base64
+import hashlib
+import io
+import re
+import tarfile
+import zipfile
+from pathlib import Path
+
+
+def _metadata():
+    # tomllib is only available from Python 3.11
+    project = dict(
+        re.findall(
+            r'^(name|version|description) = "(.*)"$',
+            Path("pyproject.toml").read_text(),
+            re.M,
+        )
+    )
+    name = project["name"].replace("-", "_")
+    metadata = (
+        "Metadata-Version: 2.1\n"
+        f"Name: {project['name']}\n"
+        f"Version: {project['version']}\n"
+        f"Summary: {project['description']}\n"
+    )
+
+    return name, project["version"], metadata
+
+
+def get_requires_for_build_wheel(config_settings=None):
+    return []
+
+
+def build_sdist(sdist_directory, config_settings=None):
+    name, version, metadata = _metadata()
+    filename = f"{name}-{version}.tar.gz"
+
+    with tarfile.open(Path(sdist_directory) / filename, "w:gz") as sdist:
+        for path, data in [
+            ("PKG-INFO", metadata.encode()),
+            ("pyproject.toml", Path("pyproject.toml").read_bytes()),
+        ]:
+            member = tarfile.TarInfo(f"{name}-{version}/{path}")
+            member.size = len(data)
+            sdist.addfile(member, io.BytesIO(data))
+
+    return filename
+
+
+def build_wheel(wheel_directory, config_settings=None, metadata_directory=None):
+    name, version, metadata = _metadata()
+    filename = f"{name}-{version}-py3-none-any.whl"
+    dist_info = f"{name}-{version}.dist-info"
+
+    files = {
+        f"{name}/__init__.py": Path(name, "__init__.py").read_bytes(),
+        f"{dist_info}/METADATA": metadata.encode(),
+        f"{dist_info}/WHEEL": b"Wheel-Version: 1.0\nRoot-Is-Purelib: true\n",
+    }
+    record = "".join(
+        f"{path},sha256="
+        f"{base64.urlsafe_b64encode(hashlib.sha256(data).digest()).rstrip(b'=').decode()}"
+        f",{len(data)}\n"
+        for path, data in files.items()
+    )
+
+    with zipfile.ZipFile(Path(wheel_directory) / filename, "w") as wheel:
+        for path, data in files.items():
+            wheel.writestr(path, data)
+
+        wheel.writestr(f"{dist_info}/RECORD", record + f"{dist_info}/RECORD,,\n")
+
+    return filename
@@ -1,5 +1,11 @@
+import os
 from pathlib import Path
 
+import pytest
+from pydantic import ValidationError
+from pytest_mock import MockerFixture
+
+from autopub.discovery import PackageInfo
 from autopub.plugins.bump_version import BumpVersionPlugin
 from autopub.types import ReleaseInfo
 
@@ -49,6 +55,47 @@ def test_bumps_version_in_init_py(example_project_pdm: Path):
     plugin.post_prepare(info)
 
     assert '__version__ = "0.1.1"' in init_file.read_text()
+    assert info.changed_files == ["pyproject.toml", "src/__init__.py"]
+
+
+def test_finds_init_py_without_walking_the_project(
+    example_project_pdm: Path, mocker: MockerFixture
+):
+    scandir = mocker.spy(os, "scandir")
+
+    plugin = BumpVersionPlugin()
+
+    assert plugin._find_package_init("example-project-pdm") == Path("src/__init__.py")
+    scandir.assert_not_called()
+
+
+def test_bumps_the_version_files_of_the_workspace_package(tmp_path: Path):
+    package_dir = tmp_path / "packages" / "a" / "lib" / "a"
+    package_dir.mkdir(parents=True)
+    (package_dir.parent.parent / "pyproject.toml").write_text(
+        '[project]\nname = "a"\nversion = "0.1.0"\n'
+    )
+
+    for name in ("__init__.py", "_version.py"):
+        (package_dir / name).write_text('__version__ = "0.1.0"\n')
+
+    plugin = BumpVersionPlugin()
+    plugin.root = tmp_path / "packages" / "a"
+    plugin.package = PackageInfo(
+        path="packages/a",
+        pyproject="packages/a/pyproject.toml",
+        name="a",
+        package_dir="packages/a/lib/a",
+        version_files=["packages/a/lib/a/__init__.py", "packages/a/lib/a/_version.py"],
+    )
+
+    assert plugin._update_package_versions("0.2.0") == [
+        Path("lib/a/__init__.py"),
+        Path("lib/a/_version.py"),
+    ]
+
+    for name in ("__init__.py", "_version.py"):
+        assert (package_dir / name).read_text() == '__version__ = "0.2.0"\n'
 
 
 def test_bumps_version_in_init_py_poetry(example_project: Path):
@@ -107,3 +154,111 @@ def test_handles_init_without_version_gracefully(example_project_pdm: Path):
     # __init__.py should remain unchanged
     assert "# This is a package" in init_file.read_text()
     assert "__version__" not in init_file.read_text()
+
+
+def test_bumps_pre_release_version_in_init_py(example_project_pdm: Path):
+    init_file = example_project_pdm / "src" / "__init__.py"
+    init_file.write_text('__version__ = "0.1.0-alpha.58"\n')
+
+    info = ReleaseInfo(release_type="patch", release_notes="", version="0.1.1")
+
+    plugin = BumpVersionPlugin()
+    plugin.post_prepare(info)
+
+    assert init_file.read_text() == '__version__ = "0.1.1"\n'
+
+
+def test_bumps_version_in_configured_files(
+    example_project_pdm: Path, capsys: pytest.CaptureFixture[str]
+):
+    docs = example_project_pdm / "docs"
+    docs.mkdir()
+    (docs / "conf.py").write_text('project = "example"\nrelease = "0.1.0"\n')
+    (example_project_pdm / "README.md").write_text(
+        "![version](https://img.shields.io/badge/version-0.1.0-blue)\r\n"
+        "![other](https://img.shields.io/badge/version-0.1.0-green)\r\n"
+    )
+    (example_project_pdm / "chart.yaml").write_text("appVersion: 0.1.0\n")
+
+    plugin = BumpVersionPlugin()
+    plugin.validate_config(
+        {
+            "plugin_config": {
+                "bump_version": {
+                    "version-files": [
+                        {
+                            "path": "docs/conf.py",
+                            "pattern": 'release = "(?P<version>[^"]+)"',
+                        },
+                        {
+                            "path": "README.md",
+                            "pattern": r"badge/version-(?P<version>[\w.]+)-",
+                        },
+                        {
+                            "path": "chart.yaml",
+                            "pattern": r"appVersion: (?P<version>\S+)",
+                        },
+                        {
+                            "path": "chart.yaml",
+                            "pattern": r"^version: (?P<version>\S+)",
+                        },
+                    ]
+                }
+            }
+        }
+    )
+
+    info = ReleaseInfo(release_type="minor", release_notes="")
+    plugin.post_check(info)
+    plugin.post_prepare(info)
+
+    assert (docs / "conf.py").read_text() == 'project = "example"\nrelease = "0.2.0"\n'
+    assert (example_project_pdm / "README.md").read_bytes() == (
+        b"![version](https://img.shields.io/badge/version-0.2.0-blue)\r\n"
+        b"![other](https://img.shields.io/badge/version-0.2.0-green)\r\n"
+    )
+    assert (example_project_pdm / "chart.yaml").read_text() == "appVersion: 0.2.0\n"
+
+    assert info.changed_files == [
+        "pyproject.toml",
+        "src/__init__.py",
+        "docs/conf.py",
+        "README.md",
+        "chart.yaml",
+    ]
+
+    output = capsys.readouterr().out
+
+    assert "matched 2 times in README.md" in output
+    assert "'^version: (?P<version>\\\\S+)' matched 0 times in chart.yaml" in output
+
+
+def test_accepts_version_file_paths(example_project_pdm: Path):
+    version_file = example_project_pdm / "src" / "_version.py"
+    version_file.write_text("__version__ = '0.1.0'\n")
+
+    plugin = BumpVersionPlugin()
+    plugin.validate_config(
+        {"plugin_config": {"bump_version": {"version-files": ["src/_version.py"]}}}
+    )
+
+    info = ReleaseInfo(release_type="major", release_notes="", version="1.0.0")
+    plugin.post_prepare(info)
+
+    assert version_file.read_text() == "__version__ = '1.0.0'\n"
+
+
+@pytest.mark.parametrize("pattern", [r"^version: (\S+)", r"^version: (?P<version>\S+"])
+def test_rejects_invalid_version_patterns(example_project_pdm: Path, pattern: str):
+    plugin = BumpVersionPlugin()
+
+    with pytest.raises(ValidationError):
+        plugin.validate_config(
+            {
+                "plugin_config": {
+                    "bump_version": {
+                        "version-files": [{"path": "chart.yaml", "pattern": pattern}]
+                    }
+                }
+            }
+        )
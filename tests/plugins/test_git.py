@@ -1,5 +1,10 @@
+import subprocess
+from pathlib import Path
+
+import pytest
 from pytest_mock import MockerFixture
 
+from autopub.exceptions import CommandFailed
 from autopub.plugins.git import GitConfig, GitPlugin
 from autopub.types import ReleaseInfo
 
@@ -19,20 +24,24 @@ def test_post_publish(mocker: MockerFixture) -> None:
 
     git_plugin.post_publish(release_info)
 
-    mock_run_command.assert_any_call(
-        ["git", "config", "--global", "user.email", "autopub@autopub"]
-    )
-    mock_run_command.assert_any_call(
-        ["git", "config", "--global", "user.name", "autopub"]
-    )
-    mock_run_command.assert_any_call(["git", "tag", "v1.0.0"])
-    mock_run_command.assert_any_call(["git", "rm", "RELEASE.md"])
-    mock_run_command.assert_any_call(["git", "add", "--all", "--", ":!.autopub"])
-    mock_run_command.assert_any_call(
-        ["git", "commit", "-m", "🤖 Release v1.0.0\n\n\n\n[skip ci]\n"]
-    )
-    mock_run_command.assert_any_call(["git", "push"])
-    mock_run_command.assert_any_call(["git", "push", "origin", "v1.0.0"])
+    assert mock_run_command.call_args_list == [
+        mocker.call(["git", "rm", "--ignore-unmatch", "RELEASE.md"]),
+        mocker.call(["git", "add", "--all", "--", ":!.autopub"]),
+        mocker.call(
+            [
+                "git",
+                "-c",
+                "user.name=autopub",
+                "-c",
+                "user.email=autopub@autopub",
+                "commit",
+                "-m",
+                "🤖 Release v1.0.0\n\n\n\n[skip ci]\n",
+            ]
+        ),
+        mocker.call(["git", "tag", "v1.0.0"]),
+        mocker.call(["git", "push", "--atomic", "origin", "HEAD", "v1.0.0"]),
+    ]
 
 
 def test_post_publish_with_config(mocker: MockerFixture) -> None:
@@ -58,10 +67,16 @@ def test_post_publish_with_config(mocker: MockerFixture) -> None:
     git_plugin.post_publish(release_info)
 
     mock_run_command.assert_any_call(
-        ["git", "config", "--global", "user.email", "bot@example.com"]
-    )
-    mock_run_command.assert_any_call(
-        ["git", "config", "--global", "user.name", "release-bot"]
+        [
+            "git",
+            "-c",
+            "user.name=release-bot",
+            "-c",
+            "user.email=bot@example.com",
+            "commit",
+            "-m",
+            "🤖 Release v1.1.0\n\ntest release\n\n[skip ci]\n",
+        ]
     )
 
 
@@ -93,12 +108,95 @@ def test_post_publish_with_env_vars(mocker: MockerFixture) -> None:
 
     # Environment variables should take precedence
     mock_run_command.assert_any_call(
-        ["git", "config", "--global", "user.email", "env@example.com"]
+        [
+            "git",
+            "-c",
+            "user.name=env-user",
+            "-c",
+            "user.email=env@example.com",
+            "commit",
+            "-m",
+            "🤖 Release v1.0.1\n\ntest release\n\n[skip ci]\n",
+        ]
     )
-    mock_run_command.assert_any_call(
-        ["git", "config", "--global", "user.name", "env-user"]
+
+
+def test_post_publish_never_touches_global_config(mocker: MockerFixture) -> None:
+    git_plugin = GitPlugin()
+
+    mock_run_command = mocker.patch.object(git_plugin, "run_command")
+
+    release_info = ReleaseInfo(
+        release_notes="",
+        release_type="patch",
+        version="v1.0.1",
+        previous_version="v1.0.0",
     )
 
+    git_plugin.post_publish(release_info)
+
+    for call in mock_run_command.call_args_list:
+        assert "config" not in call.args[0]
+
+
+def test_post_publish_with_plumbing(mocker: MockerFixture) -> None:
+    git_plugin = GitPlugin()
+    git_plugin.validate_config({"plugin_config": {"git": {"plumbing-commit": True}}})
+
+    outputs = {
+        "ls-files": "CHANGELOG.md\npyproject.toml\nRELEASE.md\nRELEASE.md",
+        "write-tree": "tree-sha",
+        "commit-tree": "commit-sha",
+    }
+
+    def run_command(command: list[str], capture_output: bool = False) -> str:
+        return next((value for key, value in outputs.items() if key in command), "")
+
+    mock_run_command = mocker.patch.object(
+        git_plugin, "run_command", side_effect=run_command
+    )
+
+    release_info = ReleaseInfo(
+        release_notes="",
+        release_type="major",
+        version="v1.0.0",
+        previous_version="v0.0.0",
+    )
+
+    git_plugin.post_publish(release_info)
+
+    commands = [call.args[0] for call in mock_run_command.call_args_list]
+
+    assert commands[1:] == [
+        ["git", "update-index", "--force-remove", "--", "RELEASE.md"],
+        [
+            "git",
+            "update-index",
+            "--add",
+            "--remove",
+            "--",
+            "CHANGELOG.md",
+            "pyproject.toml",
+        ],
+        ["git", "write-tree"],
+        [
+            "git",
+            "-c",
+            "user.name=autopub",
+            "-c",
+            "user.email=autopub@autopub",
+            "commit-tree",
+            "tree-sha",
+            "-p",
+            "HEAD",
+            "-m",
+            "🤖 Release v1.0.0\n\n\n\n[skip ci]\n",
+        ],
+        ["git", "update-ref", "HEAD", "commit-sha"],
+        ["git", "tag", "v1.0.0"],
+        ["git", "push", "--atomic", "origin", "HEAD", "v1.0.0"],
+    ]
+
 
 def test_git_config_validation() -> None:
     """Test GitConfig validation with both hyphenated and underscored keys."""
@@ -111,3 +209,304 @@ def test_git_config_validation() -> None:
     config = GitConfig()
     assert config.git_username == "autopub"
     assert config.git_email == "autopub@autopub"
+
+
+def test_post_publish_stages_reported_files(mocker: MockerFixture) -> None:
+    git_plugin = GitPlugin()
+
+    mock_run_command = mocker.patch.object(git_plugin, "run_command")
+
+    release_info = ReleaseInfo(
+        release_notes="",
+        release_type="patch",
+        version="1.0.1",
+        previous_version="1.0.0",
+    )
+    release_info.add_changed_file("pyproject.toml")
+    release_info.add_changed_file("CHANGELOG.md")
+    release_info.add_changed_file("pyproject.toml")
+
+    git_plugin.post_publish(release_info)
+
+    mock_run_command.assert_any_call(
+        ["git", "add", "--", "pyproject.toml", "CHANGELOG.md"]
+    )
+
+    for call in mock_run_command.call_args_list:
+        assert "--all" not in call.args[0]
+
+
+def test_post_publish_stage_all(mocker: MockerFixture) -> None:
+    git_plugin = GitPlugin()
+    git_plugin.validate_config({"plugin_config": {"git": {"stage-all": True}}})
+
+    mock_run_command = mocker.patch.object(git_plugin, "run_command")
+
+    release_info = ReleaseInfo(
+        release_notes="",
+        release_type="patch",
+        version="1.0.1",
+        previous_version="1.0.0",
+        changed_files=["pyproject.toml"],
+    )
+
+    git_plugin.post_publish(release_info)
+
+    mock_run_command.assert_any_call(["git", "add", "--all", "--", ":!.autopub"])
+
+
+def test_post_publish_retries_rejected_push(mocker: MockerFixture) -> None:
+    git_plugin = GitPlugin()
+    git_info = mocker.patch.object(git_plugin, "git_info")
+    git_info.current_branch = "main"
+
+    sleep = mocker.patch("autopub.plugins.git.time.sleep")
+
+    pushes = 0
+
+    def run_command(command: list[str], capture_output: bool = False) -> str:
+        nonlocal pushes
+
+        if "push" in command:
+            pushes += 1
+
+            if pushes == 1:
+                raise CommandFailed(
+                    command=command,
+                    returncode=1,
+                    output=" ! [rejected]        HEAD -> main (fetch first)\n",
+                )
+
+        if "rev-parse" in command:
+            return "release-sha"
+
+        return ""
+
+    mock_run_command = mocker.patch.object(
+        git_plugin, "run_command", side_effect=run_command
+    )
+
+    release_info = ReleaseInfo(
+        release_notes="",
+        release_type="patch",
+        version="1.0.1",
+        previous_version="1.0.0",
+    )
+
+    git_plugin.post_publish(release_info)
+
+    commands = [call.args[0] for call in mock_run_command.call_args_list]
+
+    assert pushes == 2
+    sleep.assert_called_once_with(1.0)
+
+    git_info.fetch.assert_called_once_with("main")
+    assert [
+        "git",
+        "-c",
+        "user.name=autopub",
+        "-c",
+        "user.email=autopub@autopub",
+        "rebase",
+        "--autostash",
+        "--onto",
+        "FETCH_HEAD",
+        "HEAD~1",
+    ] in commands
+    assert ["git", "tag", "--force", "1.0.1", "HEAD"] in commands
+    assert commands[-1] == ["git", "push", "--atomic", "origin", "HEAD", "1.0.1"]
+
+
+def test_post_publish_gives_up_after_retries(mocker: MockerFixture) -> None:
+    git_plugin = GitPlugin()
+    git_plugin.validate_config(
+        {"plugin_config": {"git": {"push-retries": 2, "push-retry-delay": 0.5}}}
+    )
+
+    mocker.patch.object(git_plugin, "git_info")
+    sleep = mocker.patch("autopub.plugins.git.time.sleep")
+
+    def run_command(command: list[str], capture_output: bool = False) -> str:
+        if "push" in command:
+            raise CommandFailed(
+                command=command,
+                returncode=1,
+                output=" ! [rejected]        HEAD -> main (non-fast-forward)\n",
+            )
+
+        return "sha"
+
+    mocker.patch.object(git_plugin, "run_command", side_effect=run_command)
+
+    release_info = ReleaseInfo(
+        release_notes="",
+        release_type="patch",
+        version="1.0.1",
+        previous_version="1.0.0",
+    )
+
+    with pytest.raises(CommandFailed):
+        git_plugin.post_publish(release_info)
+
+    assert [call.args[0] for call in sleep.call_args_list] == [0.5, 1.0]
+
+
+def test_post_publish_does_not_retry_other_push_errors(
+    mocker: MockerFixture,
+) -> None:
+    git_plugin = GitPlugin()
+    git_info = mocker.patch.object(git_plugin, "git_info")
+    sleep = mocker.patch("autopub.plugins.git.time.sleep")
+
+    def run_command(command: list[str], capture_output: bool = False) -> str:
+        if "push" in command:
+            raise CommandFailed(
+                command=command,
+                returncode=128,
+                output="remote: Permission to example/repo.git denied to bot.\n",
+            )
+
+        return ""
+
+    mock_run_command = mocker.patch.object(
+        git_plugin, "run_command", side_effect=run_command
+    )
+
+    release_info = ReleaseInfo(
+        release_notes="",
+        release_type="patch",
+        version="1.0.1",
+        previous_version="1.0.0",
+    )
+
+    with pytest.raises(CommandFailed):
+        git_plugin.post_publish(release_info)
+
+    commands = [call.args[0] for call in mock_run_command.call_args_list]
+
+    sleep.assert_not_called()
+    git_info.fetch.assert_not_called()
+    assert sum("push" in command for command in commands) == 1
+
+
+def git(cwd: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", *args], cwd=cwd, check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+
+def test_rebase_keeps_modified_files_outside_the_release(
+    temporary_working_directory: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    for variable in ("GIT_AUTHOR", "GIT_COMMITTER"):
+        monkeypatch.setenv(f"{variable}_NAME", "autopub")
+        monkeypatch.setenv(f"{variable}_EMAIL", "autopub@autopub")
+
+    remote = temporary_working_directory / "remote.git"
+    clone = temporary_working_directory / "clone"
+    other = temporary_working_directory / "other"
+
+    git(temporary_working_directory, "init", "--bare", "-b", "main", str(remote))
+    git(temporary_working_directory, "clone", str(remote), str(clone))
+    git(clone, "checkout", "-b", "main")
+
+    for name in ("CHANGELOG.md", "notes.txt"):
+        (clone / name).write_text("initial\n")
+
+    git(clone, "add", ".")
+    git(clone, "commit", "-m", "initial")
+    git(clone, "push", "origin", "main")
+
+    # the remote moves while the release is published
+    git(temporary_working_directory, "clone", str(remote), str(other))
+    (other / "other.txt").write_text("other\n")
+    git(other, "add", "other.txt")
+    git(other, "commit", "-m", "other")
+    git(other, "push", "origin", "main")
+
+    # only the reported files are part of the release commit
+    (clone / "CHANGELOG.md").write_text("release\n")
+    (clone / "notes.txt").write_text("not released\n")
+    git(clone, "add", "CHANGELOG.md")
+    git(clone, "commit", "-m", "release")
+
+    monkeypatch.chdir(clone)
+
+    GitPlugin()._rebase_onto_remote()
+
+    assert git(clone, "log", "--format=%s") == "release\nother\ninitial"
+    assert (clone / "notes.txt").read_text() == "not released\n"
+
+
+def test_rebase_failures_are_not_hidden_by_the_abort(mocker: MockerFixture) -> None:
+    git_plugin = GitPlugin()
+    mocker.patch.object(git_plugin, "git_info")
+
+    def run_command(command: list[str], capture_output: bool = False) -> str:
+        if "rebase" in command:
+            raise CommandFailed(command=command, returncode=1, output="cannot rebase")
+
+        # .git/rebase-merge and .git/rebase-apply don't exist
+        return "missing-rebase-merge\nmissing-rebase-apply"
+
+    mock_run_command = mocker.patch.object(
+        git_plugin, "run_command", side_effect=run_command
+    )
+
+    with pytest.raises(CommandFailed) as e:
+        git_plugin._rebase_onto_remote("1.0.1")
+
+    commands = [call.args[0] for call in mock_run_command.call_args_list]
+
+    assert e.value.output == "cannot rebase"
+    assert ["git", "rebase", "--abort"] not in commands
+
+
+def test_post_publish_invalidates_git_info(mocker: MockerFixture) -> None:
+    git_plugin = GitPlugin()
+
+    mocker.patch.object(git_plugin, "run_command")
+    invalidate = mocker.patch.object(git_plugin.git_info, "invalidate")
+
+    release_info = ReleaseInfo(
+        release_notes="",
+        release_type="patch",
+        version="1.0.1",
+        previous_version="1.0.0",
+    )
+
+    git_plugin.post_publish(release_info)
+
+    invalidate.assert_called()
+
+
+def test_on_release_queued(mocker: MockerFixture) -> None:
+    git_plugin = GitPlugin()
+
+    mock_run_command = mocker.patch.object(git_plugin, "run_command")
+
+    release_info = ReleaseInfo(
+        release_notes="Fix",
+        release_type="patch",
+        changed_files=["release-queue/entry.json"],
+    )
+
+    git_plugin.on_release_queued(release_info)
+
+    assert mock_run_command.call_args_list == [
+        mocker.call(["git", "rm", "--ignore-unmatch", "RELEASE.md"]),
+        mocker.call(["git", "add", "--", "release-queue/entry.json"]),
+        mocker.call(
+            [
+                "git",
+                "-c",
+                "user.name=autopub",
+                "-c",
+                "user.email=autopub@autopub",
+                "commit",
+                "-m",
+                "🤖 Queue patch release\n\nFix\n\n[skip ci]\n",
+            ]
+        ),
+        mocker.call(["git", "push", "--atomic", "origin", "HEAD"]),
+    ]
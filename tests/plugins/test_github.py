@@ -2,6 +2,7 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
+from autopub import manifest
 from autopub.plugins.github import GithubPlugin
 from autopub.types import ReleaseInfo
 
@@ -213,3 +214,161 @@ def test_get_release_message_without_include_release_info(github_plugin):
     # Should return just the release notes, no contributor info
     assert message == "Simple fix"
     assert "@" not in message
+
+
+def test_post_publish_thanks_every_batched_pull_request(github_plugin):
+    pull_requests = {number: MagicMock() for number in (1, 2, 3)}
+
+    for pull_request in pull_requests.values():
+        pull_request.get_issue_comments.return_value = []
+
+    github_plugin.pull_request = None
+    github_plugin.repository = MagicMock()
+    github_plugin.repository.html_url = "https://github.com/owner/repo"
+    github_plugin.repository.get_pull.side_effect = pull_requests.get
+
+    release_info = ReleaseInfo(
+        release_type="minor",
+        release_notes="Batch",
+        additional_release_notes=["Contributed in #1", "Contributed in #2"],
+        version="1.1.0",
+        previous_version="1.0.0",
+        pull_requests=[1, 2, 3],
+    )
+
+    github_plugin.post_publish(release_info)
+
+    for pull_request in pull_requests.values():
+        (call,) = pull_request.create_issue_comment.call_args_list
+        assert "This PR was published as [1.1.0]" in call.args[0]
+
+    release_message = github_plugin.repository.create_git_release.call_args.kwargs[
+        "message"
+    ]
+    assert release_message == "Batch\n\nContributed in #1\n\nContributed in #2"
+
+
+def test_post_publish_thanks_a_single_queued_pull_request(github_plugin):
+    # a scheduled run publishing the queue has no PR of its own
+    github_plugin._event_data = {"schedule": "0 0 * * *"}
+    github_plugin._get_pr_number = MagicMock(
+        side_effect=AssertionError("the PR of the event must not be used")
+    )
+
+    pull_request = MagicMock()
+    pull_request.get_issue_comments.return_value = []
+
+    github_plugin.repository = MagicMock()
+    github_plugin.repository.html_url = "https://github.com/owner/repo"
+    github_plugin.repository.get_pull.side_effect = {7: pull_request}.get
+
+    release_info = ReleaseInfo(
+        release_type="patch",
+        release_notes="Fix",
+        additional_release_notes=["This release was contributed by @someone in #7"],
+        version="1.0.1",
+        previous_version="1.0.0",
+        pull_requests=[7],
+    )
+
+    github_plugin.post_publish(release_info)
+
+    (call,) = pull_request.create_issue_comment.call_args_list
+    assert "This PR was published as [1.0.1]" in call.args[0]
+
+    release_message = github_plugin.repository.create_git_release.call_args.kwargs[
+        "message"
+    ]
+    assert release_message == "Fix\n\nThis release was contributed by @someone in #7"
+
+
+def test_batch_release_message_keeps_sponsors_and_discussion(github_plugin):
+    github_plugin.validate_config(
+        {"plugin_config": {"github": {"include_sponsors": True}}}
+    )
+    github_plugin._get_sponsors = MagicMock(
+        return_value={"sponsors": ["sponsor"], "private_sponsors": 0}
+    )
+
+    release_info = ReleaseInfo(
+        release_type="minor",
+        release_notes="Batch",
+        additional_release_notes=["Contributed in #1", "Contributed in #2"],
+        version="1.1.0",
+        pull_requests=[1, 2],
+    )
+
+    message = github_plugin._get_release_message(
+        release_info, discussion_url="https://github.com/owner/repo/discussions/1"
+    )
+
+    assert message == (
+        "Batch\n\nContributed in #1\n\nContributed in #2"
+        "\n\nThanks to @sponsor for making this release possible ✨"
+        "\n\nJoin the discussion: https://github.com/owner/repo/discussions/1"
+    )
+
+
+def test_create_release_uploads_assets_and_checksums(
+    github_plugin, distributions, mocker
+):
+    github_plugin.root = distributions[0].parent.parent
+    github_plugin.repository = MagicMock()
+    release = github_plugin.repository.create_git_release.return_value
+
+    hash_file = mocker.spy(manifest, "hash_file")
+
+    github_plugin._create_release(
+        ReleaseInfo(release_type="patch", release_notes="Fix", version="1.0.0")
+    )
+    github_plugin._create_release(
+        ReleaseInfo(release_type="patch", release_notes="Fix", version="1.0.0")
+    )
+
+    uploaded = [call.args[0] for call in release.upload_asset.call_args_list]
+
+    assert uploaded == 2 * [
+        *(str(path) for path in distributions),
+        str(distributions[0].parent / "SHA256SUMS"),
+    ]
+    # the digests are read from the manifest the second time
+    assert hash_file.call_count == 2
+
+
+def test_post_publish_workspace_releases_every_tag(github_plugin, tmp_path):
+    pull_request = MagicMock()
+    pull_request.get_issue_comments.return_value = []
+
+    github_plugin.root = tmp_path
+    github_plugin.repository = MagicMock()
+    github_plugin.repository.html_url = "https://github.com/owner/repo"
+    github_plugin.repository.get_pull.side_effect = {1: pull_request}.get
+
+    releases = {
+        f"packages/{name}": ReleaseInfo(
+            release_type="patch",
+            release_notes=f"Fix {name}",
+            version="1.0.1",
+            pull_requests=[1],
+        )
+        for name in ("first", "second")
+    }
+
+    github_plugin.post_publish_workspace(
+        releases,
+        {path: f"{path.split('/')[1]}-1.0.1" for path in releases},
+    )
+
+    assert [
+        call.kwargs["tag"]
+        for call in github_plugin.repository.create_git_release.call_args_list
+    ] == ["first-1.0.1", "second-1.0.1"]
+
+    # a single comment for the PR published in both packages
+    (call,) = pull_request.create_issue_comment.call_args_list
+    assert call.args[0].endswith(
+        "This PR was published as "
+        "[first-1.0.1](https://github.com/owner/repo/releases/tag/first-1.0.1), "
+        "[second-1.0.1](https://github.com/owner/repo/releases/tag/second-1.0.1)."
+        " Thank you for contributing!"
+    )
@@ -0,0 +1,140 @@
+import json
+from pathlib import Path
+
+import pytest
+from pytest_httpserver import HTTPServer
+from pytest_mock import MockerFixture
+
+from autopub import Autopub
+from autopub.plugins import pep517
+from autopub.plugins.pep517 import (
+    ENVIRONMENT_MAX_AGE,
+    MARKER_FILE,
+    PEP517Plugin,
+    build_environments_directory,
+)
+
+pytest.importorskip("pyproject_hooks")
+
+
+def test_builds_with_the_backend(example_project_pep517: Path):
+    plugin = PEP517Plugin()
+    plugin.build()
+
+    assert sorted(
+        path.name for path in (example_project_pep517 / "dist").iterdir()
+    ) == [
+        "example_project_pep517-0.1.0-py3-none-any.whl",
+        "example_project_pep517-0.1.0.tar.gz",
+    ]
+
+
+def test_reuses_the_build_environment(
+    example_project_pep517: Path, mocker: MockerFixture
+):
+    create = mocker.spy(pep517.venv, "create")
+
+    PEP517Plugin().build()
+    PEP517Plugin().build()
+
+    assert create.call_count == 1
+    assert len(list(build_environments_directory().iterdir())) == 1
+
+
+def test_installs_the_requirements_the_backend_asks_for_once(
+    example_project_pep517: Path, mocker: MockerFixture
+):
+    backend = example_project_pep517 / "build_backend" / "backend.py"
+    backend.write_text(
+        backend.read_text().replace(
+            "def get_requires_for_build_wheel(config_settings=None):\n    return []",
+            "def get_requires_for_build_wheel(config_settings=None):\n"
+            '    return ["wheel"]',
+        )
+    )
+
+    plugin = PEP517Plugin()
+    install = mocker.patch.object(plugin, "_install")
+
+    plugin.build()
+    plugin.build()
+
+    install.assert_called_once()
+    assert install.call_args.args[1] == ["wheel"]
+
+    # the static environment doesn't get the requirements of this project
+    markers = [
+        json.loads((directory / MARKER_FILE).read_text())["requires"]
+        for directory in build_environments_directory().iterdir()
+    ]
+
+    assert sorted(markers) == [[], ["wheel"]]
+
+
+def set_build_requires(project: Path, requires: str) -> None:
+    pyproject = project / "pyproject.toml"
+    pyproject.write_text(
+        pyproject.read_text().replace("requires = []", f"requires = {requires}")
+    )
+
+
+def age_environments(seconds: float) -> None:
+    for directory in build_environments_directory().iterdir():
+        marker = directory / MARKER_FILE
+        state = json.loads(marker.read_text())
+        state["created"] -= seconds
+        marker.write_text(json.dumps(state))
+
+
+@pytest.mark.parametrize(
+    "requires, created", [('["wheel"]', 2), ('["wheel==0.43.0"]', 1)]
+)
+def test_refreshes_environments_with_unpinned_requirements(
+    example_project_pep517: Path, mocker: MockerFixture, requires: str, created: int
+):
+    set_build_requires(example_project_pep517, requires)
+
+    create = mocker.spy(pep517.venv, "create")
+    plugin = PEP517Plugin()
+    mocker.patch.object(plugin, "_install")
+
+    plugin.build_environment()
+    plugin.build_environment()
+    age_environments(ENVIRONMENT_MAX_AGE + 1)
+    plugin.build_environment()
+
+    assert create.call_count == created
+
+
+def test_environments_have_pip_without_uv(
+    example_project_pep517: Path, mocker: MockerFixture
+):
+    mocker.patch.object(pep517.shutil, "which", return_value=None)
+    create = mocker.patch.object(pep517.venv, "create")
+
+    PEP517Plugin().build_environment()
+
+    assert create.call_args.kwargs["with_pip"] is True
+
+
+def test_publishes_with_the_upload_options(
+    example_project_pep517: Path,
+    with_valid_artifact: Path,
+    httpserver: HTTPServer,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    pyproject = example_project_pep517 / "pyproject.toml"
+    pyproject.write_text(
+        pyproject.read_text() + "\n[tool.autopub]\n"
+        f'upload-url = "{httpserver.url_for("/private/")}"\n'
+    )
+    monkeypatch.setenv("AUTOPUB_UPLOAD_PASSWORD", "secret")
+
+    httpserver.expect_request("/private/").respond_with_data("OK")
+
+    autopub = Autopub(plugins=[PEP517Plugin])
+    autopub.build()
+    autopub.publish()
+
+    assert len(httpserver.log) == 2
+    assert httpserver.log[0][0].authorization.password == "secret"
@@ -1,7 +1,10 @@
+import json
 import textwrap
 from pathlib import Path
 
+import pytest
 import time_machine
+from pytest_mock import MockerFixture
 
 from autopub.plugins.update_changelog import UpdateChangelogPlugin
 from autopub.types import ReleaseInfo
@@ -23,6 +26,7 @@ def test_creates_file(example_project_pdm: Path):
     plugin.post_prepare(info)
 
     assert changelog.exists()
+    assert info.changed_files == ["CHANGELOG.md"]
 
     expected_changelog = textwrap.dedent(
         """
@@ -142,3 +146,182 @@ def test_adds_additional_lines(example_project_pdm: Path):
     ).strip()
 
     assert changelog.read_text().strip() == expected_changelog
+
+
+@time_machine.travel("2021-08-02")
+def test_keeps_old_changelog_as_is(example_project_pdm: Path):
+    changelog = example_project_pdm / "CHANGELOG.md"
+
+    old_entries = "0.0.9 - 2021-08-01\n------------------\n\nFirst version ✨\n\n\n"
+    changelog.write_bytes(f"CHANGELOG\n=========\n\n\n\n{old_entries}".encode())
+
+    info = ReleaseInfo(
+        release_type="minor",
+        release_notes="This is some example :)",
+        version="0.1.0",
+        previous_version="0.0.9",
+    )
+
+    plugin = UpdateChangelogPlugin()
+    plugin.post_prepare(info)
+
+    assert changelog.read_text() == (
+        "CHANGELOG\n=========\n\n"
+        "0.1.0 - 2021-08-02\n------------------\n\nThis is some example :)\n\n"
+        f"{old_entries}"
+    )
+
+
+@time_machine.travel("2021-08-02")
+def test_handles_changelog_without_header(example_project_pdm: Path):
+    changelog = example_project_pdm / "CHANGELOG.md"
+    changelog.write_text("0.0.9\n-----\n\nFirst version ✨\n")
+
+    info = ReleaseInfo(
+        release_type="minor",
+        release_notes="This is some example :)",
+        version="0.1.0",
+        previous_version="0.0.9",
+    )
+
+    plugin = UpdateChangelogPlugin()
+    plugin.post_prepare(info)
+
+    assert changelog.read_text() == (
+        "0.1.0 - 2021-08-02\n------------------\n\nThis is some example :)\n\n"
+        "0.0.9\n-----\n\nFirst version ✨\n"
+    )
+
+
+@time_machine.travel("2021-08-02")
+def test_only_reads_the_start_of_a_changelog_without_header(
+    example_project_pdm: Path, mocker: MockerFixture
+):
+    mocker.patch("autopub.plugins.update_changelog.HEADER_SEARCH_BYTES", 100)
+
+    changelog = example_project_pdm / "CHANGELOG.md"
+    old_entries = "".join(f"0.0.{i}\n-----\n\nVersion {i}\n\n" for i in range(50))
+    changelog.write_text(old_entries)
+
+    info = ReleaseInfo(
+        release_type="minor",
+        release_notes="This is some example :)",
+        version="0.1.0",
+        previous_version="0.0.49",
+    )
+
+    plugin = UpdateChangelogPlugin()
+    read_header = mocker.spy(plugin, "_read_header")
+    plugin.post_prepare(info)
+
+    assert read_header.spy_return is None
+    assert changelog.read_text() == (
+        "0.1.0 - 2021-08-02\n------------------\n\nThis is some example :)\n\n"
+        f"{old_entries}"
+    )
+
+
+def test_failed_update_leaves_changelog_untouched(
+    example_project_pdm: Path, mocker: MockerFixture
+):
+    changelog = example_project_pdm / "CHANGELOG.md"
+    changelog.write_text("CHANGELOG\n=========\n\n0.0.9\n-----\n\nFirst version\n")
+
+    mocker.patch(
+        "autopub.plugins.update_changelog.shutil.copyfileobj",
+        side_effect=OSError("disk full"),
+    )
+
+    info = ReleaseInfo(
+        release_type="minor",
+        release_notes="This is some example :)",
+        version="0.1.0",
+        previous_version="0.0.9",
+    )
+
+    plugin = UpdateChangelogPlugin()
+
+    with pytest.raises(OSError, match="disk full"):
+        plugin.post_prepare(info)
+
+    assert (
+        changelog.read_text()
+        == "CHANGELOG\n=========\n\n0.0.9\n-----\n\nFirst version\n"
+    )
+    assert [path.name for path in example_project_pdm.glob(".CHANGELOG.md.*")] == []
+
+
+@time_machine.travel("2021-08-02")
+def test_rotates_changelog(example_project_pdm: Path):
+    changelog = example_project_pdm / "CHANGELOG.md"
+    changelog.write_text(
+        "CHANGELOG\n=========\n\n0.9.0 - 2021-08-01\n------------------\n\nOld\n"
+    )
+
+    info = ReleaseInfo(
+        release_type="major",
+        release_notes="This is some example :)",
+        version="1.0.0",
+        previous_version="0.9.0",
+    )
+
+    plugin = UpdateChangelogPlugin()
+    plugin.validate_config({"plugin_config": {"update_changelog": {"max-versions": 1}}})
+    plugin.post_prepare(info)
+
+    archive = example_project_pdm / "changelog" / "CHANGELOG-0.md"
+
+    assert "0.9.0" not in changelog.read_text()
+    assert "- [0.x releases](changelog/CHANGELOG-0.md)" in changelog.read_text()
+    assert "Old" in archive.read_text()
+    assert info.changed_files == [
+        "CHANGELOG.md",
+        "changelog/CHANGELOG-0.md",
+    ]
+
+
+def test_exports_json_and_feed(example_project_pdm: Path):
+    changelog = example_project_pdm / "CHANGELOG.md"
+    changelog.write_text(
+        "CHANGELOG\n=========\n\n0.9.0 - 2021-08-01\n------------------\n\nOld\n"
+    )
+
+    plugin = UpdateChangelogPlugin()
+    plugin.validate_config(
+        {
+            "plugin_config": {
+                "update_changelog": {
+                    "json-file": "changelog.jsonl",
+                    "feed-file": "docs/changelog.xml",
+                }
+            }
+        }
+    )
+
+    for version, day in (("1.0.0", "2021-08-02"), ("1.1.0", "2021-08-03")):
+        info = ReleaseInfo(
+            release_type="minor",
+            release_notes=f"Notes for {version}",
+            version=version,
+        )
+
+        with time_machine.travel(day):
+            plugin.post_prepare(info)
+
+    assert info.changed_files == [
+        "CHANGELOG.md",
+        "changelog.jsonl",
+        "docs/changelog.xml",
+    ]
+
+    json_lines = (example_project_pdm / "changelog.jsonl").read_text().splitlines()
+
+    assert [json.loads(line)["version"] for line in json_lines] == [
+        "0.9.0",
+        "1.0.0",
+        "1.1.0",
+    ]
+
+    feed = (example_project_pdm / "docs" / "changelog.xml").read_text(encoding="utf-8")
+
+    assert feed.index("#1.1.0") < feed.index("#1.0.0") < feed.index("#0.9.0")
@@ -2,7 +2,9 @@ from pathlib import Path
 
 import tomlkit
 from pytest_httpserver import HTTPServer
+from pytest_mock import MockerFixture
 
+from autopub.exceptions import CommandFailed
 from autopub.plugins.uv import UvPlugin
 from autopub.types import ReleaseInfo
 
@@ -78,3 +80,56 @@ def test_runs_publish_with_repository(example_project_uv: Path, httpserver: HTTP
     uv = UvPlugin()
     uv.build()
     uv.publish(repository="example", username="example", password="example")
+
+
+def test_patches_lock_without_running_uv(
+    example_project_uv: Path, mocker: MockerFixture
+):
+    (example_project_uv / "uv.lock").write_text(
+        'version = 1\nrequires-python = ">=3.11"\n\n'
+        '[[package]]\nname = "example-project-uv"\nversion = "0.1.0"\n'
+        'source = { editable = "." }\n'
+    )
+
+    info = ReleaseInfo(release_type="minor", release_notes="")
+
+    plugin = UvPlugin()
+    run_command = mocker.patch.object(plugin, "run_command")
+
+    plugin.post_check(info)
+    plugin.post_prepare(info)
+
+    run_command.assert_not_called()
+
+    lock = tomlkit.parse((example_project_uv / "uv.lock").read_text())
+
+    assert lock["package"][0]["version"] == "0.2.0"
+    assert "uv.lock" in info.changed_files
+
+
+def test_builds_for_an_interpreter(example_project_uv: Path, mocker: MockerFixture):
+    plugin = UvPlugin()
+    run_command = mocker.patch.object(
+        plugin,
+        "run_command",
+        side_effect=["/usr/bin/python3.12", CommandFailed(["uv"], 2), "", ""],
+    )
+
+    assert plugin.find_interpreter("3.12") == "/usr/bin/python3.12"
+    assert plugin.find_interpreter("3.7") is None
+
+    plugin.build_for("/usr/bin/python3.12", Path("out"))
+    plugin.build_for("/usr/bin/python3.12", Path("out"), sdist=False)
+
+    assert [call.args[0] for call in run_command.call_args_list[2:]] == [
+        ["uv", "build", "--python", "/usr/bin/python3.12", "--out-dir", "out"],
+        [
+            "uv",
+            "build",
+            "--python",
+            "/usr/bin/python3.12",
+            "--out-dir",
+            "out",
+            "--wheel",
+        ],
+    ]
@@ -47,3 +47,61 @@ def test_loads_plugin_from_pyproject_toml(temporary_working_directory: Path):
 
     assert len(autopub.plugins) == 1
     assert isinstance(autopub.plugins[0], AutopubPlugin)
+
+
+def test_plugins_share_git_info():
+    class FirstPlugin(AutopubPlugin): ...
+
+    class SecondPlugin(AutopubPlugin): ...
+
+    autopub = Autopub(plugins=[FirstPlugin, SecondPlugin])
+
+    assert autopub.plugins[0].git_info is autopub.git_info
+    assert autopub.plugins[1].git_info is autopub.git_info
+
+
+def test_resolves_files_against_the_root(
+    temporary_working_directory: Path, valid_release_text: str
+):
+    root = temporary_working_directory / "project"
+    root.mkdir()
+    (root / "pyproject.toml").write_text('[tool.autopub]\nplugins = ["git"]\n')
+    (root / "RELEASE.md").write_text(valid_release_text)
+
+    autopub = Autopub(plugins=[VersionPlugin], root=root)
+    autopub.load_plugins()
+
+    assert autopub.config["plugins"] == ["git"]
+    assert all(plugin.root == root for plugin in autopub.plugins)
+    assert autopub.plugins[0].git_info.cwd == root
+
+    autopub.check()
+
+    assert (root / ".autopub" / "release_info.json").exists()
+    assert not (temporary_working_directory / ".autopub").exists()
+
+
+def test_plugin_data_is_per_instance():
+    class DataPlugin(AutopubPlugin): ...
+
+    first, second = Autopub(plugins=[DataPlugin, DataPlugin]).plugins
+
+    first.data["key"] = "value"
+
+    assert second.data == {}
+
+
+def test_plugins_overriding_init_without_super(temporary_working_directory: Path):
+    class LegacyPlugin(AutopubPlugin):
+        id = "legacy"
+
+        def __init__(self) -> None:
+            self.started = True
+
+    (plugin,) = Autopub(plugins=[LegacyPlugin]).plugins
+
+    plugin.data["key"] = "value"
+
+    assert plugin.data == {"key": "value"}
+    assert plugin.root == temporary_working_directory
+    assert LegacyPlugin().root == Path.cwd()
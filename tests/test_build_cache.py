@@ -0,0 +1,118 @@
+import os
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from autopub import Autopub
+from autopub.build_cache import BuildCache
+from autopub.plugins import AutopubPackageManagerPlugin, AutopubPlugin
+
+
+def git(cwd: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", *args], cwd=cwd, check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+
+class CountingBuildPlugin(AutopubPlugin, AutopubPackageManagerPlugin):
+    builds = 0
+
+    def build(self) -> None:
+        type(self).builds += 1
+
+        dist = self.root / "dist"
+        dist.mkdir(exist_ok=True)
+        (dist / "example-0.1.0.tar.gz").write_text(
+            (self.root / "module.py").read_text()
+        )
+
+    def publish(self, repository: str | None = None, **kwargs) -> None: ...
+
+
+@pytest.fixture
+def project(temporary_working_directory: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    for variable in ("GIT_AUTHOR", "GIT_COMMITTER"):
+        monkeypatch.setenv(f"{variable}_NAME", "autopub")
+        monkeypatch.setenv(f"{variable}_EMAIL", "autopub@autopub")
+
+    git(temporary_working_directory, "init", "-b", "main")
+
+    (temporary_working_directory / ".gitignore").write_text("dist/\n")
+    (temporary_working_directory / "module.py").write_text("print('v1')\n")
+
+    git(temporary_working_directory, "add", ".")
+    git(temporary_working_directory, "commit", "-m", "initial")
+
+    CountingBuildPlugin.builds = 0
+
+    return temporary_working_directory
+
+
+def test_restores_identical_builds(project: Path, isolated_cache: Path):
+    Autopub(plugins=[CountingBuildPlugin]).build()
+
+    (project / "dist" / "example-0.1.0.tar.gz").unlink()
+
+    Autopub(plugins=[CountingBuildPlugin]).build()
+
+    assert CountingBuildPlugin.builds == 1
+    assert (project / "dist" / "example-0.1.0.tar.gz").read_text() == "print('v1')\n"
+    assert len(list((isolated_cache / "autopub" / "builds").iterdir())) == 1
+
+    # uncommitted changes are part of the key
+    (project / "module.py").write_text("print('v2')\n")
+
+    Autopub(plugins=[CountingBuildPlugin]).build()
+
+    assert CountingBuildPlugin.builds == 2
+    assert (project / "dist" / "example-0.1.0.tar.gz").read_text() == "print('v2')\n"
+
+
+def test_interpreter_is_part_of_the_key(project: Path, monkeypatch: pytest.MonkeyPatch):
+    Autopub(plugins=[CountingBuildPlugin]).build()
+
+    monkeypatch.setattr(
+        "autopub.build_cache.sysconfig.get_platform", lambda: "other-platform"
+    )
+
+    Autopub(plugins=[CountingBuildPlugin]).build()
+
+    assert CountingBuildPlugin.builds == 2
+
+
+def test_can_be_disabled(project: Path):
+    (project / "pyproject.toml").write_text("[tool.autopub]\nbuild-cache = false\n")
+
+    Autopub(plugins=[CountingBuildPlugin]).build()
+    Autopub(plugins=[CountingBuildPlugin]).build()
+
+    assert CountingBuildPlugin.builds == 2
+
+
+def test_evicts_least_recently_used_entries(tmp_path: Path):
+    cache = BuildCache(tmp_path / "cache", max_bytes=250)
+    dist = tmp_path / "dist"
+    dist.mkdir()
+
+    for index, key in enumerate(["first", "second"]):
+        file = dist / f"{key}.whl"
+        file.write_bytes(b"x" * 100)
+
+        cache.store(key, [file])
+        os.utime(cache.directory / key, ns=(index, index))
+
+    # restoring marks the entry as recently used
+    assert cache.restore("first", tmp_path / "restored") == [
+        tmp_path / "restored" / "first.whl"
+    ]
+
+    third = dist / "third.whl"
+    third.write_bytes(b"x" * 100)
+    cache.store("third", [third])
+
+    assert sorted(entry.name for entry in cache.directory.iterdir()) == [
+        "first",
+        "third",
+    ]
+    assert cache.restore("second", tmp_path / "restored") == []
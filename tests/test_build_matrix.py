@@ -0,0 +1,98 @@
+import threading
+from pathlib import Path
+
+import pytest
+
+from autopub import Autopub
+from autopub.build_matrix import run_build_matrix
+from autopub.exceptions import BuildMatrixFailed, CommandFailed, NoInterpreterFound
+from autopub.plugins import AutopubPlugin
+
+INTERPRETERS = {"3.11": "/usr/bin/python3.11", "3.12": "/usr/bin/python3.12"}
+
+
+class MatrixPlugin(AutopubPlugin):
+    def __init__(self) -> None:
+        super().__init__()
+        self.builds: list[tuple[str, bool]] = []
+        self.barrier: threading.Barrier | None = None
+
+    def find_interpreter(self, request: str) -> str | None:
+        return INTERPRETERS.get(request)
+
+    def build_for(self, python: str, out_dir: Path, sdist: bool = True) -> None:
+        if self.barrier is not None:
+            # only passes when every build runs at the same time
+            self.barrier.wait()
+
+        version = python.removeprefix("/usr/bin/python").replace(".", "")
+        out_dir.mkdir(parents=True)
+        (out_dir / f"example-1.0.0-cp{version}-cp{version}-linux_x86_64.whl").touch()
+        (out_dir / "example-1.0.0-py3-none-any.whl").touch()
+
+        if sdist:
+            (out_dir / "example-1.0.0.tar.gz").touch()
+
+        self.builds.append((python, sdist))
+
+    def build(self) -> None:  # pragma: no cover
+        ...
+
+    def publish(self, **kwargs: str) -> None:  # pragma: no cover
+        ...
+
+
+def test_builds_every_interpreter_concurrently(tmp_path: Path):
+    plugin = MatrixPlugin()
+    plugin.barrier = threading.Barrier(2, timeout=5)
+
+    files = run_build_matrix(plugin, ["3.11", "3.12", "3.13"], tmp_path / "dist")
+
+    assert sorted(plugin.builds) == [
+        ("/usr/bin/python3.11", True),
+        ("/usr/bin/python3.12", False),
+    ]
+    assert sorted(file.name for file in files) == [
+        "example-1.0.0-cp311-cp311-linux_x86_64.whl",
+        "example-1.0.0-cp312-cp312-linux_x86_64.whl",
+        "example-1.0.0-py3-none-any.whl",
+        "example-1.0.0.tar.gz",
+    ]
+    assert sorted(file.name for file in (tmp_path / "dist").iterdir()) == sorted(
+        file.name for file in files
+    )
+
+
+def test_fails_without_interpreters(tmp_path: Path):
+    with pytest.raises(NoInterpreterFound):
+        run_build_matrix(MatrixPlugin(), ["2.7"], tmp_path / "dist")
+
+
+def test_reports_failed_builds(tmp_path: Path):
+    plugin = MatrixPlugin()
+
+    def build_for(python: str, out_dir: Path, sdist: bool = True) -> None:
+        if python.endswith("3.12"):
+            raise CommandFailed(["uv", "build"], 1)
+
+    plugin.build_for = build_for  # type: ignore[method-assign]
+
+    with pytest.raises(BuildMatrixFailed) as e:
+        run_build_matrix(plugin, ["3.11", "3.12"], tmp_path / "dist")
+
+    assert e.value.errors == {"3.12": "Command uv build failed with return code 1"}
+    assert not (tmp_path / "dist").exists()
+
+
+def test_build_uses_the_matrix(temporary_working_directory: Path):
+    (temporary_working_directory / "pyproject.toml").write_text(
+        '[tool.autopub]\nbuild-matrix = ["3.11", "3.12"]\nbuild-cache = false\n'
+    )
+
+    autopub = Autopub(plugins=[MatrixPlugin])
+    autopub.build()
+
+    (plugin,) = autopub.plugins
+    assert isinstance(plugin, MatrixPlugin)
+    assert len(plugin.builds) == 2
+    assert (temporary_working_directory / "dist/example-1.0.0.tar.gz").exists()
@@ -0,0 +1,317 @@
+import io
+import json
+import os
+import textwrap
+from pathlib import Path
+from xml.etree import ElementTree
+
+import pytest
+from pytest_mock import MockerFixture
+
+from autopub.changelog import (
+    ARCHIVE_MARKER,
+    ChangelogEntry,
+    ChangelogIndex,
+    ChangelogReader,
+    append_json,
+    export_atom,
+    export_json,
+    prepend_atom,
+    rotate_changelog,
+    write_changelog,
+)
+
+CHANGELOG = textwrap.dedent(
+    """
+    CHANGELOG
+    =========
+
+    1.0.0 - 2021-08-02
+    ------------------
+
+    Big release ✨
+
+    - with a list
+    - of changes
+
+    0.1.0 - 2021-08-01
+    ------------------
+
+    First version
+    """
+).lstrip()
+
+
+def test_indexes_versions(temporary_working_directory: Path):
+    changelog = temporary_working_directory / "CHANGELOG.md"
+    changelog.write_text(CHANGELOG)
+
+    index = ChangelogIndex(changelog)
+
+    assert list(index.sections) == ["1.0.0", "0.1.0"]
+    assert (
+        index.get("1.0.0")
+        == textwrap.dedent(
+            """
+        1.0.0 - 2021-08-02
+        ------------------
+
+        Big release ✨
+
+        - with a list
+        - of changes
+        """
+        ).strip()
+    )
+    assert (
+        index.get("0.1.0") == "0.1.0 - 2021-08-01\n------------------\n\nFirst version"
+    )
+    assert index.get("2.0.0") is None
+
+
+def test_reuses_cached_index(temporary_working_directory: Path, mocker: MockerFixture):
+    changelog = temporary_working_directory / "CHANGELOG.md"
+    changelog.write_text(CHANGELOG)
+
+    ChangelogIndex(changelog).sections
+
+    cache = json.loads(
+        (temporary_working_directory / ".autopub/changelog_index.json").read_text()
+    )
+    assert set(cache["sections"]) == {"1.0.0", "0.1.0"}
+
+    build = mocker.spy(ChangelogIndex, "build")
+
+    assert ChangelogIndex(changelog).get("0.1.0") is not None
+    build.assert_not_called()
+
+    changelog.write_text(CHANGELOG.replace("First version", "First version!"))
+
+    assert ChangelogIndex(changelog).get("0.1.0").endswith("First version!")
+    build.assert_called_once()
+
+
+def test_cache_is_per_changelog(temporary_working_directory: Path):
+    first = temporary_working_directory / "CHANGELOG.md"
+    second = temporary_working_directory / "docs" / "CHANGELOG.md"
+    second.parent.mkdir()
+
+    first.write_text(CHANGELOG)
+    second.write_text(CHANGELOG.replace("1.0.0", "9.0.0"))
+    os.utime(second, ns=(first.stat().st_atime_ns, first.stat().st_mtime_ns))
+
+    cache_file = temporary_working_directory / ".autopub" / "changelog_index.json"
+
+    assert list(ChangelogIndex(first, cache_file=cache_file).sections) == [
+        "1.0.0",
+        "0.1.0",
+    ]
+    assert list(ChangelogIndex(second, cache_file=cache_file).sections) == [
+        "9.0.0",
+        "0.1.0",
+    ]
+
+
+def test_cache_is_stored_in_the_project(tmp_path: Path):
+    changelog = tmp_path / "CHANGELOG.md"
+    changelog.write_text(CHANGELOG)
+
+    ChangelogIndex(changelog).sections
+
+    assert (tmp_path / ".autopub" / "changelog_index.json").exists()
+
+
+def test_empty_changelog(temporary_working_directory: Path):
+    changelog = temporary_working_directory / "CHANGELOG.md"
+    changelog.touch()
+
+    assert ChangelogIndex(changelog).sections == {}
+
+
+def _section(version: str, notes: str) -> str:
+    title = f"{version} - 2021-08-01"
+
+    return f"{title}\n{'-' * len(title)}\n\n{notes}\n\n"
+
+
+def test_rotates_old_major_versions(temporary_working_directory: Path):
+    changelog = temporary_working_directory / "CHANGELOG.md"
+    changelog.write_text(
+        "CHANGELOG\n=========\n\n"
+        + _section("2.0.0", "Two")
+        + _section("1.1.0", "One one")
+        + _section("1.0.0", "One")
+        + _section("0.1.0", "Zero")
+    )
+
+    archive = temporary_working_directory / "changelog"
+
+    assert rotate_changelog(changelog, archive, max_versions=10) == []
+
+    written = rotate_changelog(changelog, archive, max_versions=2)
+
+    assert written == [
+        archive / "CHANGELOG-1.md",
+        archive / "CHANGELOG-0.md",
+        changelog,
+    ]
+    assert changelog.read_text() == (
+        "CHANGELOG\n=========\n\n"
+        + _section("2.0.0", "Two")
+        + f"{ARCHIVE_MARKER}\n\n"
+        + "- [1.x releases](changelog/CHANGELOG-1.md)\n"
+        + "- [0.x releases](changelog/CHANGELOG-0.md)\n"
+    )
+    assert (archive / "CHANGELOG-1.md").read_text() == (
+        "CHANGELOG 1.x\n=========\n\n"
+        + _section("1.1.0", "One one")
+        + _section("1.0.0", "One").rstrip()
+        + "\n"
+    )
+
+    index = ChangelogIndex(changelog)
+    assert list(index.sections) == ["2.0.0"]
+    assert index.get("2.0.0") == _section("2.0.0", "Two").strip()
+
+
+def test_rotation_prepends_to_existing_archives(temporary_working_directory: Path):
+    changelog = temporary_working_directory / "CHANGELOG.md"
+    archive = temporary_working_directory / "changelog"
+
+    changelog.write_text(
+        "CHANGELOG\n=========\n\n"
+        + _section("1.1.0", "One one")
+        + _section("0.1.0", "Zero")
+    )
+    rotate_changelog(changelog, archive, max_versions=1)
+
+    # a backport of the 0.x series is released after 1.1.0
+    content = changelog.read_text().replace(
+        "=========\n\n", "=========\n\n" + _section("0.2.0", "Zero two"), 1
+    )
+    changelog.write_text(content)
+
+    rotate_changelog(changelog, archive, max_bytes=1)
+
+    assert ChangelogIndex(changelog).sections.keys() == {"1.1.0"}
+    assert changelog.read_text().count("0.x releases") == 1
+    assert ChangelogIndex(archive / "CHANGELOG-0.md").build().keys() == {
+        "0.2.0",
+        "0.1.0",
+    }
+
+
+def test_parses_entries(temporary_working_directory: Path):
+    changelog = temporary_working_directory / "CHANGELOG.md"
+    changelog.write_text(
+        CHANGELOG.replace(
+            "Big release ✨\n",
+            "Big release ✨\n\nThis release was contributed by @someone in #1\n",
+        ),
+        encoding="utf-8",
+    )
+
+    reader = ChangelogReader(changelog)
+
+    assert reader.preamble == "CHANGELOG\n=========\n\n"
+
+    entries = iter(reader)
+    entry = next(entries)
+
+    assert entry.version == "1.0.0"
+    assert entry.date == "2021-08-02"
+    assert entry.notes == "Big release ✨\n\n- with a list\n- of changes"
+    assert entry.contributors == ["This release was contributed by @someone in #1"]
+
+    assert [entry.to_dict() for entry in entries] == [
+        {
+            "version": "0.1.0",
+            "date": "2021-08-01",
+            "notes": "First version",
+            "contributors": [],
+        }
+    ]
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_round_trips_exactly(temporary_working_directory: Path, newline: str):
+    content = (
+        CHANGELOG
+        + "\n\n0.0.1\n-----\nno date\n\n"
+        + f"{ARCHIVE_MARKER}\n\n- [0.x releases](changelog/CHANGELOG-0.md)\n"
+    ).replace("\n", newline)
+
+    changelog = temporary_working_directory / "CHANGELOG.md"
+    changelog.write_bytes(content.encode())
+
+    reader = ChangelogReader(changelog)
+    entries = list(reader)
+
+    assert [entry.version for entry in reversed(reader)] == ["0.0.1", "0.1.0", "1.0.0"]
+
+    assert [entry.version for entry in entries] == ["1.0.0", "0.1.0", "0.0.1"]
+    assert entries[2].date is None
+    assert reader.epilogue.startswith(ARCHIVE_MARKER)
+
+    output = io.StringIO(newline="")
+    write_changelog(output, reader.preamble, entries, reader.epilogue)
+
+    assert output.getvalue() == content
+
+
+def test_exports_json(temporary_working_directory: Path):
+    changelog = temporary_working_directory / "CHANGELOG.md"
+    changelog.write_text(CHANGELOG, encoding="utf-8")
+    json_file = temporary_working_directory / "changelog.jsonl"
+
+    with json_file.open("w", encoding="utf-8") as output:
+        export_json(ChangelogReader(changelog), output)
+
+    append_json(json_file, ChangelogEntry.create("1.1.0", "2021-08-03", "New"))
+
+    entries = [
+        json.loads(line) for line in json_file.read_text(encoding="utf-8").splitlines()
+    ]
+
+    assert [entry["version"] for entry in entries] == ["0.1.0", "1.0.0", "1.1.0"]
+    assert entries[1]["notes"].startswith("Big release ✨")
+
+
+def test_exports_atom_feed(temporary_working_directory: Path):
+    changelog = temporary_working_directory / "CHANGELOG.md"
+    changelog.write_text(CHANGELOG, encoding="utf-8")
+    feed_file = temporary_working_directory / "changelog.xml"
+
+    with feed_file.open("w", encoding="utf-8") as output:
+        export_atom(
+            ChangelogReader(changelog),
+            output,
+            title="Example <changelog>",
+            feed_id="https://example.com/changelog.xml",
+        )
+
+    prepend_atom(
+        feed_file,
+        ChangelogEntry.create("1.1.0", "2021-08-03", "New & shiny"),
+        feed_id="https://example.com/changelog.xml",
+    )
+
+    namespace = {"atom": "http://www.w3.org/2005/Atom"}
+    feed = ElementTree.parse(feed_file).getroot()
+
+    assert feed.findtext("atom:title", namespaces=namespace) == "Example <changelog>"
+    assert feed.findtext("atom:updated", namespaces=namespace) == "2021-08-03T00:00:00Z"
+    assert [
+        entry.findtext("atom:id", namespaces=namespace)
+        for entry in feed.findall("atom:entry", namespace)
+    ] == [
+        "https://example.com/changelog.xml#1.1.0",
+        "https://example.com/changelog.xml#1.0.0",
+        "https://example.com/changelog.xml#0.1.0",
+    ]
+    assert (
+        feed.find("atom:entry", namespace).findtext(
+            "atom:content", namespaces=namespace
+        )
+        == "New & shiny"
+    )
@@ -0,0 +1,160 @@
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from autopub import Autopub
+from autopub.changes import changed_files, matches
+from autopub.exceptions import InvalidConfiguration, NothingToRelease
+from autopub.git_info import GitInfo
+
+
+def git(cwd: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", *args], cwd=cwd, check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+
+@pytest.fixture
+def merged_pull_request(
+    temporary_working_directory: Path, monkeypatch: pytest.MonkeyPatch
+) -> Path:
+    """A repository whose HEAD merges a branch that changes `.github/` and
+    `packages/first/src/`, while `main` changed `packages/second/` meanwhile."""
+    for variable in ("GIT_AUTHOR", "GIT_COMMITTER"):
+        monkeypatch.setenv(f"{variable}_NAME", "autopub")
+        monkeypatch.setenv(f"{variable}_EMAIL", "autopub@autopub")
+
+    monkeypatch.delenv("GITHUB_EVENT_PATH", raising=False)
+
+    repository = temporary_working_directory
+
+    git(repository, "init", "-b", "main")
+
+    for path in ("packages/first/src/module.py", "packages/second/module.py"):
+        (repository / path).parent.mkdir(parents=True)
+        (repository / path).touch()
+
+    git(repository, "add", ".")
+    git(repository, "commit", "-m", "initial")
+
+    git(repository, "checkout", "-b", "feature")
+    (repository / ".github").mkdir()
+    (repository / ".github" / "ci.yml").touch()
+    (repository / "packages/first/src/module.py").write_text("changed")
+    git(repository, "add", ".")
+    git(repository, "commit", "-m", "feature")
+
+    git(repository, "checkout", "main")
+    (repository / "packages/second/module.py").write_text("changed")
+    git(repository, "commit", "-am", "meanwhile")
+
+    git(repository, "merge", "--no-ff", "feature", "-m", "merge")
+
+    return repository
+
+
+@pytest.mark.parametrize(
+    "path, patterns, expected",
+    [
+        ("src/module.py", ["src"], True),
+        ("src/package/module.py", ["src/"], True),
+        ("src/package/module.py", ["src/*.py"], True),
+        ("pyproject.toml", ["pyproject.toml"], True),
+        ("docs/index.md", ["src", "pyproject.toml"], False),
+        ("source.py", ["src"], False),
+    ],
+)
+def test_matches(path: str, patterns: list[str], expected: bool):
+    assert matches(path, patterns) is expected
+
+
+def test_changed_files_of_merge_commit(merged_pull_request: Path):
+    assert sorted(changed_files(GitInfo())) == [
+        ".github/ci.yml",
+        "packages/first/src/module.py",
+    ]
+
+    package = merged_pull_request / "packages" / "first"
+
+    assert changed_files(GitInfo(cwd=package)) == ["src/module.py"]
+
+
+def test_changed_files_of_push_event(merged_pull_request: Path):
+    event = {
+        "commits": [
+            {"added": ["packages/first/new.py"], "modified": [], "removed": []},
+            {"added": [], "modified": ["README.md"], "removed": []},
+        ]
+    }
+
+    package = merged_pull_request / "packages" / "first"
+
+    assert changed_files(GitInfo(), event) == ["packages/first/new.py", "README.md"]
+    assert changed_files(GitInfo(cwd=package), event) == ["new.py"]
+
+
+def test_changed_files_of_pull_request_event(merged_pull_request: Path):
+    git(merged_pull_request, "checkout", "feature")
+
+    event = {
+        "pull_request": {
+            "base": {"sha": git(merged_pull_request, "rev-parse", "main^1")}
+        }
+    }
+
+    assert sorted(changed_files(GitInfo(), event)) == [
+        ".github/ci.yml",
+        "packages/first/src/module.py",
+    ]
+
+
+def test_check_changes(merged_pull_request: Path):
+    first = merged_pull_request / "packages" / "first"
+    second = merged_pull_request / "packages" / "second"
+
+    for package in (first, second):
+        (package / "pyproject.toml").write_text(
+            '[tool.autopub]\npaths = ["src", "pyproject.toml"]\n'
+            'exclude-paths = ["src/*.md"]\n'
+        )
+
+    Autopub(root=first).check_changes()
+
+    with pytest.raises(NothingToRelease):
+        Autopub(root=second).check_changes()
+
+    with pytest.raises(NothingToRelease):
+        Autopub(root=first).check_changes(
+            {
+                "commits": [
+                    {
+                        "added": ["packages/first/src/notes.md"],
+                        "modified": [],
+                        "removed": [],
+                    }
+                ]
+            }
+        )
+
+    # a release file always counts as a releasable change
+    Autopub(root=second).check_changes(
+        {
+            "commits": [
+                {"added": ["packages/second/RELEASE.md"], "modified": [], "removed": []}
+            ]
+        }
+    )
+
+
+def test_check_changes_without_filters(merged_pull_request: Path):
+    (merged_pull_request / "pyproject.toml").write_text("[tool.autopub]\n")
+
+    Autopub(root=merged_pull_request / "packages" / "second").check_changes()
+
+    (merged_pull_request / "pyproject.toml").write_text(
+        '[tool.autopub]\npaths = "src"\n'
+    )
+
+    with pytest.raises(InvalidConfiguration):
+        Autopub().check_changes()
@@ -202,6 +202,8 @@ def test_check_creates_an_artifact(
         "additional_release_notes": [],
         "version": "1.0.1",
         "previous_version": "1.0.0",
+        "changed_files": [],
+        "pull_requests": [],
     }
 
 
@@ -243,6 +245,8 @@ def test_check_with_plugins_adds_data_to_artifact(temporary_working_directory: P
         "additional_release_notes": [],
         "version": "1.0.1",
         "previous_version": "1.0.0",
+        "changed_files": [],
+        "pull_requests": [],
     }
 
 
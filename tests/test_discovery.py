@@ -0,0 +1,120 @@
+from pathlib import Path
+
+from pytest_mock import MockerFixture
+
+from autopub.discovery import PackageIndex, PackageInfo
+
+
+def _create_package(
+    path: Path, name: str, layout: str = "src", version: bool = True
+) -> None:
+    path.mkdir(parents=True, exist_ok=True)
+    (path / "pyproject.toml").write_text(f'[project]\nname = "{name}"\n')
+
+    package_dir = path / layout / name.replace("-", "_")
+    package_dir.mkdir(parents=True)
+
+    (package_dir / "__init__.py").write_text(
+        '__version__ = "0.1.0"\n' if version else ""
+    )
+
+
+def test_discovers_packages(temporary_working_directory: Path):
+    root = temporary_working_directory
+
+    _create_package(root / "packages" / "first", "first-package")
+    _create_package(root / "packages" / "second", "second", layout="")
+    _create_package(root / "packages" / "third", "third", version=False)
+    (root / "packages" / "second" / "second" / "_version.py").write_text(
+        "__version__ = '0.2.0'\n"
+    )
+
+    # ignored directories
+    _create_package(root / "node_modules" / "nope", "nope")
+    _create_package(root / ".venv" / "nope", "nope")
+    _create_package(root / "vendor" / "nope", "nope")
+    (root / ".gitignore").write_text("# vendored code\nvendor/\n")
+
+    assert PackageIndex(root).packages == [
+        PackageInfo(
+            path="packages/first",
+            pyproject="packages/first/pyproject.toml",
+            name="first-package",
+            package_dir="packages/first/src/first_package",
+            version_files=["packages/first/src/first_package/__init__.py"],
+        ),
+        PackageInfo(
+            path="packages/second",
+            pyproject="packages/second/pyproject.toml",
+            name="second",
+            package_dir="packages/second/second",
+            version_files=[
+                "packages/second/second/__init__.py",
+                "packages/second/second/_version.py",
+            ],
+        ),
+        PackageInfo(
+            path="packages/third",
+            pyproject="packages/third/pyproject.toml",
+            name="third",
+            package_dir="packages/third/src/third",
+            version_files=[],
+        ),
+    ]
+
+
+def test_uses_cache_until_directories_change(
+    temporary_working_directory: Path, mocker: MockerFixture
+):
+    root = temporary_working_directory
+
+    _create_package(root, "example")
+
+    assert PackageIndex(root).get(".") is not None
+
+    build = mocker.spy(PackageIndex, "build")
+
+    package = PackageIndex(root).get(".")
+
+    assert package is not None
+    assert package.package_dir == "src/example"
+    build.assert_not_called()
+
+    _create_package(root / "packages" / "other", "other")
+
+    assert PackageIndex(root).get("packages/other") is not None
+    build.assert_called_once()
+
+
+def test_cache_is_kept_when_unindexed_files_change(
+    temporary_working_directory: Path, mocker: MockerFixture
+):
+    root = temporary_working_directory
+
+    _create_package(root / "packages" / "first", "first")
+
+    assert PackageIndex(root).get("packages/first") is not None
+
+    build = mocker.spy(PackageIndex, "build")
+
+    # what prepare does: files replaced atomically and the release file deleted
+    (root / "packages" / "first" / "RELEASE.md").write_text("release")
+    (root / "packages" / "first" / "CHANGELOG.md").write_text("changes")
+    (root / "packages" / "first" / "RELEASE.md").unlink()
+
+    assert PackageIndex(root).get("packages/first") is not None
+    assert PackageIndex(root).get("packages/first") is not None
+    build.assert_not_called()
+
+    (root / "packages" / "first" / "src" / "first" / "_version.py").write_text(
+        '__version__ = "0.1.0"\n'
+    )
+
+    package = PackageIndex(root).get("packages/first")
+
+    assert package is not None
+    assert package.version_files == [
+        "packages/first/src/first/__init__.py",
+        "packages/first/src/first/_version.py",
+    ]
+    build.assert_called_once()
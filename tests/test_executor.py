@@ -0,0 +1,226 @@
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from pytest_mock import MockerFixture
+
+from autopub import Autopub
+from autopub.exceptions import CommandFailed, CommandTimedOut, InvalidConfiguration
+from autopub.executor import Executor, OutputBuffer, Watchdog, summary_markdown
+from autopub.plugins import AutopubPlugin
+
+
+def python(code: str) -> list[str]:
+    return [sys.executable, "-c", code]
+
+
+def test_streams_output(capsys: pytest.CaptureFixture[str]):
+    executor = Executor()
+
+    result = executor.run(
+        python("print('hello'); import sys; print('oops', file=sys.stderr)")
+    )
+
+    assert result.returncode == 0
+    assert result.stdout == ""
+    assert capsys.readouterr().out.splitlines() == ["hello", "oops"]
+
+
+def test_captures_output(capsys: pytest.CaptureFixture[str]):
+    executor = Executor()
+
+    result = executor.run(python("print('hello')"), capture_output=True)
+
+    assert result.stdout == "hello\n"
+    assert capsys.readouterr().out == ""
+
+
+def test_runs_in_cwd(tmp_path: Path):
+    result = Executor().run(
+        python("import os; print(os.getcwd())"), cwd=tmp_path, capture_output=True
+    )
+
+    assert Path(result.stdout.strip()).resolve() == tmp_path.resolve()
+
+
+def test_output_buffer_keeps_the_end():
+    buffer = OutputBuffer(max_bytes=10)
+
+    buffer.append(b"abcdef\n")
+    buffer.append(b"ghijkl\n")
+
+    assert buffer.truncated
+    assert buffer.text() == "ef\nghijkl\n"
+
+
+def test_failure_has_the_end_of_the_output():
+    executor = Executor(output_bytes=100)
+
+    with pytest.raises(CommandFailed) as e:
+        executor.run(
+            python("import sys; print('x' * 1000); print('the error'); sys.exit(3)"),
+            capture_output=False,
+        )
+
+    assert e.value.returncode == 3
+    assert e.value.output.endswith("the error\n")
+    assert len(e.value.output) <= 100
+    assert "the error" in e.value.message
+
+
+def test_failure_with_captured_output_has_stderr():
+    with pytest.raises(CommandFailed) as e:
+        Executor().run(
+            python("import sys; print('out'); sys.exit('the error')"),
+            capture_output=True,
+        )
+
+    assert e.value.output == "the error\n"
+
+
+def test_timeout_kills_the_command():
+    executor = Executor(default_timeout=0.5)
+    started = time.perf_counter()
+
+    with pytest.raises(CommandTimedOut) as e:
+        executor.run(python("import time; time.sleep(30)"))
+
+    assert time.perf_counter() - started < 10
+    assert e.value.timeout == 0.5
+    assert "timed out after 0.5 seconds" in e.value.message
+    assert executor.results[0].timed_out
+
+
+def test_timeout_at_the_exit_is_not_a_timeout(mocker: MockerFixture):
+    exited = Watchdog.exited
+
+    def kill_then_exit(watchdog: Watchdog) -> None:
+        # the timer fires after the command exited, before it's recorded
+        watchdog.kill()
+        exited(watchdog)
+
+    mocker.patch.object(Watchdog, "exited", kill_then_exit)
+
+    result = Executor(default_timeout=30).run(python("pass"))
+
+    assert result.returncode == 0
+    assert not result.timed_out
+
+
+def test_watchdog_does_not_kill_exited_processes():
+    process = subprocess.Popen(python("pass"), start_new_session=os.name == "posix")
+    watchdog = Watchdog(process, timeout=None)
+
+    process.wait()
+    watchdog.exited()
+    watchdog.kill()
+
+    assert not watchdog.killed
+
+
+@pytest.mark.skipif(os.name != "posix", reason="needs process groups")
+def test_timeout_kills_background_processes_holding_the_output():
+    executor = Executor(default_timeout=1)
+    started = time.perf_counter()
+
+    result = executor.run(
+        python(
+            "import subprocess, sys; print('hi', flush=True); "
+            "subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])"
+        ),
+        capture_output=True,
+    )
+
+    assert time.perf_counter() - started < 10
+    assert result.returncode == 0
+    assert result.stdout == "hi\n"
+
+
+def test_timeout_argument_overrides_the_default():
+    executor = Executor(default_timeout=0.1)
+
+    result = executor.run(python("import time; time.sleep(0.5)"), timeout=30)
+
+    assert result.returncode == 0
+
+
+@pytest.mark.skipif(not hasattr(os, "wait4"), reason="needs os.wait4")
+def test_records_resource_usage():
+    executor = Executor()
+
+    executor.run(python("sum(range(10**6)); b = bytearray(50 * 1024 * 1024)"))
+
+    [result] = executor.results
+
+    assert result.cpu_time is not None and result.cpu_time > 0
+    assert result.max_rss is not None and result.max_rss > 50 * 1024 * 1024
+    assert result.wall_time > 0
+
+
+def test_run_all_runs_concurrently():
+    executor = Executor()
+    started = time.perf_counter()
+
+    results = executor.run_all([python("import time; time.sleep(1)")] * 4)
+
+    assert len(results) == 4
+    assert time.perf_counter() - started < 3.5
+
+
+def test_run_all_raises_failures():
+    executor = Executor()
+
+    with pytest.raises(CommandFailed):
+        executor.run_all([python("pass"), python("import sys; sys.exit(1)")])
+
+    assert len(executor.results) == 2
+
+
+def test_summary():
+    executor = Executor()
+
+    executor.run(python("pass"))
+
+    with pytest.raises(CommandFailed):
+        executor.run(python("import sys; sys.exit(2)"))
+
+    rows = executor.summary()
+
+    assert [row["status"] for row in rows] == ["ok", "exit 2"]
+    assert rows[0]["command"].endswith("-c pass")
+
+    markdown = summary_markdown(rows)
+
+    assert markdown.splitlines()[0] == "| command | status | wall | cpu | max rss |"
+    assert len(markdown.splitlines()) == 4
+
+
+def test_plugins_share_the_executor(temporary_working_directory: Path):
+    class Plugin(AutopubPlugin):
+        id = "plugin"
+
+    autopub = Autopub(plugins=[Plugin, Plugin])
+    autopub.config = {"command-timeout": 60}
+
+    autopub.validate_config()
+
+    assert autopub.executor.default_timeout == 60
+
+    for plugin in autopub.plugins:
+        assert plugin.executor is autopub.executor
+
+    assert autopub.plugins[0].run_command(python("print('hi')"), True) == "hi"
+    assert len(autopub.executor.results) == 1
+
+
+def test_invalid_command_timeout():
+    autopub = Autopub()
+    autopub.config = {"command-timeout": -1}
+
+    with pytest.raises(InvalidConfiguration) as e:
+        autopub.validate_config()
+
+    assert "autopub" in e.value.validation_errors
@@ -0,0 +1,129 @@
+import subprocess
+from pathlib import Path
+
+import pytest
+from pytest_mock import MockerFixture
+
+from autopub.executor import Executor
+from autopub.git_info import GitInfo
+
+
+def git(cwd: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", *args], cwd=cwd, check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+
+@pytest.fixture
+def shallow_clone(
+    temporary_working_directory: Path, monkeypatch: pytest.MonkeyPatch
+) -> Path:
+    for variable in ("GIT_AUTHOR", "GIT_COMMITTER"):
+        monkeypatch.setenv(f"{variable}_NAME", "autopub")
+        monkeypatch.setenv(f"{variable}_EMAIL", "autopub@autopub")
+
+    remote = temporary_working_directory / "remote.git"
+    seed = temporary_working_directory / "seed"
+
+    git(temporary_working_directory, "init", "--bare", "-b", "main", str(remote))
+    git(remote, "config", "uploadpack.allowAnySHA1InWant", "true")
+    git(temporary_working_directory, "clone", str(remote), str(seed))
+    git(seed, "checkout", "-b", "main")
+
+    (seed / "file.txt").touch()
+    git(seed, "add", "file.txt")
+
+    for version in ("0.1.0", "0.2.0"):
+        for index in range(3):
+            (seed / "file.txt").write_text(f"{version} {index}")
+            git(seed, "commit", "-am", f"{version} {index}")
+
+        git(seed, "tag", "-a", version, "-m", version)
+
+    (seed / "file.txt").write_text("new")
+    git(seed, "commit", "-am", "unreleased")
+    git(seed, "push", "origin", "main", "--tags")
+
+    clone = temporary_working_directory / "clone"
+    git(
+        temporary_working_directory,
+        "clone",
+        "--depth=1",
+        "--no-tags",
+        f"file://{remote}",
+        str(clone),
+    )
+
+    monkeypatch.chdir(clone)
+
+    return clone
+
+
+def test_merge_commit_parents_on_shallow_clone(shallow_clone: Path):
+    git_info = GitInfo()
+
+    parents = git_info.merge_commit_parents()
+
+    assert len(parents) == 1
+    assert git(shallow_clone, "log", "-1", "--format=%s", parents[0]) == "0.2.0 2"
+
+
+def test_changed_files_since_the_merge_base_on_shallow_clone(shallow_clone: Path):
+    seed = shallow_clone.parent / "seed"
+
+    # a branch made before the last release, while main moved on
+    git(seed, "checkout", "-b", "feature", "0.1.0")
+    (seed / "other.txt").write_text("feature")
+    git(seed, "add", "other.txt")
+    git(seed, "commit", "-m", "feature")
+    git(seed, "push", "origin", "feature")
+
+    git(shallow_clone, "fetch", "--depth=1", "origin", "feature")
+    git(shallow_clone, "checkout", "FETCH_HEAD")
+
+    base = git(seed, "rev-parse", "main")
+    git_info = GitInfo()
+    git_info.fetch(base)
+
+    assert git_info.changed_files_since_merge_base(base) == ["other.txt"]
+    assert git_info.merge_base(base) == git(seed, "rev-parse", "0.1.0^{commit}")
+
+
+def test_memoizes_queries(shallow_clone: Path, mocker: MockerFixture):
+    git_info = GitInfo()
+    run = mocker.spy(git_info, "run")
+
+    assert git_info.current_branch == "main"
+    assert git_info.is_shallow
+    assert git_info.current_branch == "main"
+    assert git_info.is_shallow
+
+    assert run.call_count == 2
+
+    git_info.invalidate()
+
+    assert git_info.current_branch == "main"
+    assert run.call_count == 3
+
+
+def test_changed_files_since_a_fetched_tag(shallow_clone: Path):
+    git_info = GitInfo()
+
+    git_info.fetch("refs/tags/0.2.0:refs/tags/0.2.0")
+
+    assert git(shallow_clone, "tag") == "0.2.0"
+    assert git_info.has_commit("0.2.0")
+    assert git_info.changed_files_since("0.2.0") == ["file.txt"]
+    assert git_info.is_shallow
+
+
+def test_commands_run_through_the_executor(shallow_clone: Path):
+    executor = Executor(default_timeout=60)
+    git_info = GitInfo(executor=executor)
+
+    git_info.fetch("main")
+
+    assert [result.command[:2] for result in executor.results] == [
+        ["git", "rev-parse"],
+        ["git", "fetch"],
+    ]
@@ -0,0 +1,274 @@
+import hashlib
+import json
+from pathlib import Path
+
+import pytest
+from pytest_httpserver import HTTPServer
+from werkzeug import Request, Response
+
+from autopub import Autopub
+from autopub.index import (
+    SIMPLE_JSON_CONTENT_TYPE,
+    IndexClient,
+    files_for_version,
+    is_complete,
+    parse_filename,
+)
+from autopub.plugins import AutopubPackageManagerPlugin, AutopubPlugin
+from autopub.types import ReleaseInfo
+from tests.conftest import make_sdist, make_wheel
+
+PROJECT = {
+    "meta": {"api-version": "1.1"},
+    "name": "example",
+    "files": [
+        {
+            "filename": "example-0.0.1.tar.gz",
+            "url": "https://files.example.com/example-0.0.1.tar.gz",
+            "hashes": {"sha256": "aaa"},
+        },
+        {
+            "filename": "example-1.0.0.tar.gz",
+            "url": "https://files.example.com/example-1.0.0.tar.gz",
+            "hashes": {"sha256": "bbb"},
+        },
+        {
+            "filename": "example-1.0.0-py3-none-any.whl",
+            "url": "https://files.example.com/example-1.0.0-py3-none-any.whl",
+            "hashes": {"sha256": "ccc"},
+        },
+    ],
+}
+
+
+def respond_with_project(request: Request) -> Response:
+    assert request.headers["Accept"] == SIMPLE_JSON_CONTENT_TYPE
+
+    if request.headers.get("If-None-Match") == '"v1"':
+        return Response(status=304)
+
+    return Response(
+        json.dumps(PROJECT),
+        content_type=SIMPLE_JSON_CONTENT_TYPE,
+        headers={"ETag": '"v1"'},
+    )
+
+
+def test_parse_filename():
+    assert parse_filename("example-1.0.0.tar.gz") == ("example", "1.0.0")
+    assert parse_filename("My_Example-1.0.0-py3-none-any.whl") == (
+        "my-example",
+        "1.0.0",
+    )
+    assert parse_filename("example-1.0.0-1-cp312-cp312-linux_x86_64.whl") == (
+        "example",
+        "1.0.0",
+    )
+    assert parse_filename("example-1.0.0.exe") is None
+
+
+def test_files_for_version():
+    files = {file["filename"]: file["hashes"]["sha256"] for file in PROJECT["files"]}
+
+    assert files_for_version(files, "Example", "1.0.0") == {
+        "example-1.0.0.tar.gz": "bbb",
+        "example-1.0.0-py3-none-any.whl": "ccc",
+    }
+    assert is_complete(files_for_version(files, "example", "1.0.0"))
+    assert not is_complete(files_for_version(files, "example", "0.0.1"))
+
+
+def test_files_for_version_compares_normalized_versions():
+    files = {
+        "example-1.0.0a59.tar.gz": "aaa",
+        "example-1.0.0a59-py3-none-any.whl": "bbb",
+        "example-1.0.0.tar.gz": "ccc",
+    }
+
+    assert files_for_version(files, "example", "1.0.0-alpha.59") == {
+        "example-1.0.0a59.tar.gz": "aaa",
+        "example-1.0.0a59-py3-none-any.whl": "bbb",
+    }
+
+
+@pytest.mark.parametrize(
+    "wheels, complete",
+    [
+        (["example-1.0.0-py3-none-any.whl"], True),
+        (["example-1.0.0-cp311-cp311-manylinux_2_17_x86_64.whl"], False),
+        (
+            [
+                "example-1.0.0-cp311-cp311-manylinux_2_17_x86_64.whl",
+                "example-1.0.0-cp312-cp312-manylinux_2_17_x86_64.whl",
+            ],
+            True,
+        ),
+        (["example-1.0.0-cp311-abi3-manylinux_2_17_x86_64.whl"], True),
+        (["example-1.0.0-cp312-abi3-manylinux_2_17_x86_64.whl"], False),
+    ],
+)
+def test_complete_releases_have_a_wheel_for_each_python(
+    wheels: list[str], complete: bool
+):
+    files = dict.fromkeys(["example-1.0.0.tar.gz", *wheels], "")
+
+    assert is_complete(files, ["3.11", "3.12"]) is complete
+
+
+def test_project_files_are_cached_with_their_etag(
+    tmp_path: Path, httpserver: HTTPServer
+):
+    httpserver.expect_request("/simple/example/").respond_with_handler(
+        respond_with_project
+    )
+
+    client = IndexClient(httpserver.url_for("/simple/"), tmp_path / "index.json")
+
+    first = client.project_files("Example")
+    second = client.project_files("example")
+
+    assert (
+        first
+        == second
+        == {
+            "example-0.0.1.tar.gz": "aaa",
+            "example-1.0.0.tar.gz": "bbb",
+            "example-1.0.0-py3-none-any.whl": "ccc",
+        }
+    )
+    assert [response.status_code for _, response in httpserver.log] == [200, 304]
+
+
+def test_unknown_projects_have_no_files(tmp_path: Path, httpserver: HTTPServer):
+    httpserver.expect_request("/simple/example/").respond_with_data(
+        "Not Found", status=404
+    )
+
+    client = IndexClient(httpserver.url_for("/simple/"), tmp_path / "index.json")
+
+    assert client.project_files("example") == {}
+
+
+def test_index_errors_are_ignored(tmp_path: Path, httpserver: HTTPServer):
+    httpserver.expect_request("/simple/example/").respond_with_data(
+        "<html></html>", content_type="text/html"
+    )
+
+    client = IndexClient(httpserver.url_for("/simple/"), tmp_path / "index.json")
+
+    assert client.project_files("example") is None
+
+
+def serve_published_files(httpserver: HTTPServer, directory: Path) -> None:
+    """Serve a source distribution and a wheel of example 1.0.0, as if they
+    were uploaded to the index, keeping them in `directory`."""
+    directory.mkdir()
+    files = [make_sdist(directory), make_wheel(directory)]
+
+    for file in files:
+        httpserver.expect_request(f"/files/{file.name}").respond_with_data(
+            file.read_bytes()
+        )
+
+    httpserver.expect_request("/simple/example/").respond_with_json(
+        {
+            "meta": {"api-version": "1.1"},
+            "files": [
+                {
+                    "filename": file.name,
+                    "url": f"../../files/{file.name}",
+                    "hashes": {"sha256": hashlib.sha256(file.read_bytes()).hexdigest()},
+                }
+                for file in files
+            ],
+        }
+    )
+
+
+def test_retried_release_skips_build_and_upload(
+    with_valid_artifact: Path, tmp_path: Path, httpserver: HTTPServer
+):
+    root = with_valid_artifact.parent.parent
+    (root / "pyproject.toml").write_text(
+        '[project]\nname = "example"\n\n'
+        f'[tool.autopub]\nindex-url = "{httpserver.url_for("/simple/")}"\n'
+    )
+
+    serve_published_files(httpserver, tmp_path / "published")
+
+    calls: list[str] = []
+
+    class PublishPlugin(AutopubPlugin, AutopubPackageManagerPlugin):
+        def build(self) -> None:
+            calls.append("build")
+
+        def publish(self, repository: str | None = None) -> None:
+            calls.append("publish")
+
+        def post_publish(self, release_info: ReleaseInfo) -> None:
+            calls.append("post_publish")
+
+    autopub = Autopub(plugins=[PublishPlugin])
+    autopub.build()
+    autopub.publish()
+
+    assert calls == ["post_publish"]
+    assert not (root / "RELEASE.md").exists()
+
+    # the published files are there for the release assets
+    for file in (tmp_path / "published").iterdir():
+        assert (root / "dist" / file.name).read_bytes() == file.read_bytes()
+
+
+def test_retried_release_is_built_when_a_download_fails(
+    with_valid_artifact: Path, tmp_path: Path, httpserver: HTTPServer
+):
+    root = with_valid_artifact.parent.parent
+    (root / "pyproject.toml").write_text(
+        '[project]\nname = "example"\n\n'
+        f'[tool.autopub]\nindex-url = "{httpserver.url_for("/simple/")}"\n'
+    )
+
+    # the wheel doesn't match its digest
+    httpserver.expect_request(
+        "/files/example-1.0.0-py3-none-any.whl"
+    ).respond_with_data(b"not the wheel")
+    serve_published_files(httpserver, tmp_path / "published")
+
+    calls: list[str] = []
+
+    class BuildPlugin(AutopubPlugin, AutopubPackageManagerPlugin):
+        def build(self) -> None:
+            calls.append("build")
+
+    Autopub(plugins=[BuildPlugin]).build()
+
+    assert calls == ["build"]
+    assert not (root / "dist" / "example-1.0.0.tar.gz").exists()
+
+
+def test_native_upload_skips_published_files(
+    with_valid_artifact: Path,
+    distributions: list[Path],
+    httpserver: HTTPServer,
+):
+    root = with_valid_artifact.parent.parent
+    (root / "pyproject.toml").write_text(
+        '[project]\nname = "example"\n\n'
+        "[tool.autopub]\n"
+        "native-upload = true\n"
+        f'index-url = "{httpserver.url_for("/simple/")}"\n'
+        f'upload-url = "{httpserver.url_for("/legacy/")}"\n'
+    )
+
+    # only the source distribution was uploaded before the job failed
+    httpserver.expect_request("/simple/example/").respond_with_json(
+        {"meta": {"api-version": "1.1"}, "files": PROJECT["files"][1:2]}
+    )
+    httpserver.expect_request("/legacy/").respond_with_data("OK")
+
+    Autopub().publish()
+
+    (upload,) = [request for request, _ in httpserver.log if request.path == "/legacy/"]
+
+    assert upload.files["content"].filename == "example-1.0.0-py3-none-any.whl"
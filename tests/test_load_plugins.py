@@ -1,4 +1,6 @@
 import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import pytest
@@ -125,3 +127,97 @@ def test_package_manager_plugins_load_correctly():
     poetry_plugins = load_plugins(["autopub.plugins.poetry"])
     assert len(poetry_plugins) == 1
     assert poetry_plugins[0].__name__ == "PoetryPlugin"
+
+
+def test_loads_local_plugins_without_changing_sys_path(
+    temporary_working_directory: Path,
+):
+    plugin_code = Path(__file__).parent / "fixtures/example_plugin.py"
+
+    first = temporary_working_directory / "first"
+    second = temporary_working_directory / "second"
+
+    for root in (first, second):
+        root.mkdir()
+        shutil.copy(plugin_code, root / "local_plugin.py")
+
+    sys_path = list(sys.path)
+
+    (first_plugin,) = load_plugins(["local_plugin"], root=first)
+    (second_plugin,) = load_plugins(["local_plugin"], root=second)
+
+    assert sys.path == sys_path
+    assert "local_plugin" not in sys.modules
+
+    # each project gets its own copy of the module
+    assert first_plugin.__name__ == second_plugin.__name__ == "ExamplePlugin"
+    assert first_plugin is not second_plugin
+    assert load_plugins(["local_plugin"], root=first) == [first_plugin]
+
+
+def test_loads_local_package_plugins_with_their_package(
+    temporary_working_directory: Path,
+):
+    plugin_code = (Path(__file__).parent / "fixtures/example_plugin.py").read_text()
+
+    for name in ("first", "second"):
+        package = temporary_working_directory / name / "myproj"
+        package.mkdir(parents=True)
+        (package / "__init__.py").touch()
+        (package / "helpers.py").write_text(f"NAME = {name!r}\n")
+        (package / "plugin.py").write_text(
+            f"{plugin_code}\n"
+            "from . import helpers\n"
+            "from myproj.helpers import NAME\n\n"
+            "ExamplePlugin.project = helpers.NAME\n"
+            "assert NAME == helpers.NAME\n"
+        )
+
+    sys_path = list(sys.path)
+
+    (first_plugin,) = load_plugins(
+        ["myproj.plugin"], root=temporary_working_directory / "first"
+    )
+    (second_plugin,) = load_plugins(
+        ["myproj.plugin"], root=temporary_working_directory / "second"
+    )
+
+    assert sys.path == sys_path
+    assert first_plugin.project == "first"
+    assert second_plugin.project == "second"
+
+    for name in [name for name in sys.modules if name.startswith("myproj")]:
+        del sys.modules[name]
+
+
+def test_loads_local_package_plugins_of_several_roots_concurrently(
+    temporary_working_directory: Path,
+):
+    plugin_code = (Path(__file__).parent / "fixtures/example_plugin.py").read_text()
+    roots = [temporary_working_directory / f"root{index}" for index in range(8)]
+
+    for root in roots:
+        package = root / "myproj"
+        package.mkdir(parents=True)
+        (package / "__init__.py").touch()
+        (package / "plugin.py").write_text(
+            f"{plugin_code}\nfrom . import helpers\n\n"
+            "ExamplePlugin.project = helpers.NAME\n"
+        )
+        (package / "helpers.py").write_text(f"NAME = {root.name!r}\n")
+
+    sys_path = list(sys.path)
+
+    def load(root: Path) -> str:
+        (plugin,) = load_plugins(["myproj.plugin"], root=root)
+
+        return plugin.project
+
+    with ThreadPoolExecutor(max_workers=len(roots)) as pool:
+        projects = list(pool.map(load, roots * 4))
+
+    assert projects == [root.name for root in roots * 4]
+    assert sys.path == sys_path
+
+    for name in [name for name in sys.modules if name.startswith("myproj")]:
+        del sys.modules[name]
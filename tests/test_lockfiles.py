@@ -0,0 +1,122 @@
+from pathlib import Path
+
+import tomlkit
+
+from autopub.lockfiles import update_package_entries, update_uv_lock
+
+UV_LOCK = """\
+version = 1
+revision = 2
+requires-python = ">=3.11"
+
+[[package]]
+name = "example-project"
+version = "0.1.0"
+source = { editable = "." }
+dependencies = [
+    { name = "rich" },
+]
+
+[package.metadata]
+requires-dist = [{ name = "rich", specifier = ">=13" }]
+
+[[package]]
+name = "rich"
+version = "13.9.4"
+source = { registry = "https://pypi.org/simple" }
+"""
+
+PYPROJECT = {
+    "project": {
+        "name": "Example_Project",
+        "version": "0.2.0",
+        "requires-python": ">=3.11",
+        "dependencies": ["rich>=13"],
+    }
+}
+
+
+def test_updates_uv_lock(tmp_path: Path):
+    lockfile = tmp_path / "uv.lock"
+    lockfile.write_text(UV_LOCK)
+
+    assert update_uv_lock(lockfile, PYPROJECT, "0.2.0")
+
+    # only the version of the project changed
+    assert lockfile.read_text() == UV_LOCK.replace(
+        'version = "0.1.0"', 'version = "0.2.0"'
+    )
+
+
+def test_does_not_update_stale_uv_lock(tmp_path: Path):
+    lockfile = tmp_path / "uv.lock"
+    lockfile.write_text(UV_LOCK)
+
+    stale_pyprojects = [
+        {"project": {**PYPROJECT["project"], "dependencies": ["rich", "httpx"]}},
+        {"project": {**PYPROJECT["project"], "dependencies": ["rich>=14"]}},
+        {"project": {**PYPROJECT["project"], "dependencies": ["rich[jupyter]>=13"]}},
+        {"project": {**PYPROJECT["project"], "requires-python": ">=3.12"}},
+        {"project": {**PYPROJECT["project"], "name": "renamed"}},
+    ]
+
+    for pyproject in stale_pyprojects:
+        assert not update_uv_lock(lockfile, pyproject, "0.2.0")
+
+    lockfile.write_text(UV_LOCK.replace("version = 1", "version = 2"))
+
+    assert not update_uv_lock(lockfile, PYPROJECT, "0.2.0")
+    assert 'version = "0.1.0"' in lockfile.read_text()
+
+
+def test_updates_package_entries(tmp_path: Path):
+    lockfile = tmp_path / "pdm.lock"
+    lockfile.write_text(
+        '[[package]]\nname = "example-project"\nversion = "0.1.0"\n\n'
+        '[[package]]\nname = "rich"\nversion = "0.1.0"\n'
+    )
+
+    assert update_package_entries(lockfile, "example_project", "0.2.0")
+    assert not update_package_entries(lockfile, "example_project", "0.2.0")
+
+    packages = tomlkit.parse(lockfile.read_text())["package"]
+
+    assert [package["version"] for package in packages] == ["0.2.0", "0.1.0"]
+
+
+def test_updates_uv_lock_with_equivalent_requires_python(tmp_path: Path):
+    lockfile = tmp_path / "uv.lock"
+    lockfile.write_text(
+        UV_LOCK.replace(
+            'requires-python = ">=3.11"', 'requires-python = ">=3.9.0, <4.0"'
+        )
+    )
+
+    pyproject = {"project": {**PYPROJECT["project"], "requires-python": ">=3.9.0,<4.0"}}
+
+    assert update_uv_lock(lockfile, pyproject, "0.2.0")
+
+
+def test_updates_this_projects_uv_lock(tmp_path: Path):
+    root = Path(__file__).parent.parent
+    lockfile = tmp_path / "uv.lock"
+    lockfile.write_text((root / "uv.lock").read_text())
+
+    pyproject = tomlkit.parse((root / "pyproject.toml").read_text())
+
+    assert update_uv_lock(lockfile, pyproject, "1.0.0-alpha.59")
+
+
+def test_writes_canonical_versions(tmp_path: Path):
+    uv_lock = tmp_path / "uv.lock"
+    uv_lock.write_text(UV_LOCK)
+
+    assert update_uv_lock(uv_lock, PYPROJECT, "1.0.0-alpha.59")
+    assert 'version = "1.0.0a59"' in uv_lock.read_text()
+
+    pdm_lock = tmp_path / "pdm.lock"
+    pdm_lock.write_text('[[package]]\nname = "example-project"\nversion = "1.0.0a59"\n')
+
+    assert not update_package_entries(pdm_lock, "example-project", "1.0.0-alpha.59")
+    assert update_package_entries(pdm_lock, "example-project", "1.0.0-alpha.60")
+    assert 'version = "1.0.0a60"' in pdm_lock.read_text()
@@ -0,0 +1,76 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from autopub import Autopub
+from autopub.manifest import MANIFEST_FILE, SUMS_FILE, hash_file, update_manifest
+from autopub.plugins import AutopubPlugin
+from tests.conftest import make_wheel
+
+
+def test_hash_file(tmp_path: Path):
+    file = tmp_path / "file"
+    file.write_bytes(b"x" * 3_000_000)
+
+    assert hash_file(file) == hashlib.sha256(b"x" * 3_000_000).hexdigest()
+
+
+def test_writes_sums_and_manifest(distributions: list[Path]):
+    dist = distributions[0].parent
+
+    digests = update_manifest(dist)
+
+    assert digests == {path.name: hash_file(path) for path in distributions}
+    assert (dist / SUMS_FILE).read_text() == "".join(
+        f"{digests[name]}  {name}\n" for name in sorted(digests)
+    )
+
+    manifest = json.loads((dist / MANIFEST_FILE).read_text())
+
+    assert [entry["filename"] for entry in manifest["files"]] == sorted(digests)
+    assert manifest["files"][0]["size"] == (dist / sorted(digests)[0]).stat().st_size
+
+
+def test_reuses_the_digests_of_unchanged_files(distributions: list[Path], mocker):
+    dist = distributions[0].parent
+    update_manifest(dist)
+
+    hash_files = mocker.patch("autopub.manifest.hash_files", return_value={})
+
+    update_manifest(dist)
+
+    hash_files.assert_not_called()
+
+
+def test_hashes_files_again_when_they_change(distributions: list[Path]):
+    sdist, wheel = distributions
+    before = update_manifest(wheel.parent)
+
+    wheel.unlink()
+    make_wheel(wheel.parent, "Metadata-Version: 2.1\nName: example\nVersion: 1.0.0\n")
+    os.utime(wheel, ns=(1, 1))
+
+    after = update_manifest(wheel.parent)
+
+    assert after[sdist.name] == before[sdist.name]
+    assert after[wheel.name] == hash_file(wheel) != before[wheel.name]
+
+    sdist.unlink()
+
+    assert update_manifest(wheel.parent) == {wheel.name: after[wheel.name]}
+    assert sdist.name not in (wheel.parent / SUMS_FILE).read_text()
+
+
+def test_build_writes_the_manifest(temporary_working_directory: Path):
+    class ABuildPlugin(AutopubPlugin):
+        def build(self):
+            (self.root / "dist").mkdir()
+            make_wheel(self.root / "dist")
+
+        def publish(self, **kwargs: str):  # pragma: no cover
+            ...
+
+    Autopub(plugins=[ABuildPlugin]).build()
+
+    assert (temporary_working_directory / "dist" / SUMS_FILE).exists()
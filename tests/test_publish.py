@@ -1,11 +1,18 @@
 import json
+import threading
 from pathlib import Path
 
 import pytest
 
 from autopub import Autopub
-from autopub.exceptions import ArtifactHashMismatch, ArtifactNotFound
+from autopub.exceptions import (
+    ArtifactHashMismatch,
+    ArtifactNotFound,
+    CommandFailed,
+    PublishFailed,
+)
 from autopub.plugins import AutopubPackageManagerPlugin, AutopubPlugin
+from autopub.types import ReleaseInfo
 
 
 def test_publish_fails_without_artifact():
@@ -49,3 +56,72 @@ def test_works(with_valid_artifact: Path):
     autopub.publish()
 
     assert published
+
+
+def test_publishes_to_every_repository_concurrently(with_valid_artifact: Path):
+    barrier = threading.Barrier(3, timeout=5)
+    published: list[str] = []
+    post_published = 0
+
+    class PublishPlugin(AutopubPlugin, AutopubPackageManagerPlugin):
+        def publish(self, repository: str) -> None:
+            # only passes when all the repositories are published at once
+            barrier.wait()
+            published.append(repository)
+
+        def post_publish(self, release_info: ReleaseInfo) -> None:
+            nonlocal post_published
+            post_published += 1
+
+    autopub = Autopub(plugins=[PublishPlugin])
+    autopub.publish(repository=["internal", "mirror", "pypi"])
+
+    assert sorted(published) == ["internal", "mirror", "pypi"]
+    assert post_published == 1
+
+
+def test_post_publish_waits_for_every_repository(with_valid_artifact: Path):
+    post_published = False
+
+    class PublishPlugin(AutopubPlugin, AutopubPackageManagerPlugin):
+        def publish(self, repository: str) -> None:
+            if repository != "pypi":
+                raise CommandFailed(["publish", repository], 1)
+
+        def post_publish(self, release_info: ReleaseInfo) -> None:
+            nonlocal post_published
+            post_published = True
+
+    autopub = Autopub(plugins=[PublishPlugin])
+
+    with pytest.raises(PublishFailed) as e:
+        autopub.publish(repository=["internal", "mirror", "pypi"])
+
+    assert e.value.errors == {
+        "internal": "Command publish internal failed with return code 1",
+        "mirror": "Command publish mirror failed with return code 1",
+    }
+    assert not post_published
+    assert (with_valid_artifact.parent.parent / "RELEASE.md").exists()
+
+
+def test_optional_repositories_do_not_fail_the_release(with_valid_artifact: Path):
+    post_published = False
+
+    (with_valid_artifact.parent.parent / "pyproject.toml").write_text(
+        '[tool.autopub]\noptional-repositories = ["mirror"]\n'
+    )
+
+    class PublishPlugin(AutopubPlugin, AutopubPackageManagerPlugin):
+        def publish(self, repository: str) -> None:
+            if repository == "mirror":
+                raise CommandFailed(["publish", repository], 1)
+
+        def post_publish(self, release_info: ReleaseInfo) -> None:
+            nonlocal post_published
+            post_published = True
+
+    autopub = Autopub(plugins=[PublishPlugin])
+    autopub.publish(repository=["mirror", "pypi"])
+
+    assert post_published
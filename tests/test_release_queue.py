@@ -0,0 +1,111 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from autopub import Autopub
+from autopub.exceptions import ReleaseQueueEmpty
+from autopub.plugins import AutopubPackageManagerPlugin, AutopubPlugin
+from autopub.types import ReleaseInfo
+
+RELEASE_TEXT = """---
+release type: {release_type}
+---
+
+{notes}
+"""
+
+
+class PullRequestPlugin(AutopubPlugin):
+    """Records a pull request number, like the GitHub plugin does."""
+
+    def on_release_notes_valid(self, release_info: ReleaseInfo) -> None:
+        number = len(list(self.root.glob("release-queue/*.json"))) + 1
+
+        release_info.pull_requests.append(number)
+        release_info.additional_release_notes.append(f"Contributed in #{number}")
+
+
+def _queue_release(root: Path, release_type: str, notes: str) -> Path:
+    (root / "RELEASE.md").write_text(
+        RELEASE_TEXT.format(release_type=release_type, notes=notes)
+    )
+
+    autopub = Autopub(plugins=[PullRequestPlugin])
+    autopub.check()
+
+    return autopub.enqueue()
+
+
+def test_enqueue(temporary_working_directory: Path):
+    queued = []
+
+    class QueuePlugin(AutopubPlugin):
+        def on_release_queued(self, release_info: ReleaseInfo) -> None:
+            queued.append(release_info)
+
+    (temporary_working_directory / "RELEASE.md").write_text(
+        RELEASE_TEXT.format(release_type="minor", notes="New feature.")
+    )
+
+    autopub = Autopub(plugins=[QueuePlugin])
+    autopub.check()
+    entry = autopub.enqueue()
+
+    assert not (temporary_working_directory / "RELEASE.md").exists()
+    assert autopub.release_queue == [entry]
+    assert json.loads(entry.read_text())["release_notes"] == "New feature."
+
+    (release_info,) = queued
+
+    assert release_info.changed_files == [f"release-queue/{entry.name}"]
+
+
+def test_publish_batch(temporary_working_directory: Path):
+    for release_type, notes in [
+        ("patch", "First fix."),
+        ("minor", "New feature."),
+        ("patch", "Second fix."),
+    ]:
+        _queue_release(temporary_working_directory, release_type, notes)
+
+    calls: list[str] = []
+    published: list[ReleaseInfo] = []
+
+    class VersionPlugin(AutopubPlugin):
+        def post_check(self, release_info: ReleaseInfo) -> None:
+            release_info.version = "1.1.0"
+
+    class ManagerPlugin(AutopubPlugin, AutopubPackageManagerPlugin):
+        def build(self) -> None:
+            calls.append("build")
+
+        def publish(self, repository: str | None = None, **kwargs) -> None:
+            calls.append(f"publish {repository}")
+
+        def post_publish(self, release_info: ReleaseInfo) -> None:
+            published.append(release_info)
+
+    autopub = Autopub(plugins=[VersionPlugin, ManagerPlugin])
+    autopub.publish_batch(repository="internal")
+
+    assert calls == ["build", "publish internal"]
+    assert autopub.release_queue == []
+
+    (release_info,) = published
+
+    assert release_info.version == "1.1.0"
+    assert release_info.release_type == "minor"
+    assert release_info.release_notes == "First fix.\n\nNew feature.\n\nSecond fix."
+    assert release_info.additional_release_notes == [
+        "Contributed in #1",
+        "Contributed in #2",
+        "Contributed in #3",
+    ]
+    assert release_info.pull_requests == [1, 2, 3]
+    assert len(release_info.changed_files) == 3
+
+
+def test_publish_batch_with_empty_queue(temporary_working_directory: Path):
+    with pytest.raises(ReleaseQueueEmpty):
+        Autopub().publish_batch()
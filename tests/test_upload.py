@@ -0,0 +1,187 @@
+import hashlib
+from email.parser import BytesParser
+from email.policy import HTTP
+from pathlib import Path
+
+import pytest
+from pytest_httpserver import HTTPServer
+from werkzeug import Request, Response
+
+from autopub import Autopub
+from autopub.distributions import Distribution
+from autopub.exceptions import UploadFailed
+from autopub.upload import MultipartBody, Uploader, metadata_fields
+
+uploads: list[Request]
+
+
+def record_upload(request: Request) -> Response:
+    content = request.files["content"].read()
+
+    assert request.form["sha256_digest"] == hashlib.sha256(content).hexdigest()
+
+    # only the sha256 digest is sent when it comes from the manifest
+    if "blake2_256_digest" in request.form:
+        assert (
+            request.form["blake2_256_digest"]
+            == hashlib.blake2b(content, digest_size=32).hexdigest()
+        )
+
+    uploads.append(request)
+
+    return Response("OK")
+
+
+@pytest.fixture(autouse=True)
+def reset_uploads():
+    global uploads
+    uploads = []
+
+
+def test_metadata_fields(distributions: list[Path]):
+    sdist, wheel = distributions
+
+    fields = metadata_fields(Distribution.from_path(wheel))
+
+    assert (":action", "file_upload") in fields
+    assert ("filetype", "bdist_wheel") in fields
+    assert ("pyversion", "py3") in fields
+    assert ("name", "example") in fields
+    assert ("version", "1.0.0") in fields
+    assert ("metadata_version", "2.1") in fields
+    assert ("requires_dist", "rich") in fields
+    assert ("description_content_type", "text/markdown") in fields
+    assert ("description", "# Example\n\nThis is an example.\n") in fields
+    assert [value for name, value in fields if name == "classifiers"] == [
+        "Programming Language :: Python :: 3",
+        "License :: OSI Approved :: MIT License",
+    ]
+
+    fields = metadata_fields(Distribution.from_path(sdist))
+
+    assert ("filetype", "sdist") in fields
+    assert ("pyversion", "source") in fields
+
+
+def test_multipart_body_is_streamed_with_digests(distributions: list[Path]):
+    _, wheel = distributions
+
+    body = MultipartBody([("name", "example")], wheel)
+    data = b"".join(body)
+
+    assert len(data) == len(body)
+    assert (
+        body.digests["sha256_digest"] == hashlib.sha256(wheel.read_bytes()).hexdigest()
+    )
+
+    message = BytesParser(policy=HTTP).parsebytes(
+        f"Content-Type: {body.content_type}\r\n\r\n".encode() + data
+    )
+    parts = {
+        part.get_param("name", header="content-disposition"): part
+        for part in message.iter_parts()
+    }
+
+    assert parts["content"].get_content() == wheel.read_bytes()
+    assert parts["md5_digest"].get_content().strip() == body.digests["md5_digest"]
+
+
+def test_uploads_all_files(distributions: list[Path], httpserver: HTTPServer):
+    httpserver.expect_request("/legacy/", method="POST").respond_with_handler(
+        record_upload
+    )
+
+    uploader = Uploader(
+        url=httpserver.url_for("/legacy/"), username="user", password="secret"
+    )
+    digests = uploader.upload(distributions)
+
+    assert sorted(request.files["content"].filename for request in uploads) == [
+        "example-1.0.0-py3-none-any.whl",
+        "example-1.0.0.tar.gz",
+    ]
+    assert uploads[0].authorization.username == "user"
+    assert uploads[0].authorization.password == "secret"
+    assert set(digests) == set(distributions)
+
+
+def test_retries_transient_failures(distributions: list[Path], httpserver: HTTPServer):
+    _, wheel = distributions
+
+    httpserver.expect_ordered_request("/legacy/").respond_with_data(
+        "Unavailable", status=503
+    )
+    httpserver.expect_ordered_request("/legacy/").respond_with_handler(record_upload)
+
+    uploader = Uploader(url=httpserver.url_for("/legacy/"), backoff=0)
+    uploader.upload([wheel])
+
+    assert len(uploads) == 1
+    httpserver.check_assertions()
+
+
+def test_does_not_retry_rejected_uploads(
+    distributions: list[Path], httpserver: HTTPServer
+):
+    httpserver.expect_request("/legacy/").respond_with_data(
+        "File already exists", status=400
+    )
+
+    uploader = Uploader(url=httpserver.url_for("/legacy/"), backoff=0)
+
+    with pytest.raises(UploadFailed) as e:
+        uploader.upload(distributions)
+
+    assert e.value.errors == {
+        "example-1.0.0-py3-none-any.whl": "400 File already exists",
+        "example-1.0.0.tar.gz": "400 File already exists",
+    }
+    assert len(httpserver.log) == 2
+
+
+def test_gives_up_after_retries(distributions: list[Path], httpserver: HTTPServer):
+    _, wheel = distributions
+
+    httpserver.expect_request("/legacy/").respond_with_data("Bad gateway", status=502)
+
+    uploader = Uploader(url=httpserver.url_for("/legacy/"), retries=2, backoff=0)
+
+    with pytest.raises(UploadFailed, match="gave up after 3 attempts"):
+        uploader.upload([wheel])
+
+    assert len(httpserver.log) == 3
+
+
+def test_publish_uploads_natively(
+    with_valid_artifact: Path,
+    distributions: list[Path],
+    httpserver: HTTPServer,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    root = with_valid_artifact.parent.parent
+
+    (root / "pyproject.toml").write_text(
+        "[tool.autopub]\n"
+        "native-upload = true\n"
+        f'upload-url = "{httpserver.url_for("/legacy/")}"\n'
+    )
+    monkeypatch.setenv("AUTOPUB_UPLOAD_PASSWORD", "token")
+
+    httpserver.expect_request("/legacy/").respond_with_handler(record_upload)
+
+    Autopub().publish()
+
+    assert len(uploads) == 2
+    assert uploads[0].authorization.username == "__token__"
+    assert not (root / "RELEASE.md").exists()
+
+
+def test_known_digests_are_not_computed_again(distributions: list[Path]):
+    _, wheel = distributions
+
+    body = MultipartBody([("name", "example")], wheel, digests={"sha256_digest": "0"})
+    data = b"".join(body)
+
+    assert len(data) == len(body)
+    assert body.digests == {"sha256_digest": "0"}
+    assert b'name="md5_digest"' not in data
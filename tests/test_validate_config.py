@@ -62,3 +62,35 @@ def test_validate_config_invalid():
         autopub.validate_config()
 
     assert "plugin_with_config" in e.value.validation_errors
+
+
+def test_validate_config_checks_every_autopub_option():
+    autopub = Autopub()
+
+    autopub.config = {
+        "build-matrix-workers": 0,
+        "upload-retries": -1,
+        "command-timeout": 60,
+    }
+
+    with pytest.raises(InvalidConfiguration) as e:
+        autopub.validate_config()
+
+    errors = e.value.validation_errors["autopub"].errors()
+
+    assert sorted(error["loc"] for error in errors) == [
+        ("build-matrix-workers",),
+        ("upload-retries",),
+    ]
+
+
+def test_validated_settings_are_reused():
+    autopub = Autopub()
+
+    autopub.config = {"build-matrix": ["3.12"], "native-upload": True}
+
+    autopub.validate_config()
+
+    assert autopub.settings.build_matrix == ["3.12"]
+    assert autopub.settings.native_upload
+    assert autopub.settings is autopub.settings
@@ -0,0 +1,131 @@
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from autopub import Autopub
+from autopub.exceptions import DistributionsInvalid
+from autopub.plugins import AutopubPackageManagerPlugin, AutopubPlugin
+from autopub.validation import validate_distribution, validate_distributions
+from tests.conftest import EXAMPLE_METADATA, make_sdist, make_wheel
+
+
+def test_valid_distributions(distributions: list[Path]):
+    assert validate_distributions(distributions) == {}
+
+
+def test_missing_fields(tmp_path: Path):
+    sdist = make_sdist(tmp_path, "Metadata-Version: 2.1\nName: example\n")
+
+    assert validate_distribution(str(sdist)) == ["Version is missing"]
+
+
+def test_invalid_fields(tmp_path: Path):
+    metadata = EXAMPLE_METADATA.replace("Version: 1.0.0", "Version: one").replace(
+        "Metadata-Version: 2.1", "Metadata-Version: 9.9"
+    )
+    sdist = make_sdist(tmp_path, metadata)
+
+    assert validate_distribution(str(sdist)) == [
+        "Metadata-Version 9.9 is unknown",
+        "Version 'one' is invalid",
+        "the file name doesn't match the version one",
+    ]
+
+
+def test_newer_minor_metadata_version_is_a_warning(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+):
+    metadata = EXAMPLE_METADATA.replace(
+        "Metadata-Version: 2.1", "Metadata-Version: 2.5"
+    )
+    sdist = make_sdist(tmp_path, metadata)
+
+    assert validate_distribution(str(sdist)) == []
+    assert "Metadata-Version 2.5, which is newer" in capsys.readouterr().out
+
+
+def test_unsupported_description_content_type(tmp_path: Path):
+    metadata = EXAMPLE_METADATA.replace("text/markdown", "text/html")
+    wheel = make_wheel(tmp_path, metadata)
+
+    assert validate_distribution(str(wheel)) == [
+        "Description-Content-Type text/html is not supported"
+    ]
+
+
+def test_broken_description_is_reported(tmp_path: Path):
+    pytest.importorskip("readme_renderer")
+
+    metadata = EXAMPLE_METADATA.replace(
+        "Description-Content-Type: text/markdown\n", ""
+    ).replace("# Example", "Example\n===\n\n`broken link <")
+    sdist = make_sdist(tmp_path, metadata)
+
+    (error,) = validate_distribution(str(sdist))
+
+    assert error.startswith("the description can't be rendered")
+
+
+def test_record_mismatch(tmp_path: Path):
+    wheel = make_wheel(tmp_path)
+
+    with zipfile.ZipFile(wheel, "a") as f:
+        f.writestr("example/extra.py", "")
+
+    assert validate_distribution(str(wheel)) == ["example/extra.py is not in RECORD"]
+
+
+def test_record_hash_mismatch(tmp_path: Path):
+    wheel = make_wheel(tmp_path)
+    tampered = tmp_path / "tampered" / wheel.name
+    tampered.parent.mkdir()
+
+    with zipfile.ZipFile(wheel) as source, zipfile.ZipFile(tampered, "w") as target:
+        for name in source.namelist():
+            data = source.read(name)
+
+            if name == "example/__init__.py":
+                data = b"__version__ = '6.6.6'\n"
+
+            target.writestr(name, data)
+
+    assert validate_distribution(str(tampered)) == [
+        "example/__init__.py doesn't match its hash in RECORD"
+    ]
+
+
+def test_unreadable_distribution(tmp_path: Path):
+    wheel = tmp_path / "example-1.0.0-py3-none-any.whl"
+    wheel.write_bytes(b"not a zip file")
+
+    (error,) = validate_distribution(str(wheel))
+
+    assert error.startswith("can't be read")
+
+
+def test_publish_stops_before_uploading_invalid_distributions(
+    with_valid_artifact: Path, distributions: list[Path]
+):
+    published = False
+
+    # the description can't be rendered by the index
+    make_wheel(
+        distributions[0].parent,
+        EXAMPLE_METADATA.replace("text/markdown", "text/html"),
+    )
+
+    class PublishPlugin(AutopubPlugin, AutopubPackageManagerPlugin):
+        def publish(self, repository: str | None = None) -> None:
+            nonlocal published
+            published = True
+
+    with pytest.raises(DistributionsInvalid) as e:
+        Autopub(plugins=[PublishPlugin]).publish()
+
+    assert e.value.errors == {
+        "example-1.0.0-py3-none-any.whl": [
+            "Description-Content-Type text/html is not supported"
+        ]
+    }
+    assert not published
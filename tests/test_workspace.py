@@ -0,0 +1,189 @@
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from autopub.exceptions import WorkspaceCommandFailed
+from autopub.workspace import Workspace
+
+FAKE_MANAGER_PLUGIN = """
+from autopub.plugins import AutopubPackageManagerPlugin, AutopubPlugin
+
+
+class FakeManagerPlugin(AutopubPlugin, AutopubPackageManagerPlugin):
+    id = "fake_manager"
+
+    def build(self):
+        (self.root / "dist").mkdir(exist_ok=True)
+        (self.root / "dist" / "built").touch()
+
+    def publish(self, repository=None, **kwargs):
+        (self.root / "dist" / "published").write_text(repository or "")
+"""
+
+RELEASE_TEXT = """---
+release type: {release_type}
+---
+
+Release of {name}.
+"""
+
+
+def git(cwd: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", *args], cwd=cwd, check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+
+def _create_package(path: Path, name: str, version: str) -> None:
+    path.mkdir(parents=True)
+    (path / "pyproject.toml").write_text(
+        f'[project]\nname = "{name}"\nversion = "{version}"\n\n'
+        '[tool.autopub]\nplugins = ["fake_manager"]\n'
+    )
+    (path / "fake_manager.py").write_text(FAKE_MANAGER_PLUGIN)
+
+
+@pytest.fixture
+def workspace(
+    temporary_working_directory: Path, monkeypatch: pytest.MonkeyPatch
+) -> Path:
+    for variable in ("GIT_AUTHOR", "GIT_COMMITTER"):
+        monkeypatch.setenv(f"{variable}_NAME", "autopub")
+        monkeypatch.setenv(f"{variable}_EMAIL", "autopub@autopub")
+
+    remote = temporary_working_directory / "remote.git"
+    clone = temporary_working_directory / "clone"
+
+    git(temporary_working_directory, "init", "--bare", "-b", "main", str(remote))
+    git(temporary_working_directory, "clone", str(remote), str(clone))
+    git(clone, "checkout", "-b", "main")
+
+    (clone / ".gitignore").write_text(".autopub/\ndist/\n__pycache__/\n")
+    _create_package(clone / "packages" / "first", "first", "1.0.0")
+    _create_package(clone / "packages" / "second", "second", "0.1.0")
+    _create_package(clone / "packages" / "unchanged", "unchanged", "2.0.0")
+
+    (clone / "packages" / "first" / "RELEASE.md").write_text(
+        RELEASE_TEXT.format(release_type="minor", name="first")
+    )
+    (clone / "packages" / "second" / "RELEASE.md").write_text(
+        RELEASE_TEXT.format(release_type="patch", name="second")
+    )
+
+    git(clone, "add", ".")
+    git(clone, "commit", "-m", "initial")
+    git(clone, "push", "origin", "main")
+
+    monkeypatch.chdir(clone)
+
+    return clone
+
+
+def test_releases_packages_with_release_files(workspace: Path):
+    releases = Workspace().check()
+
+    assert {path: release.version for path, release in releases.items()} == {
+        "packages/first": "1.1.0",
+        "packages/second": "0.1.1",
+    }
+
+    Workspace().prepare()
+    Workspace().build()
+    Workspace().publish(repository="internal")
+
+    for name in ("first", "second"):
+        package = workspace / "packages" / name
+
+        assert not (package / "RELEASE.md").exists()
+        assert (package / "dist" / "built").exists()
+        assert (package / "dist" / "published").read_text() == "internal"
+
+    assert not (workspace / "packages" / "unchanged" / "dist").exists()
+
+    # a single commit with both releases, pushed together with the tags
+    assert git(workspace, "status", "--porcelain", "--untracked-files=no") == ""
+    assert git(workspace, "log", "-1", "--format=%s") == (
+        "🤖 Release first-1.1.0, second-0.1.1"
+    )
+    assert git(workspace, "rev-parse", "HEAD") == git(
+        workspace, "rev-parse", "origin/main"
+    )
+    assert git(workspace, "ls-remote", "--tags", "origin").count("refs/tags/") == 2
+
+    changed_files = git(workspace, "show", "--name-only", "--format=", "HEAD")
+
+    assert sorted(changed_files.splitlines()) == [
+        "packages/first/CHANGELOG.md",
+        "packages/first/RELEASE.md",
+        "packages/first/pyproject.toml",
+        "packages/second/CHANGELOG.md",
+        "packages/second/RELEASE.md",
+        "packages/second/pyproject.toml",
+    ]
+
+
+def test_reports_the_packages_that_failed(workspace: Path):
+    (workspace / "packages" / "second" / "RELEASE.md").write_text("nope")
+
+    with pytest.raises(WorkspaceCommandFailed) as exception_info:
+        Workspace().check()
+
+    assert exception_info.value.errors == {
+        "packages/second": "Release note is missing release type"
+    }
+
+
+def test_commits_the_packages_published_when_others_fail(workspace: Path):
+    Workspace().check()
+    Workspace().prepare()
+    Workspace().build()
+
+    # not an AutopubException
+    (workspace / "packages" / "second" / "fake_manager.py").write_text(
+        FAKE_MANAGER_PLUGIN.replace(
+            '(self.root / "dist" / "published").write_text(repository or "")',
+            'raise FileNotFoundError("no such binary")',
+        )
+    )
+
+    with pytest.raises(WorkspaceCommandFailed) as exception_info:
+        Workspace().publish()
+
+    assert exception_info.value.errors == {
+        "packages/second": "FileNotFoundError: no such binary"
+    }
+
+    assert (workspace / "packages" / "first" / "dist" / "published").exists()
+    assert git(workspace, "log", "-1", "--format=%s") == "🤖 Release first-1.1.0"
+    assert git(workspace, "ls-remote", "--tags", "origin").count("refs/tags/") == 1
+
+
+def test_creates_a_github_release_for_each_tag(
+    workspace: Path, monkeypatch: pytest.MonkeyPatch, mocker
+):
+    monkeypatch.setenv("GITHUB_TOKEN", "fake-token")
+    (workspace / "pyproject.toml").write_text('[tool.autopub]\nplugins = ["github"]\n')
+
+    github = mocker.patch("autopub.plugins.github.Github")
+    repository = github.return_value.get_repo.return_value
+    remote_tags: list[str] = []
+
+    # the tags are pushed before the releases are created
+    repository.create_git_release.side_effect = lambda **kwargs: remote_tags.append(
+        git(workspace, "ls-remote", "--tags", "origin")
+    )
+
+    Workspace().check()
+    Workspace().prepare()
+    Workspace().build()
+    Workspace().publish()
+
+    assert [
+        (call.kwargs["tag"], call.kwargs["name"])
+        for call in repository.create_git_release.call_args_list
+    ] == [("first-1.1.0", "first-1.1.0"), ("second-0.1.1", "second-0.1.1")]
+    assert all(
+        "refs/tags/first-1.1.0" in tags and "refs/tags/second-0.1.1" in tags
+        for tags in remote_tags
+    )